@@ -0,0 +1,65 @@
+"""
+Runs every benchmark, offline, and writes the results as JSON to
+`--output`; with `--baseline`, also compares them to a previous run,
+exiting with an error when any got slower by more than `--tolerance`.
+
+`python -m benchmarks --rows 200000`
+`python -m benchmarks --baseline baseline.json`
+"""
+import sys
+import json
+import time
+import platform
+import argparse
+
+from benchmarks import imdb_scan_bench, imdb_movie_bench, file_s3_bench
+
+
+def compare(results, baseline, tolerance: float):
+    regressions = {}
+    for name, value in results.items():
+        before = baseline.get(name)
+        if before and value < before * (1 - tolerance):
+            regressions[name] = {'baseline': before, 'current': value}
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000, help='Rows of the synthetic IMDB dataset')
+    parser.add_argument('--calls', type=int, default=200000, help='Calls to IMDbMovie.get_initial_from')
+    parser.add_argument('--docs', type=int, default=20000, help='Documents serialized and written')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_output.txt', help='File to which the JSON results are written')
+    parser.add_argument('--baseline', default=None, help='JSON output of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Slowdown tolerated against the baseline')
+    args = parser.parse_args()
+
+    results = {}
+    results.update(imdb_scan_bench.run(args.rows, seed=args.seed))
+    results.update(imdb_movie_bench.run(args.calls, seed=args.seed))
+    results.update(file_s3_bench.run(args.docs, seed=args.seed))
+
+    output = {
+        'timestamp': int(time.time()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'rows': args.rows, 'calls': args.calls, 'docs': args.docs, 'seed': args.seed},
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f_in:
+            baseline = json.load(f_in)['results']
+        output['regressions'] = compare(results, baseline, args.tolerance)
+    with open(args.output, 'w') as f_out:
+        json.dump(output, f_out, indent=2)
+    for name, value in results.items():
+        print(f'{name}: {value:,.1f}')
+    for name, regression in output.get('regressions', {}).items():
+        print(f'REGRESSION {name}: {regression["baseline"]:,.1f} -> {regression["current"]:,.1f}')
+    if output.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the JSON serialization of TMDB-like documents, and the write
+throughput of `FileS3.write` against a local, in-memory, S3 stand-in,
+so that only our side of the write is measured.
+
+`python -m benchmarks.file_s3_bench --docs 20000`
+"""
+from typing import Dict
+
+import json
+import time
+import argparse
+
+from tdd.pipeline import FileS3
+from benchmarks.synthetic import synthetic_documents
+
+
+class LocalS3:
+    """
+    Keeps the uploaded objects in memory, as the S3 client would in S3.
+    """
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_fileobj(self, fileobj, Bucket: str, Key: str):
+        self.objects[(Bucket, Key)] = fileobj.read()
+
+
+def run(docs: int, seed: int = 42) -> Dict[str, float]:
+    documents = synthetic_documents(docs, seed=seed)
+
+    started = time.perf_counter()
+    size = sum(len(json.dumps(doc).encode('utf-8')) for doc in documents)
+    serialize_secs = time.perf_counter() - started
+
+    s3 = LocalS3()
+    started = time.perf_counter()
+    for doc in documents:
+        FileS3(f's3://benchmarks/tmdb/movies/{doc["id"]}.json', s3=s3).write(doc)
+    write_secs = time.perf_counter() - started
+
+    return {
+        'json_serialize_docs_per_sec': docs / serialize_secs,
+        'json_serialize_mb_per_sec': size / serialize_secs / 1024 / 1024,
+        'file_s3_write_docs_per_sec': docs / write_secs,
+        'file_s3_write_mb_per_sec': size / write_secs / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=20000)
+    args = parser.parse_args()
+    for name, value in run(args.docs).items():
+        print(f'{name}: {value:,.1f}')
+
+
+if __name__ == '__main__':
+    main()
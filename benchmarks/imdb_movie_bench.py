@@ -0,0 +1,45 @@
+"""
+Measures calls/sec of `IMDbMovie.get_initial_from`, on plain ascii
+titles (the fast path) and on titles with accents (transliterated),
+against the legacy version, which transliterated every title.
+
+`python -m benchmarks.imdb_movie_bench --calls 200000`
+"""
+from typing import Dict
+
+import time
+import argparse
+
+from tdd.pipeline import IMDbMovie
+from benchmarks.synthetic import synthetic_titles
+from benchmarks.imdb_scan_bench import LegacyIMDbMovie
+
+
+def measure(titles, get_initial_from=IMDbMovie.get_initial_from) -> float:
+    started = time.perf_counter()
+    for title in titles:
+        get_initial_from(title)
+    return len(titles) / (time.perf_counter() - started)
+
+
+def run(calls: int, seed: int = 42) -> Dict[str, float]:
+    ascii_titles = synthetic_titles(calls, seed=seed, ascii_only=True)
+    mixed_titles = synthetic_titles(calls, seed=seed)
+    return {
+        'initial_legacy_ascii_calls_per_sec': measure(ascii_titles, LegacyIMDbMovie.get_initial_from),
+        'initial_ascii_calls_per_sec': measure(ascii_titles),
+        'initial_legacy_mixed_calls_per_sec': measure(mixed_titles, LegacyIMDbMovie.get_initial_from),
+        'initial_mixed_calls_per_sec': measure(mixed_titles),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    for name, value in run(args.calls).items():
+        print(f'{name}: {value:,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Measures rows/sec of the scan of a synthetic `title.basics.tsv.gz`:
+the legacy scan, as it was before the fast scan was introduced (a
+plain IMDbMovie per row, always transliterated, default csv dialect),
+the per-row scan of today's slotted IMDbMovie (`fast=False`), and the
+fast scan of `IMDb.extract_movie_refs_from`.
+
+`python -m benchmarks.imdb_scan_bench --rows 500000`
+"""
+from typing import Dict, List
+
+import io
+import csv
+import gzip
+import time
+import codecs
+import string
+import argparse
+import unidecode
+
+from tdd.pipeline import IMDb
+from benchmarks.synthetic import synthetic_tsv_gz
+
+
+class LegacyIMDbMovie:
+    """
+    IMDbMovie as it was before the fast scan, kept here as the baseline:
+    no `__slots__`, columns looked up in the header for every row, and
+    every title transliterated.
+    """
+
+    def __init__(self, header: List[str], row: List[str]):
+        ix_id = header.index('tconst')
+        ix_type = header.index('titleType')
+        ix_title = header.index('primaryTitle')
+        ix_year = header.index('startYear')
+        self.id = row[ix_id]
+        self.type = row[ix_type]
+        self.title = row[ix_title]
+        self.year = LegacyIMDbMovie.get_year_from(row[ix_year])
+        self.initial = LegacyIMDbMovie.get_initial_from(self.title)
+
+    @staticmethod
+    def get_year_from(x):
+        try:
+            return int(x)
+        except:
+            return None
+
+    @staticmethod
+    def get_initial_from(x):
+        initial = str(x)
+        initial = unidecode.unidecode(initial)
+        initial = initial.translate(str.maketrans('', '', string.punctuation))
+        if initial:
+            initial = initial.strip().upper()
+            if len(initial) < 2:
+                missing_len = 2 - len(initial)
+                initial += ''.join(['_'] * missing_len)
+            initial = initial[0:2]
+        return initial
+
+
+def legacy_scan(stream, year: int, initial: str):
+    with gzip.open(stream) as f_in:
+        f_cur = codecs.iterdecode(f_in, 'utf-8')
+        csv_reader = csv.reader(f_cur, delimiter='\t')
+        header = next(csv_reader)
+        for row in csv_reader:
+            imdb_movie = LegacyIMDbMovie(header, row)
+            if initial == imdb_movie.initial and year == imdb_movie.year and imdb_movie.type == 'movie':
+                yield imdb_movie
+
+
+def measure(scan, data: bytes, rows: int) -> float:
+    started = time.perf_counter()
+    for _ in scan(io.BytesIO(data), 2004, 'TH'):
+        pass
+    return rows / (time.perf_counter() - started)
+
+
+def run(rows: int, seed: int = 42) -> Dict[str, float]:
+    data = synthetic_tsv_gz(rows, seed=seed)
+    imdb = IMDb.__new__(IMDb)
+    return {
+        'imdb_scan_legacy_rows_per_sec': measure(legacy_scan, data, rows),
+        'imdb_scan_per_row_rows_per_sec': measure(
+            lambda stream, year, initial: imdb.extract_movie_refs_from(stream, year, initial, fast=False), data, rows),
+        'imdb_scan_fast_rows_per_sec': measure(imdb.extract_movie_refs_from, data, rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+    results = run(args.rows)
+    before = results['imdb_scan_legacy_rows_per_sec']
+    per_row = results['imdb_scan_per_row_rows_per_sec']
+    after = results['imdb_scan_fast_rows_per_sec']
+    print(f'legacy scan : {before:,.0f} rows/sec')
+    print(f'per-row scan: {per_row:,.0f} rows/sec ({per_row / before:.1f}x)')
+    print(f'fast scan   : {after:,.0f} rows/sec ({after / before:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Deterministic synthetic data for the benchmarks: a `title.basics.tsv.gz`
+shaped like the IMDB dataset, titles, and TMDB-like documents. The same
+`seed` always yields the same data, so results compare across runs.
+
+`python -m benchmarks.synthetic --rows 1000000 --output title.basics.tsv.gz`
+"""
+from typing import Dict, List
+
+import gzip
+import random
+import argparse
+
+HEADER = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult', 'startYear', 'endYear', 'runtimeMinutes', 'genres']
+TYPES = ['movie', 'short', 'tvEpisode', 'tvEpisode', 'tvEpisode', 'tvSeries', 'video']
+WORDS = ['The', 'Adventure', 'Love', 'Night', 'Água', 'Été', 'Zoo', 'Black', 'Man', 'of', '"Quoted"', 'Über']
+ASCII_WORDS = [word for word in WORDS if all(ord(c) < 128 for c in word)]
+
+
+def synthetic_titles(count: int, seed: int = 42, ascii_only: bool = False) -> List[str]:
+    rnd = random.Random(seed)
+    words = ASCII_WORDS if ascii_only else WORDS
+    return [' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 4))) for _ in range(count)]
+
+
+def synthetic_tsv_gz(rows: int, seed: int = 42) -> bytes:
+    rnd = random.Random(seed)
+    lines = ['\t'.join(HEADER)]
+    for i in range(rows):
+        title = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 4)))
+        year = str(rnd.randint(1900, 2020)) if rnd.random() > 0.05 else '\\N'
+        lines.append('\t'.join([
+            f'tt{i:07d}', rnd.choice(TYPES), title, title, '0', year, '\\N', '90', 'Drama']))
+    return gzip.compress('\n'.join(lines).encode('utf-8'))
+
+
+def synthetic_documents(count: int, seed: int = 42) -> List[Dict]:
+    """
+    Documents shaped like the TMDB `find` responses we store.
+    """
+    rnd = random.Random(seed)
+    titles = synthetic_titles(count, seed=seed)
+    return [{
+        'id': 1000 + i,
+        'imdb_id': f'tt{i:07d}',
+        'title': title,
+        'original_title': title,
+        'overview': ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(20, 80))),
+        'release_date': f'{rnd.randint(1900, 2020)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}',
+        'genre_ids': [rnd.randint(1, 100) for _ in range(rnd.randint(1, 4))],
+        'popularity': round(rnd.random() * 100, 3),
+        'vote_average': round(rnd.random() * 10, 1),
+        'vote_count': rnd.randint(0, 10000),
+        'adult': False,
+        'video': False,
+    } for i, title in enumerate(titles)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='title.basics.tsv.gz')
+    args = parser.parse_args()
+    with open(args.output, 'wb') as f_out:
+        f_out.write(synthetic_tsv_gz(args.rows, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
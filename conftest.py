@@ -1,6 +1,12 @@
 
+import os
+import sys
 import pytest
 
+# the lambda modules (`infra`, `lambda_function`) import `pipeline` as a
+# top-level package, as they do when deployed from the `tdd` folder
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'tdd'))
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -48,21 +48,115 @@ def simulate(year: int, initial: str, queue_name: str):
 @cli.command()
 @click.option('--year', prompt='IMDB, Year', default=2004, help='Year of movies that will be downloaded')
 @click.option('--initial', prompt='IMDB, Initial', default='AD', help='First letter of the films that will be downloaded')
-def download(year: int, initial: str):
+@click.option('--cache_mode', default=None, type=click.Choice(['off', 'read-through', 'refresh', 'offline']), help='How TMDB responses are cached (see TMDB_CACHE_MODE)')
+def download(year: int, initial: str, cache_mode: str):
     """
     Invokes the lambda_function manually for a one-off download.
     Can be used for debug purposes
     """
+    if cache_mode:
+        os.environ['TMDB_CACHE_MODE'] = cache_mode
     import lambda_function
     event = {'Records': [{'body': json.dumps({'year': year, 'initial': initial})}]}
     lambda_function.lambda_handler(event=event, context=None)
 
 
+@cli.command()
+def shard():
+    """
+    Splits today's IMDB snapshot into per-partition shards in the datalake,
+    so that the lambda function reads only the shard of its partition.
+    Runs once per daily snapshot, before launching the fleet.
+    """
+    from infra import Config
+    from pipeline import IMDb
+    config = Config()
+    IMDb(bucket_name=config.get_datalake_bucket_name()).split_into_shards()
+
+
+@cli.command()
+def delta():
+    """
+    Compares today's IMDB snapshot with the previous one, and writes to
+    the datalake the movies added or changed in each partition, so that
+    a daily refresh only processes those (messages with `delta: true`).
+    """
+    from infra import Config
+    from pipeline import IMDb
+    config = Config()
+    marker = IMDb(bucket_name=config.get_datalake_bucket_name()).split_into_delta()
+    if marker is None:
+        print('No previous snapshot, every partition must be processed')
+    else:
+        print(f'{len(marker["partitions"])} partitions with new or changed movies')
+
+
+@cli.command()
+@click.option('--queue_name', prompt='AWS SQS, Queue', default='hudsonmendes-tmdb-downloader-queue', help='The name of the queue to which we will send the messages')
+@click.option('--source', default=None, help='IMDB dataset to scan for partitions: url, s3:// url or local path (default: IMDB)')
+@click.option('--min_year', default=None, type=int, help='Only partitions of movies from this year on')
+@click.option('--max_year', default=None, type=int, help='Only partitions of movies up to this year (default: current year)')
+@click.option('--skip_existing', is_flag=True, help='Workers skip movies already in the datalake')
+@click.option('--delta', is_flag=True, help="Only partitions with new or changed movies, as found by `python tdd delta`")
+@click.option('--dry_run', is_flag=True, help='Lists the partitions, without sending any message')
+@click.option('--resume/--no-resume', default=True, help="Skips the messages already sent by today's previous launches")
+@click.option('--senders', default=8, help='Parallel batches being sent to SQS')
+@click.option('--max_movies', default=500, help='Partitions with more movies are split into shards of up to this many movies')
+@click.option('--min_movies', default=50, help='Partitions with fewer movies are packed together into a single message')
+@click.option('--with_ids', is_flag=True, help='Messages carry the IMDB ids of their partitions, so workers skip the IMDB scan')
+def launch(queue_name, source, min_year, max_year, skip_existing, delta, dry_run, resume, senders, max_movies, min_movies, with_ids):
+    """
+    Launches the fleet, sending the (year, initial) partitions of the IMDB
+    dataset to the SQS queue, in batches, from a single pass over the
+    dataset: hot partitions are split into shards, small ones packed
+    together, and the largest messages go first.
+    """
+    from infra import Config, Launch
+    from pipeline import IMDb
+    Launch(
+        queue_name=queue_name,
+        bucket_name=Config().get_datalake_bucket_name(),
+        source=source or IMDb.SOURCE_URL,
+        min_year=min_year,
+        max_year=max_year,
+        skip_existing=skip_existing,
+        delta=delta,
+        dry_run=dry_run,
+        resume=resume,
+        max_senders=senders,
+        max_movies=max_movies,
+        min_movies=min_movies,
+        with_ids=with_ids).launch()
+
+
+@cli.command()
+@click.option('--queue_name', prompt='AWS SQS, Queue', default='hudsonmendes-tmdb-downloader-queue', help='The name of the queue to which we will send the messages')
+@click.option('--since', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='First day of changes to refresh (default: the last refresh)')
+@click.option('--until', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='Last day of changes to refresh (default: today)')
+@click.option('--dry_run', is_flag=True, help='Lists the partitions to refresh, without sending any message')
+def refresh(queue_name, since, until, dry_run):
+    """
+    Refreshes the movies of the datalake changed on TMDB since the last
+    refresh, sending only those to the fleet, to be downloaded again.
+    """
+    from infra import Config, Refresh
+    config = Config()
+    Refresh(
+        queue_name=queue_name,
+        bucket_name=config.get_datalake_bucket_name(),
+        api_key=config.get_tmdb_api_key(),
+        since=since.date() if since else None,
+        until=until.date() if until else None,
+        dry_run=dry_run).refresh()
+
+
 @cli.command()
 @click.option('--lambda_name', prompt='AWS Lambda, Function Name', default='hudsonmendes-tmdb-downloader-lambda', help='The name of the function to which we will deploy')
 @click.option('--queue_name', prompt='AWS SQS, Queue', default='hudsonmendes-tmdb-downloader-queue', help='The name of the queue to which we will send the message')
 @click.option('--datalake_bucket_name', prompt='DataLake, Bucket Name', help='The S3 BucketName to which you will dump your files', default='hudsonmendes-datalake')
-def deploy(lambda_name, queue_name, datalake_bucket_name):
+@click.option('--batch_size', default=1, help='Messages (partitions) delivered to the lambda per invocation')
+@click.option('--batching_window', default=0, help='Seconds that SQS waits to fill the batch before invoking the lambda')
+def deploy(lambda_name, queue_name, datalake_bucket_name, batch_size, batching_window):
     """
     Deploy the system into lambda, creating everything that is necessary to run.
     """
@@ -70,7 +164,9 @@ def deploy(lambda_name, queue_name, datalake_bucket_name):
     Deploy(
         lambda_name=lambda_name,
         queue_name=queue_name,
-        datalake_bucket_name=datalake_bucket_name).deploy()
+        datalake_bucket_name=datalake_bucket_name,
+        batch_size=batch_size,
+        batching_window=batching_window).deploy()
 
 
 if __name__ == "__main__":
@@ -1,2 +1,5 @@
 from infra.config import Config
-from infra.deploy import Deploy
\ No newline at end of file
+from infra.deploy import Deploy
+from infra.runtime import Runtime
+from infra.launch import Launch
+from infra.refresh import Refresh
\ No newline at end of file
@@ -8,6 +8,31 @@ class Config:
     development, test or production mode
     """
 
+    # tuning settings, passed on to the lambda only when configured
+    SETTINGS = [
+        ('DATALAKE', 'FORMAT'),
+        ('DATALAKE', 'SKIP_EXISTING'),
+        ('IMDB', 'LOCAL_CACHE'),
+        ('IMDB', 'LOCAL_CACHE_MAX_MB'),
+        ('TMDB', 'MAX_WORKERS'),
+        ('TMDB', 'MAX_PAGE_WORKERS'),
+        ('TMDB', 'RATE_LIMIT'),
+        ('TMDB', 'RATE_BURST'),
+        ('TMDB', 'FETCH_MODE'),
+        ('TMDB', 'MOVIE_DOCUMENT'),
+        ('TMDB', 'NOT_FOUND_TTL'),
+        ('TMDB', 'CACHE_MODE'),
+        ('TMDB', 'CACHE_URL'),
+        ('TMDB', 'CACHE_TTL'),
+        ('TMDB', 'CACHE_MAX_MB'),
+        ('HTTP', 'POOL_SIZE'),
+        ('HTTP', 'TIMEOUT'),
+        ('S3', 'MAX_CONNECTIONS'),
+        ('S3', 'MAX_WRITERS'),
+        ('LAMBDA', 'TIME_RESERVE'),
+        ('LAMBDA', 'MAX_PARTITIONS'),
+    ]
+
     def __init__(
             self,
             **kwargs):
@@ -37,6 +62,186 @@ class Config:
         else:
             return self.config['TMDB'].get('API_KEY')
 
+    def get_datalake_format(self) -> str:
+        """
+        Returns how the documents are written to the datalake
+        (`DATALAKE_FORMAT`): 'objects', one JSON object per movie and
+        per review (default), or 'ndjson', a few gzipped NDJSON
+        objects per partition.
+        """
+        datalake_format = self.get('DATALAKE', 'FORMAT', default='objects')
+        assert datalake_format in ('objects', 'ndjson'), f'unknown DATALAKE_FORMAT {datalake_format}'
+        return datalake_format
+
+    def get_datalake_skip_existing(self) -> bool:
+        """
+        Returns whether movies already listed in the partition's
+        manifest are skipped before any TMDB request
+        (`DATALAKE_SKIP_EXISTING`), which makes redelivered
+        messages cost only the missing work.
+        """
+        return self.get_bool('DATALAKE', 'SKIP_EXISTING', default=False)
+
+    def get_imdb_local_cache(self) -> str:
+        """
+        Returns the local folder where warm containers keep a compact
+        copy of the IMDB snapshot (`IMDB_LOCAL_CACHE`); blank disables it.
+        """
+        return self.get('IMDB', 'LOCAL_CACHE', default='/tmp/imdb')
+
+    def get_imdb_local_cache_max_mb(self) -> int:
+        """
+        Returns the largest IMDB snapshot that we copy locally (and
+        the largest local copy that we keep), in MB
+        (`IMDB_LOCAL_CACHE_MAX_MB`).
+        """
+        return int(self.get('IMDB', 'LOCAL_CACHE_MAX_MB', default=256))
+
+    def get_tmdb_max_workers(self) -> int:
+        """
+        Returns the number of TMDB movies requested concurrently,
+        available prioritarily in the os.environ context (as
+        `TMDB_MAX_WORKERS`); otherwise [TMDB] MAX_WORKERS from the
+        `config.ini` file, defaulting to 1 (sequential).
+        """
+        return int(self.get('TMDB', 'MAX_WORKERS', default=1))
+
+    def get_tmdb_max_page_workers(self) -> int:
+        """
+        Returns how many pages of reviews of the same movie are
+        requested concurrently (`TMDB_MAX_PAGE_WORKERS`).
+        """
+        return int(self.get('TMDB', 'MAX_PAGE_WORKERS', default=4))
+
+    def get_tmdb_rate_limit(self) -> float:
+        """
+        Returns the requests per second allowed against the TMDB API
+        (`TMDB_RATE_LIMIT`), shared by every worker of the lambda.
+        """
+        return float(self.get('TMDB', 'RATE_LIMIT', default=20))
+
+    def get_tmdb_rate_burst(self) -> int:
+        """
+        Returns how many TMDB requests may be sent at once, in a
+        burst, before the `TMDB_RATE_LIMIT` kicks in.
+        """
+        return int(self.get('TMDB', 'RATE_BURST', default=40))
+
+    def get_tmdb_fetch_mode(self) -> str:
+        """
+        Returns how movies are requested from TMDB (`TMDB_FETCH_MODE`):
+        'find' (then the reviews apart), or 'details', with the first
+        page of reviews appended to the same response.
+        """
+        return self.get('TMDB', 'FETCH_MODE', default='find')
+
+    def get_tmdb_movie_document(self) -> str:
+        """
+        Returns which movie document is stored (`TMDB_MOVIE_DOCUMENT`):
+        'find', shaped as the find result, or the full 'details'.
+        """
+        return self.get('TMDB', 'MOVIE_DOCUMENT', default='find')
+
+    def get_tmdb_not_found_ttl(self) -> int:
+        """
+        Returns for how many days an IMDB id not found in TMDB is not
+        looked up again (`TMDB_NOT_FOUND_TTL`); 0 looks every id up.
+        """
+        return int(self.get('TMDB', 'NOT_FOUND_TTL', default=30))
+
+    def get_tmdb_cache_mode(self) -> str:
+        """
+        Returns how TMDB responses are cached (`TMDB_CACHE_MODE`):
+        'off', 'read-through', 'refresh' or 'offline'.
+        """
+        return self.get('TMDB', 'CACHE_MODE', default='off')
+
+    def get_tmdb_cache_url(self) -> str:
+        """
+        Returns where TMDB responses are cached (`TMDB_CACHE_URL`),
+        either a local folder or an `s3://` url.
+        """
+        return self.get('TMDB', 'CACHE_URL', default='/tmp/tmdb-cache')
+
+    def get_tmdb_cache_ttl(self) -> int:
+        """
+        Returns after how many days a cached TMDB response is requested
+        again (`TMDB_CACHE_TTL`); 0 never expires them.
+        """
+        return int(self.get('TMDB', 'CACHE_TTL', default=0))
+
+    def get_tmdb_cache_max_mb(self) -> int:
+        """
+        Returns the megabytes of TMDB responses kept in a local folder
+        cache (`TMDB_CACHE_MAX_MB`), evicting the oldest beyond that.
+        """
+        return int(self.get('TMDB', 'CACHE_MAX_MB', default=512))
+
+    def get_http_pool_size(self) -> int:
+        """
+        Returns how many idle keep-alive connections are kept per
+        host (`HTTP_POOL_SIZE`); should be at least `TMDB_MAX_WORKERS`.
+        """
+        return int(self.get('HTTP', 'POOL_SIZE', default=10))
+
+    def get_http_timeout(self) -> float:
+        """
+        Returns the HTTP connect/read timeout in seconds (`HTTP_TIMEOUT`).
+        """
+        return float(self.get('HTTP', 'TIMEOUT', default=30))
+
+    def get_s3_max_connections(self) -> int:
+        """
+        Returns the size of the connection pool of the shared S3
+        client (`S3_MAX_CONNECTIONS`); should be at least
+        `LAMBDA_MAX_PARTITIONS` x `S3_MAX_WRITERS`, the writers that
+        upload concurrently, which is also its default.
+        """
+        return int(self.get(
+            'S3', 'MAX_CONNECTIONS',
+            default=self.get_lambda_max_partitions() * self.get_s3_max_writers()))
+
+    def get_s3_max_writers(self) -> int:
+        """
+        Returns how many documents are uploaded to S3 concurrently,
+        in background, while downloading (`S3_MAX_WRITERS`).
+        """
+        return int(self.get('S3', 'MAX_WRITERS', default=8))
+
+    def get_lambda_time_reserve(self) -> int:
+        """
+        Returns the seconds left to the lambda timeout at which it
+        stops taking new movies, checkpoints and enqueues the rest
+        of the partition (`LAMBDA_TIME_RESERVE`).
+        """
+        return int(self.get('LAMBDA', 'TIME_RESERVE', default=120))
+
+    def get_lambda_max_partitions(self) -> int:
+        """
+        Returns how many partitions (messages) of an SQS batch are
+        processed concurrently by one invocation (`LAMBDA_MAX_PARTITIONS`).
+        """
+        return int(self.get('LAMBDA', 'MAX_PARTITIONS', default=4))
+
+    def get(self, section: str, key: str, default=None):
+        """
+        Returns the {section}_{key} variable from os.environ,
+        if present; otherwise [{section}] {key} from `config.ini`,
+        or the `default` when it is not configured at all.
+        """
+        env_name = f'{section}_{key}'
+        if env_name in os.environ:
+            return os.environ[env_name]
+        if section in self.config and key in self.config[section]:
+            return self.config[section].get(key)
+        return default
+
+    def get_bool(self, section: str, key: str, default: bool = False) -> bool:
+        value = self.get(section, key)
+        if value is None:
+            return default
+        return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
     def update(
             self,
             datalake_bucket_name: str,
@@ -53,7 +258,12 @@ class Config:
         self.config.write(open(self.config_path, 'w+'))
 
     def to_env(self):
-        return {
+        env = {
             'DATALAKE_BUCKET_NAME': self.get_datalake_bucket_name(),
             'TMDB_API_KEY': self.get_tmdb_api_key()
         }
+        for section, key in Config.SETTINGS:
+            value = self.get(section, key)
+            if value is not None:
+                env[f'{section}_{key}'] = str(value)
+        return env
@@ -18,6 +18,8 @@ class Deploy:
             lambda_name,
             queue_name,
             datalake_bucket_name,
+            batch_size=1,
+            batching_window=0,
             package_folder='./package',
             zip_path='/tmp/lambda_function.zip',
             **kwargs):
@@ -35,7 +37,11 @@ class Deploy:
             DeployAwsIamRole(lambda_name=lambda_name, role_name=self.role_name),
             DeployAwsSqsQueue(queue_name=queue_name),
             DeployAwsLambdaFunction(lambda_name=lambda_name, zip_path=zip_path, role_name=self.role_name),
-            DeployAwsLambdaTrigger(lambda_name=lambda_name, queue_name=queue_name)]
+            DeployAwsLambdaTrigger(
+                lambda_name=lambda_name,
+                queue_name=queue_name,
+                batch_size=batch_size,
+                batching_window=batching_window)]
 
     def deploy(self):
         """
@@ -259,6 +265,7 @@ class DeployAwsLambdaFunction:
                 self.create_lambda(zip_buffer)
             else:
                 self.update_lambda_code(zip_buffer)
+                self.update_lambda_configuration()
 
     def does_lambda_exist(self):
         lbd = boto3.client('lambda')
@@ -291,15 +298,26 @@ class DeployAwsLambdaFunction:
             FunctionName=self.lambda_name,
             ZipFile=zip_buffer)
 
+    def update_lambda_configuration(self):
+        lbd = boto3.client('lambda')
+        lbd.update_function_configuration(
+            FunctionName=self.lambda_name,
+            Environment={'Variables': self.config.to_env()})
+
 
 class DeployAwsLambdaTrigger:
     """
-    If not yet linked, links the SQSL as a trigger to the Lambda.
+    Links the SQS as a trigger to the Lambda, or updates the existing
+    link, delivering up to `batch_size` messages per invocation, waiting
+    up to `batching_window` seconds to fill the batch, and letting the
+    lambda report which messages of the batch failed.
     """
 
-    def __init__(self, queue_name: str, lambda_name: str):
+    def __init__(self, queue_name: str, lambda_name: str, batch_size: int = 1, batching_window: int = 0):
         self.queue_name = queue_name
         self.lambda_name = lambda_name
+        self.batch_size = batch_size
+        self.batching_window = batching_window
 
     def call(self):
         print(f"Deploy, link lambda {self.lambda_name} to queue {self.queue_name}")
@@ -313,6 +331,20 @@ class DeployAwsLambdaTrigger:
                 EventSourceArn=queue_arn,
                 FunctionName=self.lambda_name,
                 Enabled=True,
-                BatchSize=1)
+                BatchSize=self.batch_size,
+                MaximumBatchingWindowInSeconds=self.batching_window,
+                FunctionResponseTypes=['ReportBatchItemFailures'])
         except lbd.exceptions.ResourceConflictException:
-            pass # already exists
+            self.update_mapping(lbd, queue_arn) # already exists
+
+    def update_mapping(self, lbd, queue_arn):
+        mappings = lbd.list_event_source_mappings(
+            EventSourceArn=queue_arn,
+            FunctionName=self.lambda_name)['EventSourceMappings']
+        for mapping in mappings:
+            lbd.update_event_source_mapping(
+                UUID=mapping['UUID'],
+                Enabled=True,
+                BatchSize=self.batch_size,
+                MaximumBatchingWindowInSeconds=self.batching_window,
+                FunctionResponseTypes=['ReportBatchItemFailures'])
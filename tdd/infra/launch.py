@@ -0,0 +1,185 @@
+import os
+import json
+import datetime
+import threading
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from pipeline import IMDb, IMDbDelta, IMDbPartitions, Partition, PartitionPlanner, PartitionShards, PartitionIdList, S3Writer, FileHttp, FileS3
+
+
+class Launch:
+    PROGRESS_PATH = '.launch-{date_tag}.progress'
+
+    """
+    Launches the download fleet: finds the partitions of the IMDB
+    dataset in a single streaming pass (or reads them from today's
+    delta marker), plans the messages so that they cost about the same
+    (see `PartitionPlanner`), keeping the shard count of the partitions
+    planned by earlier launches (see `PartitionShards`), and sends them to SQS, largest first, in
+    batches of 10, through parallel senders. With `with_ids`, messages
+    carry the exact IMDB ids of their partitions (see `PartitionIdList`),
+    so that workers do not scan the dataset. Sent messages are recorded in a
+    local progress file, so that re-running an interrupted launch
+    only sends what is missing.
+    """
+
+    def __init__(
+            self,
+            queue_name: str,
+            bucket_name: str,
+            source: str = IMDb.SOURCE_URL,
+            min_year: int = None,
+            max_year: int = None,
+            skip_existing: bool = False,
+            delta: bool = False,
+            dry_run: bool = False,
+            resume: bool = True,
+            progress_path: str = None,
+            max_senders: int = 8,
+            max_movies: int = 500,
+            min_movies: int = 50,
+            with_ids: bool = False,
+            max_inline_ids: int = 100,
+            **kwargs):
+        self.queue_name = queue_name
+        self.bucket_name = bucket_name
+        self.source = source
+        self.min_year = min_year
+        self.max_year = max_year or datetime.datetime.now().year
+        self.skip_existing = skip_existing
+        self.delta = delta
+        self.dry_run = dry_run
+        self.date_tag = IMDb.get_date_tag()
+        if resume:
+            progress_path = progress_path or Launch.PROGRESS_PATH.format(date_tag=self.date_tag)
+            self.progress = LaunchProgress(progress_path)
+        else:
+            self.progress = LaunchProgress(None)
+        self.max_senders = max_senders
+        self.planner = PartitionPlanner(max_movies=max_movies, min_movies=min_movies)
+        self.shards = PartitionShards(bucket_name=bucket_name)
+        self.with_ids = with_ids and not delta
+        self.id_list = PartitionIdList(bucket_name=bucket_name, run_tag=str(self.date_tag), max_inline=max_inline_ids)
+
+    def launch(self) -> int:
+        """
+        Sends every planned message not sent yet,
+        returning how many were sent.
+        """
+        messages = [m for m in self.get_messages() if not self.progress.has(m)]
+        print(f'Launch, {len(messages)} messages to send')
+        if self.dry_run:
+            for message in messages[:10]:
+                print(f'Launch, would send {json.dumps(message)}')
+            return 0
+        sender = LaunchSender(queue_name=self.queue_name, progress=self.progress)
+        size = LaunchSender.BATCH_SIZE
+        batches = [messages[i:i + size] for i in range(0, len(messages), size)]
+        with ThreadPoolExecutor(max_workers=self.max_senders) as executor:
+            sent = sum(executor.map(sender.send, batches))
+        print(f'Launch, {sent} messages sent to {self.queue_name}')
+        return sent
+
+    def get_messages(self):
+        partitions = IMDbPartitions(min_year=self.min_year, max_year=self.max_year, keep_ids=self.with_ids)
+        plan = self.planner.plan(
+            self.get_counts(partitions),
+            pinned=self.shards.load().get_pinned(),
+            skip_existing=self.skip_existing,
+            delta=self.delta)
+        self.shards.pin(p for partitions in plan for p in partitions)
+        if not self.dry_run:
+            self.shards.save()
+        if self.with_ids:
+            self.attach_ids(plan, partitions.ids)
+        return [Partition.to_messages(partitions) for partitions in plan]
+
+    def get_counts(self, partitions: IMDbPartitions):
+        """
+        Number of movies of each (year, initial) partition to process.
+        """
+        if self.delta:
+            marker = IMDbDelta(bucket_name=self.bucket_name, date_tag=self.date_tag).get_marker()
+            if marker is None:
+                raise ValueError(f'[Launch] no delta for {self.date_tag}, run `python tdd delta` first')
+            return {
+                (p['year'], p['initial']): p['count'] for p in marker['partitions']
+                if p['count'] and partitions.is_in_range(p['year'])}
+        with self.open_source() as stream:
+            return partitions.scan(stream)
+
+    def attach_ids(self, plan, ids):
+        """
+        Attaches to each planned partition (or shard) its ids; the
+        id-list objects must all be written before any message is sent.
+        """
+        with S3Writer() as writer:
+            for partitions in plan:
+                for partition in partitions:
+                    imdb_ids = ids[(partition.year, partition.initial)]
+                    if partition.shards:
+                        imdb_ids = [i for i in imdb_ids if Partition.get_shard_of(i, partition.shards) == partition.shard]
+                    self.id_list.attach(partition, imdb_ids, None if self.dry_run else writer)
+
+    def open_source(self):
+        if self.source.startswith('http'):
+            return FileHttp(self.source).stream()
+        if self.source.startswith('s3://'):
+            return FileS3(self.source).stream()
+        return open(self.source, 'rb')
+
+
+class LaunchSender:
+    BATCH_SIZE = 10
+    MAX_ATTEMPTS = 3
+
+    """
+    Sends batches of up to 10 messages to the SQS queue, sending again
+    the entries that failed, and recording those that went through.
+    """
+
+    def __init__(self, queue_name: str, progress: 'LaunchProgress', sqs=None):
+        self.sqs = sqs or boto3.client('sqs')
+        self.queue_url = self.sqs.get_queue_url(QueueName=queue_name)['QueueUrl']
+        self.progress = progress
+
+    def send(self, messages) -> int:
+        pending = {str(i): message for i, message in enumerate(messages)}
+        for _ in range(LaunchSender.MAX_ATTEMPTS):
+            res = self.sqs.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': i, 'MessageBody': json.dumps(m)} for i, m in pending.items()])
+            self.progress.add([pending.pop(entry['Id']) for entry in res.get('Successful', [])])
+            if not pending:
+                return len(messages)
+        raise RuntimeError(f'[Launch] failed to send {list(pending.values())}')
+
+
+class LaunchProgress:
+    """
+    The messages already sent, one per line in a local file,
+    or only in memory when no `path` is given.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.sent = set()
+        if path and os.path.isfile(path):
+            with open(path) as f_in:
+                self.sent = set(line.strip() for line in f_in if line.strip())
+
+    def has(self, message) -> bool:
+        return LaunchProgress.get_key(message) in self.sent
+
+    def add(self, messages):
+        keys = [LaunchProgress.get_key(message) for message in messages]
+        with self.lock:
+            self.sent.update(keys)
+            if self.path and keys:
+                with open(self.path, 'a') as f_out:
+                    f_out.writelines(f'{key}\n' for key in keys)
+
+    @staticmethod
+    def get_key(message) -> str:
+        return json.dumps(message, sort_keys=True)
@@ -0,0 +1,69 @@
+import json
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pipeline import TMDbChanges, PartitionIdList, S3Writer
+from infra.launch import LaunchSender, LaunchProgress
+
+
+class Refresh:
+    """
+    Refreshes the datalake from the TMDB changes feed: finds the movies
+    changed on TMDB since the watermark (or `since`) that are already in
+    the datalake, and sends them to the fleet as id-list messages with
+    `refresh: true`, so that only those movies and their reviews are
+    downloaded again. The watermark moves to `until` once every message
+    is sent. The id lists of each run are kept apart, under
+    `tmdb/id-lists/refresh/{until}/{started}`, so that neither launches
+    nor other refreshes of the same day overwrite them.
+    """
+
+    def __init__(
+            self,
+            queue_name: str,
+            bucket_name: str,
+            api_key: str,
+            since: datetime.date = None,
+            until: datetime.date = None,
+            dry_run: bool = False,
+            max_senders: int = 8,
+            **kwargs):
+        self.queue_name = queue_name
+        self.bucket_name = bucket_name
+        self.since = since
+        self.until = until or datetime.datetime.utcnow().date()
+        self.dry_run = dry_run
+        self.max_senders = max_senders
+        self.changes = TMDbChanges(bucket_name=bucket_name, api_key=api_key)
+        self.started = datetime.datetime.utcnow()
+        self.id_list = PartitionIdList(bucket_name=bucket_name, run_tag=self.get_run_tag())
+
+    def get_run_tag(self) -> str:
+        return f'refresh/{self.until.isoformat()}/{self.started:%Y%m%dT%H%M%S%f}'
+
+    def refresh(self) -> int:
+        """
+        Sends the refresh messages, returning how many were sent.
+        """
+        since = self.since or self.changes.get_watermark() or self.until - datetime.timedelta(days=1)
+        changed_ids = self.changes.get_changed_ids(since, self.until)
+        partitions = self.changes.get_refresh_partitions(changed_ids, self.changes.get_known_movies())
+        print(f'Refresh, {sum(len(p.ids) for p in partitions)} movies in {len(partitions)} partitions to refresh')
+        with S3Writer() as writer:
+            for partition in partitions:
+                self.id_list.attach(partition, partition.ids, None if self.dry_run else writer)
+        messages = [partition.to_message() for partition in partitions]
+        if self.dry_run:
+            for message in messages[:10]:
+                print(f'Refresh, would send {json.dumps(message)}')
+            return 0
+        if messages:
+            sender = LaunchSender(queue_name=self.queue_name, progress=LaunchProgress(None))
+            size = LaunchSender.BATCH_SIZE
+            batches = [messages[i:i + size] for i in range(0, len(messages), size)]
+            with ThreadPoolExecutor(max_workers=self.max_senders) as executor:
+                sent = sum(executor.map(sender.send, batches))
+        else:
+            sent = 0
+        self.changes.save_watermark(self.until)
+        print(f'Refresh, {sent} messages sent, in sync until {self.until}')
+        return sent
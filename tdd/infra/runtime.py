@@ -0,0 +1,88 @@
+import time
+import threading
+from pipeline import IMDb, IMDbLocalCache, TMDb, TMDbClient, TMDbCache, HttpPool, S3Pool
+from infra.config import Config
+
+
+class Runtime:
+    """
+    Everything the lambda needs that outlives a single invocation:
+    the config, the pooled HTTP and S3 clients, the rate-limited TMDb
+    client, and the IMDb snapshot resolved for today. Built lazily
+    once per container, reused by warm invocations, and refreshed
+    when the daily date tag of the IMDb snapshot changes.
+    """
+
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self, config: Config = None, **kwargs):
+        self.config = config or Config()
+        self.date_tag = IMDb.get_date_tag()
+        self.bucket_name = self.config.get_datalake_bucket_name()
+
+        self.http = HttpPool.shared(
+            pool_size=self.config.get_http_pool_size(),
+            timeout=self.config.get_http_timeout())
+
+        self.s3_pool = S3Pool.shared(
+            max_connections=self.config.get_s3_max_connections())
+
+        self.tmdb_client = TMDbClient.shared(
+            http=self.http,
+            rate=self.config.get_tmdb_rate_limit(),
+            burst=self.config.get_tmdb_rate_burst(),
+            cache=self.get_tmdb_cache())
+
+        self.imdb = IMDb(
+            bucket_name=self.bucket_name,
+            date_tag=self.date_tag,
+            local_cache=self.get_imdb_local_cache())
+
+        self.tmdb = TMDb(
+            bucket_name=self.bucket_name,
+            api_key=self.config.get_tmdb_api_key(),
+            max_workers=self.config.get_tmdb_max_workers(),
+            max_page_workers=self.config.get_tmdb_max_page_workers(),
+            fetch_mode=self.config.get_tmdb_fetch_mode(),
+            movie_document=self.config.get_tmdb_movie_document(),
+            client=self.tmdb_client)
+
+        self.setup_ms = 0.0
+        self.warm = False
+
+    def get_imdb_local_cache(self) -> IMDbLocalCache:
+        folder = self.config.get_imdb_local_cache()
+        if not folder:
+            return None
+        return IMDbLocalCache(
+            folder=folder,
+            max_bytes=self.config.get_imdb_local_cache_max_mb() * 1024 * 1024)
+
+    def get_tmdb_cache(self) -> TMDbCache:
+        mode = self.config.get_tmdb_cache_mode()
+        if mode == 'off':
+            return None
+        return TMDbCache.from_url(
+            self.config.get_tmdb_cache_url(),
+            mode=mode,
+            ttl=self.config.get_tmdb_cache_ttl() * 24 * 60 * 60,
+            max_bytes=self.config.get_tmdb_cache_max_mb() * 1024 * 1024)
+
+    @staticmethod
+    def get() -> 'Runtime':
+        """
+        Returns the runtime of the container, building it on the first
+        invocation, and rebuilding it when a new day (and so a new IMDb
+        snapshot) comes in. Records how long the setup took and whether
+        the runtime was reused (`warm`).
+        """
+        started = time.perf_counter()
+        with Runtime._lock:
+            current = Runtime._current
+            if current is not None and current.date_tag == IMDb.get_date_tag():
+                current.warm = True
+            else:
+                current = Runtime._current = Runtime()
+            current.setup_ms = (time.perf_counter() - started) * 1000
+            return current
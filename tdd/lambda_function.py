@@ -1,13 +1,20 @@
 import os
 import json
-from pipeline import IMDb, TMDb
-from infra import Config
+import time
+import boto3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pipeline import IMDb, TMDb, S3Writer, S3NdJsonWriter
+from pipeline import TMDbMovie, TMDbReviews, Partition, PartitionManifest, PartitionCheckpoint, PartitionIdList, PartitionNotFound, TimeBudget, Metrics
+from infra import Config, Runtime
 
 
 def lambda_handler(event, context):
     """
     Downloads 'movies' for a particular {year}, with names that
-    start with a particular {initial} character
+    start with a particular {initial} character, for each of
+    the messages of the batch, reporting back the ones that failed
+    (`batchItemFailures`) so that only those are retried.
 
     Parameters
     ----------
@@ -18,43 +25,256 @@ def lambda_handler(event, context):
     ------------
     - year   : the year for which movies will be downloaded
     - initial: the first non-blank character of the name of the movie
+    - skip_existing: (optional) skip the movies already in the manifest
+    - resume : (optional) resume the partition from its checkpoint
+    - delta  : (optional) only the movies added or changed since the
+               previous IMDB snapshot (see `python tdd delta`)
+    - shard  : (optional) with `shards`, only the movies of the partition
+               whose IMDB id hashes to this shard
+    - ids    : (optional) the IMDB ids of the partition, sparing the scan
+    - ids_url: (optional) or the s3:// url of an object with those ids
+    - refresh: (optional) download the movies again, even if already
+               in the datalake (see `python tdd refresh`)
+    - partitions: (optional) instead of the above, a list of partitions
+               (each with the fields above) packed into one message
     """
 
-    config = Config()
+    # built once per container, reused while warm
+    runtime = Runtime.get()
+    config, imdb, tmdb = runtime.config, runtime.imdb, runtime.tmdb
+    print(f'Lambda, setup in {runtime.setup_ms:.1f}ms ({"warm" if runtime.warm else "cold"})')
 
-    imdb = IMDb(
-        bucket_name=config.get_datalake_bucket_name())
+    budget = TimeBudget(
+        context=context,
+        reserve_ms=config.get_lambda_time_reserve() * 1000)
 
-    tmdb = TMDb(
-        bucket_name=config.get_datalake_bucket_name(),
-        api_key=config.get_tmdb_api_key())
+    # partitions of the batch are processed concurrently, and only
+    # the ones that failed are reported back to SQS to be retried
+    records = event['Records']
+    max_partitions = max(1, min(len(records), config.get_lambda_max_partitions()))
+    with ThreadPoolExecutor(max_workers=max_partitions) as executor:
+        futures = [
+            (record, executor.submit(process_record, record, config, imdb, tmdb, budget, context))
+            for record in records]
+
+    batch_item_failures = []
+    for record, future in futures:
+        try:
+            future.result()
+        except Exception:
+            if 'messageId' not in record:
+                raise  # not from SQS, e.g. `python tdd download`
+            print(f'Lambda, failed processing message {record["messageId"]}')
+            traceback.print_exc()
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+
+    print(f'Lambda, http connections {runtime.http.get_counters()}')
+    print(f'Lambda, s3 clients {runtime.s3_pool.get_counters()}')
+
+    return {
+        'batchItemFailures': batch_item_failures
+    }
+
+
+def process_record(record, config: Config, imdb: IMDb, tmdb: TMDb, budget: TimeBudget, context) -> int:
+    """
+    Downloads the partitions of one SQS message, returning the number
+    of movies processed. Raises if any of the partitions failed.
+    Partitions of the message not started by the time we run out of
+    time are sent back to the queue.
+    """
+    body = json.loads(record['body'])
+
+    processed_count = 0
+    partitions = Partition.from_messages(body)
+    for ix, partition in enumerate(partitions):
+        if ix > 0 and budget.is_running_out():
+            for pending in partitions[ix:]:
+                enqueue_partition(record, pending)
+            break
+        processed_count += process_partition(record, partition, config, imdb, tmdb, budget, context)
+    return processed_count
+
+
+def process_partition(record, partition: Partition, config: Config, imdb: IMDb, tmdb: TMDb, budget: TimeBudget, context) -> int:
+    """
+    Downloads one partition, returning the number of movies processed,
+    and emits the metrics of the partition, whether it failed or not.
+    """
+    print(f'Lambda, processsing partition {partition}')
 
-    for record in event['Records']:
+    metrics = Metrics()
+    try:
+        with metrics.timer('partition_ms'):
+            return download_partition(record, partition, config, imdb, tmdb, budget, context, metrics)
+    except Exception:
+        metrics.count('partitions_failed')
+        raise
+    finally:
+        metrics.emit(
+            dimensions={'Service': 'tmdb-downloader'},
+            properties={'partition': partition.get_key(), 'run_id': get_run_id(context, record)})
 
-        body = json.loads(record['body'])
 
-        year = int(body['year'])
+def download_partition(record, partition: Partition, config: Config, imdb: IMDb, tmdb: TMDb, budget: TimeBudget, context, metrics: Metrics) -> int:
+    year, initial = partition.year, partition.initial
 
-        initial = body['initial']
+    # loaded even when not skipping, as flushing rewrites it whole
+    manifest = PartitionManifest(
+        bucket_name=config.get_datalake_bucket_name(),
+        partition=partition).load()
 
-        print(f'Lambda, processsing partition ({year}, {initial})')
+    checkpoint = PartitionCheckpoint(
+        bucket_name=config.get_datalake_bucket_name(),
+        partition=partition)
 
+    not_found = None
+    if config.get_tmdb_not_found_ttl() > 0:
+        not_found = PartitionNotFound(
+            bucket_name=config.get_datalake_bucket_name(),
+            partition=partition,
+            ttl_days=config.get_tmdb_not_found_ttl()).load()
+
+    # id-list messages already have the ids, no need for the IMDB scan
+    if partition.has_ids():
+        imdb_movies_stream = PartitionIdList.stream(partition)
+    else:
         imdb_movies_stream = imdb.get_movie_refs_stream(
             year=year,
-            initial=initial)
+            initial=initial,
+            metrics=metrics)
+
+    if partition.shards:
+        imdb_movies_stream = partition.filter(imdb_movies_stream)
+
+    if partition.delta:
+        imdb_movies_stream = imdb.delta.filter(imdb_movies_stream, partition)
+
+    if partition.resume:
+        imdb_movies_stream = checkpoint.load().resume(imdb_movies_stream)
+    segment_id = checkpoint.get_segment_id(imdb.date_tag)
+
+    # stops taking new movies when running out of time
+    imdb_movies_stream = checkpoint.track(imdb_movies_stream, budget)
+
+    if (partition.skip_existing or config.get_datalake_skip_existing()) and not partition.refresh:
+        imdb_movies_stream = manifest.filter(imdb_movies_stream)
+
+    tmdb_movie_and_reviews_generator = tmdb.get_movies_related_to(
+        imdb_movies_stream=imdb_movies_stream,
+        metrics=metrics,
+        not_found=not_found,
+        refresh=partition.refresh)
+
+    if config.get_datalake_format() == 'ndjson':
+        processed_count = save_as_ndjson(
+            tmdb_movie_and_reviews_generator,
+            bucket_name=config.get_datalake_bucket_name(),
+            year=year,
+            initial=initial,
+            run_id=segment_id,
+            manifest=manifest,
+            metrics=metrics)
+    else:
+        processed_count = save_as_objects(
+            tmdb_movie_and_reviews_generator,
+            max_writers=config.get_s3_max_writers(),
+            manifest=manifest,
+            metrics=metrics)
+    metrics.count('movies_processed', processed_count)
 
-        tmdb_movie_and_reviews_generator = tmdb.get_movies_related_to(
-            imdb_movies_stream=imdb_movies_stream)
+    if not_found is not None:
+        not_found.flush()
 
-        processed_count = 0
+    if checkpoint.interrupted:
+        checkpoint.save()
+        enqueue_continuation(record, partition)
+    elif partition.resume:
+        checkpoint.clear()
+
+    print(f'Lambda, completed processing {processed_count} of {partition}')
+    return processed_count
+
+
+def save_as_objects(tmdb_movie_and_reviews_generator, max_writers: int, manifest: PartitionManifest, metrics: Metrics) -> int:
+    """
+    Saves one JSON object per movie and per review; the uploads run
+    in background, and must all succeed for the partition. Every so
+    often, once the uploads so far are done, the manifest is flushed.
+    """
+    processed_count = 0
+    with S3Writer(max_workers=max_writers, metrics=metrics) as writer:
         for tmdb_movie, tmdb_reviews in tmdb_movie_and_reviews_generator:
-            tmdb_movie.save()
-            tmdb_reviews.save()
+            tmdb_movie.save(writer=writer)
+            tmdb_reviews.save(writer=writer)
             processed_count += 1
+            if manifest.add(tmdb_movie.imdb_id, tmdb_movie.get_id()):
+                writer.flush()
+                manifest.flush()
+    manifest.flush()
+    return processed_count
 
-        print(f'Lambda, completed processing {processed_count}')
 
-    return {
-        'statusCode': 200,
-        'body': json.dumps(body)
-    }
+def save_as_ndjson(tmdb_movie_and_reviews_generator, bucket_name: str, year: int, initial: str, run_id: str, manifest: PartitionManifest, metrics: Metrics) -> int:
+    """
+    Saves the movies and the reviews of the partition as a few
+    gzipped NDJSON objects, streamed through multipart uploads.
+    The manifest is flushed only once the objects are complete.
+    """
+    processed_count = 0
+    movies_url_tmpl = TMDbMovie.get_ndjson_url_tmpl(bucket_name, year, initial, run_id)
+    reviews_url_tmpl = TMDbReviews.get_ndjson_url_tmpl(bucket_name, year, initial, run_id)
+    movies_writer = S3NdJsonWriter(movies_url_tmpl, metrics=metrics)
+    reviews_writer = S3NdJsonWriter(reviews_url_tmpl, metrics=metrics)
+    with movies_writer, reviews_writer:
+        for tmdb_movie, tmdb_reviews in tmdb_movie_and_reviews_generator:
+            tmdb_movie.save_to(movies_writer)
+            tmdb_reviews.save_to(reviews_writer)
+            manifest.add(tmdb_movie.imdb_id, tmdb_movie.get_id())
+            processed_count += 1
+    manifest.flush()
+    return processed_count
+
+
+def enqueue_continuation(record, partition: Partition):
+    """
+    Sends the rest of the partition back to the queue the record
+    came from, to be resumed from its checkpoint.
+    """
+    body = json.dumps(partition.get_continuation().to_message())
+    if 'eventSourceARN' not in record:
+        print(f'Lambda, out of time, to continue run with {body}')
+        return
+    send_message(record, body)
+    print(f'Lambda, out of time, continuation enqueued {body}')
+
+
+def enqueue_partition(record, partition: Partition):
+    """
+    Sends a partition not started back to the queue the record came from.
+    """
+    body = json.dumps(partition.to_message())
+    if 'eventSourceARN' not in record:
+        print(f'Lambda, out of time, to process run with {body}')
+        return
+    send_message(record, body)
+    print(f'Lambda, out of time, partition enqueued {body}')
+
+
+def send_message(record, body: str):
+    queue_name = record['eventSourceARN'].split(':')[-1]
+    sqs = boto3.client('sqs')
+    queue_url = sqs.get_queue_url(QueueName=queue_name)['QueueUrl']
+    sqs.send_message(QueueUrl=queue_url, MessageBody=body)
+
+
+def get_run_id(context, record) -> str:
+    """
+    Identifies the run in the metrics: the SQS message, or else
+    the lambda request.
+    """
+    if 'messageId' in record:
+        return record['messageId']
+    if context is not None and getattr(context, 'aws_request_id', None):
+        return context.aws_request_id
+    return str(int(time.time()))
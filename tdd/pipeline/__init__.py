@@ -2,6 +2,28 @@ from .imdb import IMDb
 from .imdb_movie import IMDbMovie
 from .tmdb import TMDb
 from .tmdb_movie import TMDbMovie
-from .tmdb_reviews import TMDbReviews
+from .tmdb_reviews import TMDbReviews, TMDbReviewsError
 from .file_s3 import FileS3
-from .file_s3 import FileHttp
\ No newline at end of file
+from .file_s3 import FileHttp
+from .imdb_shards import IMDbShards
+
+from .tmdb_client import TMDbClient, RateLimiter
+from .tmdb_cache import TMDbCache, TMDbCacheMiss, TMDbDiskCache, TMDbS3Cache
+from .http_pool import HttpPool
+from .s3_pool import S3Pool
+from .s3_writer import S3Writer, S3WriterError
+from .s3_ndjson import S3NdJsonWriter
+from .partition import Partition
+from .partition_manifest import PartitionManifest
+from .partition_checkpoint import PartitionCheckpoint
+from .time_budget import TimeBudget
+from .imdb_local_cache import IMDbLocalCache
+from .s3_lease import S3Lease
+from .imdb_delta import IMDbDelta
+from .imdb_partitions import IMDbPartitions
+from .partition_planner import PartitionPlanner
+from .partition_shards import PartitionShards
+from .partition_id_list import PartitionIdList
+from .metrics import Metrics
+from .partition_not_found import PartitionNotFound
+from .tmdb_changes import TMDbChanges
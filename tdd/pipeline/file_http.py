@@ -1,5 +1,4 @@
-from urllib.parse import urlparse
-from urllib.request import urlopen
+from .http_pool import HttpPool
 
 
 class FileHttp:
@@ -8,13 +7,18 @@ class FileHttp:
     to file size and streaming of the file content.
     """
 
-    def __init__(self, url: str, **kwargs):
+    def __init__(self, url: str, http: HttpPool = None, **kwargs):
         self.url = url
         assert self.url.startswith('http')
+        self.http = http or HttpPool.shared()
 
     def get_size(self):
-        with urlopen(self.url) as res:
-            return int(res.headers.get('Content-Length', 0))
+        """
+        Size of the file in bytes, from a HEAD request,
+        without downloading the file.
+        """
+        res = self.http.request('HEAD', self.url)
+        return int(res.headers.get('Content-Length', 0))
 
     def stream(self):
-        return urlopen(self.url)
+        return self.http.stream(self.url)
@@ -1,12 +1,12 @@
 from typing import Dict
 import io
 import json
-import boto3
 import tempfile
 from botocore.exceptions import ClientError
 from urllib.parse import urlparse
 
 from .file_http import FileHttp
+from .s3_pool import S3Pool
 
 
 class FileS3:
@@ -15,11 +15,11 @@ class FileS3:
     size checking, streaming and writing
     """
 
-    def __init__(self, url: str, **kwargs):
+    def __init__(self, url: str, s3=None, **kwargs):
         self.url = url
         url = urlparse(url)
         assert url.scheme == 's3'
-        self.s3 = boto3.client('s3')
+        self.s3 = s3 or S3Pool.shared().get_client()
         self.bucket_name = url.hostname
         self.object_key = url.path[1:]
 
@@ -36,6 +36,18 @@ class FileS3:
         except ClientError:
             return 0
 
+    def get_etag(self) -> str:
+        """
+        Returns the ETag of the file in S3, or None if it is not there.
+        """
+        try:
+            head = self.s3.head_object(
+                Bucket=self.bucket_name,
+                Key=self.object_key)
+            return head['ETag'].strip('"')
+        except ClientError:
+            return None
+
     def delete(self):
         """
         Deletes the file from S3
@@ -66,17 +78,43 @@ class FileS3:
                 Bucket=self.bucket_name,
                 Key=self.object_key)
 
-    def write(self, json_data: Dict):
+    def write(self, json_data: Dict) -> int:
         """
-        Writes data into JSON format.
+        Writes data into JSON format, returning the bytes written.
         """
+        data = json.dumps(json_data).encode('utf-8')
         with tempfile.TemporaryFile() as temp_file:
-            temp_file.write(json.dumps(json_data).encode('utf-8'))
+            temp_file.write(data)
             temp_file.seek(0)
             self.s3.upload_fileobj(
                 temp_file,
                 Bucket=self.bucket_name,
                 Key=self.object_key)
+        return len(data)
+
+    def read(self):
+        """
+        Reads the JSON data of the file; returns None when
+        the file does not exist.
+        """
+        try:
+            res = self.s3.get_object(
+                Bucket=self.bucket_name,
+                Key=self.object_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        return json.loads(res['Body'].read().decode('utf-8'))
+
+    def write_bytes(self, data: bytes):
+        """
+        Writes raw bytes, as they are, into the S3 object.
+        """
+        self.s3.upload_fileobj(
+            io.BytesIO(data),
+            Bucket=self.bucket_name,
+            Key=self.object_key)
 
     def stream(self):
         """
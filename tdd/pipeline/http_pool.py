@@ -0,0 +1,212 @@
+from typing import Dict, Tuple
+
+import io
+import threading
+import http.client
+from urllib.parse import urlparse, urljoin
+from urllib.error import HTTPError, URLError
+
+
+class HttpResponse:
+    """
+    A fully read response: status, headers and body.
+    """
+
+    def __init__(self, status: int, headers, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class HttpPool:
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 5
+
+    """
+    Keep-alive HTTP(S) connections, pooled per host and shared by
+    every thread of the process, so that consecutive requests to
+    the same host skip the TCP and TLS handshakes. Keeps up to
+    `pool_size` idle connections per host and counts how many
+    connections were created, reused and discarded.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+            self,
+            pool_size: int = 10,
+            timeout: float = 30.0,
+            **kwargs):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.counters = {'created': 0, 'reused': 0, 'discarded': 0}
+
+    @staticmethod
+    def shared(**kwargs) -> 'HttpPool':
+        """
+        Returns the process-wide pool, creating it on first use.
+        Later calls with other settings than `kwargs` keep the pool
+        (its connections are in use) and log the settings ignored.
+        """
+        with HttpPool._shared_lock:
+            if HttpPool._shared is None:
+                HttpPool._shared = HttpPool(**kwargs)
+                return HttpPool._shared
+            shared = HttpPool._shared
+        settings = shared.get_settings()
+        mismatched = sorted(k for k, v in kwargs.items() if k in settings and settings[k] != v)
+        if mismatched:
+            print(f'HttpPool, shared pool kept, ignoring other {", ".join(mismatched)}')
+        return shared
+
+    def get_settings(self) -> Dict:
+        return {'pool_size': self.pool_size, 'timeout': self.timeout}
+
+    def get_counters(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counters)
+
+    def request(self, method: str, url: str, headers: Dict[str, str] = None) -> HttpResponse:
+        """
+        Sends the request and reads the response fully, returning
+        the connection to the pool. Non-2xx responses raise HTTPError
+        and network failures raise URLError, as `urlopen` would.
+        """
+        res, conn, key, url = self.open(method, url, headers)
+        try:
+            body = res.read()
+        except (http.client.HTTPException, OSError) as e:
+            self.discard(conn)
+            raise URLError(e)
+        self.release(key, conn, res)
+        if res.status >= 400:
+            raise HTTPError(url, res.status, res.reason, res.headers, io.BytesIO(body))
+        return HttpResponse(res.status, res.headers, body)
+
+    def stream(self, url: str, headers: Dict[str, str] = None) -> 'PooledStream':
+        """
+        Sends a GET request, returning the response as a stream.
+        The connection goes back to the pool if the stream was read
+        to the end when closed; otherwise it is discarded.
+        """
+        res, conn, key, url = self.open('GET', url, headers)
+        if res.status >= 400:
+            body = res.read()
+            self.release(key, conn, res)
+            raise HTTPError(url, res.status, res.reason, res.headers, io.BytesIO(body))
+        return PooledStream(self, key, conn, res)
+
+    def open(self, method: str, url: str, headers: Dict[str, str] = None):
+        for _ in range(HttpPool.MAX_REDIRECTS + 1):
+            key, path = HttpPool.get_key_and_path(url)
+            res, conn = self.send(key, method, path, headers or {})
+            if res.status not in HttpPool.REDIRECT_STATUSES:
+                return res, conn, key, url
+            location = res.getheader('Location')
+            res.read()
+            self.release(key, conn, res)
+            url = urljoin(url, location)
+            if res.status == 303:
+                method = 'GET'
+        raise URLError(f'too many redirects for {url}')
+
+    def send(self, key: Tuple[str, str, int], method: str, path: str, headers: Dict[str, str]):
+        """
+        Sends the request over an idle connection, if any. An idle
+        connection may have been closed by the server meanwhile, in
+        which case we retry once over a fresh connection.
+        """
+        conn, reused = self.acquire(key)
+        try:
+            conn.request(method, path, headers=headers)
+            return conn.getresponse(), conn
+        except (http.client.HTTPException, OSError) as e:
+            self.discard(conn)
+            if not reused:
+                raise URLError(e)
+        conn = self.connect(key)
+        try:
+            conn.request(method, path, headers=headers)
+            return conn.getresponse(), conn
+        except (http.client.HTTPException, OSError) as e:
+            self.discard(conn)
+            raise URLError(e)
+
+    def acquire(self, key: Tuple[str, str, int]):
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                self.counters['reused'] += 1
+                return idle.pop(), True
+        return self.connect(key), False
+
+    def connect(self, key: Tuple[str, str, int]):
+        scheme, host, port = key
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        with self.lock:
+            self.counters['created'] += 1
+        return conn
+
+    def release(self, key: Tuple[str, str, int], conn, res):
+        if res.will_close:
+            self.discard(conn)
+            return
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        self.discard(conn)
+
+    def discard(self, conn):
+        conn.close()
+        with self.lock:
+            self.counters['discarded'] += 1
+
+    @staticmethod
+    def get_key_and_path(url: str):
+        parsed = urlparse(url)
+        assert parsed.scheme in ('http', 'https')
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        return (parsed.scheme, parsed.hostname, port), path
+
+
+class PooledStream(io.RawIOBase):
+    """
+    File-like response body bound to a pooled connection.
+    """
+
+    def __init__(self, pool: HttpPool, key, conn, res):
+        self.pool = pool
+        self.key = key
+        self.conn = conn
+        self.res = res
+        self.headers = res.headers
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.res.readinto(buffer)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self.res.read()
+        return self.res.read(size)
+
+    def close(self):
+        if not self.closed:
+            if self.res.isclosed():
+                self.pool.release(self.key, self.conn, self.res)
+            else:
+                self.pool.discard(self.conn)
+        super().close()
@@ -1,17 +1,18 @@
 from typing import Iterable
 
 import time
-import csv
 import gzip
 import codecs
 import datetime
-import boto3
-import unidecode
-from urllib.request import urlopen
 
 from .imdb_movie import IMDbMovie
 from .file_http import FileHttp
 from .file_s3 import FileS3
+from .imdb_shards import IMDbShards
+from .imdb_local_cache import IMDbLocalCache
+from .s3_lease import S3Lease
+from .imdb_delta import IMDbDelta
+from .metrics import Metrics
 
 
 class IMDb:
@@ -33,60 +34,227 @@ class IMDb:
             self,
             max_attempts=60,
             bucket_name='hudsonmendes-datalake',
+            date_tag: int = None,
+            local_cache: IMDbLocalCache = None,
             **kwargs):
         self.max_attempts = max_attempts
-        self.s3 = boto3.resource('s3')
+        self.local_cache = local_cache
+        self.cached = False
 
         # source file is the official url from the IMDb
         self.source_file = FileHttp(IMDb.SOURCE_URL)
 
         # to be up-to-date, we renew the cache everyday
-        ts = int(time.mktime(datetime.date.today().timetuple()))
-        self.cache_url = IMDb.CACHE_URL.format(bucket_name=bucket_name, date_tag=ts)
+        self.date_tag = date_tag or IMDb.get_date_tag()
+        self.cache_url = IMDb.CACHE_URL.format(bucket_name=bucket_name, date_tag=self.date_tag)
         self.cache_file = FileS3(self.cache_url)
 
-    def get_movie_refs_stream(self, year: int, initial: str) -> Iterable[IMDbMovie]:
+        # small per-partition shards, split once from the daily cache
+        self.shards = IMDbShards(bucket_name=bucket_name, date_tag=self.date_tag)
+
+        # movies added or changed since the previous snapshot
+        self.delta = IMDbDelta(bucket_name=bucket_name, date_tag=self.date_tag)
+
+    @staticmethod
+    def get_date_tag() -> int:
         """
-        Ensure that the IMDB file is cached in S3, and then stream its
-        information about the movies represented by IMDbMovie.
+        Tag of today's snapshot: the timestamp of today's midnight.
         """
-        self.attempt_first_cache()
-        self.await_until_cached()
-        with self.cache_file.stream() as f_in:
-            yield from self.extract_movie_refs_from(f_in, year, initial)
+        return int(time.mktime(datetime.date.today().timetuple()))
 
-    def attempt_first_cache(self):
-        if self.cache_file.get_size() == 0:
-            print('IMDB, file not cached, transfering it to datalake')
-            self.cache_file.touch()
-            self.cache_file.copy_from(self.source_file)
+    def get_movie_refs_stream(self, year: int, initial: str, metrics: Metrics = None) -> Iterable[IMDbMovie]:
+        """
+        Stream the movies of the partition from its shard, when the
+        sharding stage has already run for the daily snapshot.
+        Otherwise, ensure that the IMDB file is cached in S3, and then
+        stream its information about the movies represented by IMDbMovie.
+        """
+        if self.shards.is_ready():
+            yield from self.get_movie_refs_from_shard(year, initial, metrics)
         else:
-            print('IMDB, file already present in datalake')
+            print('IMDB, shards not ready, scanning the full file')
+            yield from self.get_movie_refs_from_cache(year, initial, metrics)
+
+    def get_movie_refs_from_shard(self, year: int, initial: str, metrics: Metrics = None) -> Iterable[IMDbMovie]:
+        shard_file = self.shards.get_shard_file(year=year, initial=initial)
+        if shard_file.get_size() == 0:
+            print(f'IMDB, no shard for partition ({year}, {initial})')
+            return
+        with shard_file.stream() as f_in:
+            yield from self.extract_movie_refs_from(f_in, year, initial, metrics=metrics)
+
+    def get_movie_refs_from_cache(self, year: int, initial: str, metrics: Metrics = None) -> Iterable[IMDbMovie]:
+        self.ensure_cached()
+        local_path = None
+        if self.local_cache:
+            local_path = self.local_cache.get_path(self.cache_file, self.date_tag)
+        if local_path:
+            with open(local_path, 'rb') as f_in:
+                yield from self.extract_movie_refs_from(f_in, year, initial, metrics=metrics)
+        else:
+            with self.cache_file.stream() as f_in:
+                yield from self.extract_movie_refs_from(f_in, year, initial, metrics=metrics)
+
+    def split_into_shards(self) -> int:
+        """
+        Ensure that the IMDB file is cached in S3, and split it into
+        the per-partition shards, once per daily snapshot.
+        """
+        if self.shards.is_ready():
+            print('IMDB, shards already present in datalake')
+            return 0
+        self.ensure_cached()
+        with self.cache_file.stream() as f_in:
+            return self.shards.split_from(f_in)
+
+    def split_into_delta(self):
+        """
+        Ensure that the IMDB file is cached in S3, and compare it with
+        the previous snapshot, writing the new or changed movies of
+        each partition. Returns the delta marker (None if there is no
+        previous snapshot).
+        """
+        marker = self.delta.get_marker()
+        if marker:
+            print('IMDB, delta already present in datalake')
+            return marker
+        self.ensure_cached()
+        with self.cache_file.stream() as f_in:
+            return self.delta.split_from(f_in)
+
+    def ensure_cached(self):
+        """
+        Ensures that today's IMDB file is cached in S3. Usually a single
+        worker (holding the lease) transfers it, while the others wait
+        for the completion marker. Once seen, it is remembered by the
+        container. The lease is best-effort (see `S3Lease`), so the
+        transfer is idempotent: the same file to the same key, with
+        the marker written only once the object is complete.
+        """
+        if self.cached:
+            return
+        if self.is_cached() or self.attempt_first_cache():
+            self.cached = True
+            return
+        self.await_until_cached()
+        self.cached = True
+
+    def is_cached(self) -> bool:
+        """
+        Tells whether the completion marker is there, and the cache
+        file has the size that it recorded.
+        """
+        marker = self.get_marker_file().read()
+        return bool(marker) and self.cache_file.get_size() == marker['size']
+
+    def attempt_first_cache(self) -> bool:
+        """
+        Transfers the file to the datalake if we get the lease, and
+        writes the completion marker. Returns False if someone else
+        holds the lease. Safe to run by two workers at once: the later
+        one skips the transfer if the file is already there, or else
+        uploads the same bytes, and S3 replaces the object atomically.
+        """
+        lease = S3Lease(self.cache_file.url + '.lease')
+        if not lease.acquire():
+            print('IMDB, file being transfered by another worker')
+            return False
+        try:
+            if self.is_cached():
+                print('IMDB, file already present in datalake')
+                return True
+            source_size = self.source_file.get_size()
+            if source_size == 0 or self.cache_file.get_size() != source_size:
+                print('IMDB, file not cached, transfering it to datalake')
+                self.cache_file.copy_from(self.source_file)
+            self.get_marker_file().write({
+                'size': self.cache_file.get_size(),
+                'etag': self.cache_file.get_etag(),
+                'source_size': source_size})
+            print('IMDB, file ready in datalake')
+            return True
+        finally:
+            lease.release()
 
     def await_until_cached(self):
+        """
+        Polls the completion marker, backing off exponentially
+        from 1 up to 10 seconds between attempts.
+        """
         attempts = 0
-        while self.cache_file.get_size() < self.source_file.get_size():
-            print('IMDB, waiting transference of IMDB file to datalake')
-            time.sleep(1)  # wait 1 second and check again
-            attempts += 1
-            if attempts > self.max_attempts:
+        while not self.is_cached():
+            if attempts >= self.max_attempts:
                 msg = f'[IMDB] the cache file never got ready, {self.max_attempts} attempts'
                 raise ResourceWarning(msg)
+            print('IMDB, waiting transference of IMDB file to datalake')
+            time.sleep(min(10, 2 ** attempts))
+            attempts += 1
         print('IMDB, file ready in datalake')
 
-    def extract_movie_refs_from(self, stream, year, initial):
+    def get_marker_file(self) -> FileS3:
+        return FileS3(self.cache_file.url + '.done')
+
+    def extract_movie_refs_from(self, stream, year, initial, fast=True, metrics: Metrics = None):
+        """
+        Streams the movies of the (year, initial) partition out of the
+        gzipped TSV stream. The fast scan finds the columns once and
+        rejects rows on the cheap fields (type and year) before working
+        out the initial of the title; `fast=False` builds an IMDbMovie
+        for every row, as it used to.
+        """
         print('IMDB -> TMDB, streaming ids now...')
-        reviewed = 0
         with gzip.open(stream) as f_in:
             f_cur = codecs.iterdecode(f_in, 'utf-8')
-            csv_reader = csv.reader(f_cur, delimiter='\t')
+            csv_reader = IMDbMovie.get_tsv_reader(f_cur)
             header = next(csv_reader)
+            if fast:
+                yield from IMDb.scan_movie_refs_from(csv_reader, header, year, initial, metrics)
+                return
             for row in csv_reader:
                 # check if it matches year and initial, and yield if it does
                 imdb_movie = IMDbMovie(header, row)
                 if initial == imdb_movie.initial and year == imdb_movie.year and imdb_movie.type == 'movie':
                     yield imdb_movie
-                # log review progress
+
+    @staticmethod
+    def scan_movie_refs_from(csv_reader, header, year, initial, metrics: Metrics = None):
+        """
+        Rows are counted locally, and the time spent scanning (not the
+        time the consumer holds each movie) is recorded once, at the end.
+        """
+        ix_id = header.index(IMDbMovie.HEADER_ID)
+        ix_type = header.index(IMDbMovie.HEADER_TYPE)
+        ix_title = header.index(IMDbMovie.HEADER_TITLE)
+        ix_year = header.index(IMDbMovie.HEADER_YEAR)
+        get_initial_from = IMDbMovie.get_initial_from
+        clock = time.perf_counter
+        reviewed = 0
+        scanning_secs = 0.0
+        started = clock()
+        try:
+            for row in csv_reader:
                 reviewed += 1
-                if reviewed % 100000 == 0:
-                    print(f'[IMDb] rewiewed {reviewed}')
+                if row[ix_type] != 'movie':
+                    continue
+                if IMDbMovie.get_year_from(row[ix_year]) != year:
+                    continue
+                title = row[ix_title]
+                title_initial = get_initial_from(title)
+                if title_initial == initial:
+                    scanning_secs += clock() - started
+                    started = None
+                    yield IMDbMovie.from_fields(
+                        imdb_id=row[ix_id],
+                        title_type='movie',
+                        title=title,
+                        year=year,
+                        initial=title_initial)
+                    started = clock()
+        finally:
+            if started is not None:
+                scanning_secs += clock() - started
+            if metrics is not None:
+                metrics.count('imdb_rows_scanned', reviewed)
+                metrics.observe('imdb_scan_ms', scanning_secs * 1000)
+                if scanning_secs > 0:
+                    metrics.set('imdb_scan_rows_per_sec', reviewed / scanning_secs)
@@ -0,0 +1,145 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import re
+import gzip
+import json
+import zlib
+import codecs
+
+from .imdb_movie import IMDbMovie
+from .partition import Partition
+from .file_s3 import FileS3
+from .s3_pool import S3Pool
+
+
+class IMDbDelta:
+    DIGESTS_PREFIX = 'imdb/digests-'
+    DIGESTS_URL = 's3://{bucket_name}/imdb/digests-{date_tag}.json.gz'
+    DELTA_URL = 's3://{bucket_name}/imdb/deltas-{date_tag}/{partition_key}.json'
+    MARKER_URL = 's3://{bucket_name}/imdb/deltas-{date_tag}/_SUCCESS'
+
+    """
+    Compares today's IMDb snapshot with the previous one, so that a
+    daily refresh only goes after the movies that were added or changed.
+
+    Each run keeps a compact digest of the snapshot (per movie: year,
+    initial and a CRC32 of its row), and writes the ids of the added or
+    changed movies of each partition, followed by a marker listing the
+    partitions that have any.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            date_tag: int,
+            s3=None,
+            **kwargs):
+        self.bucket_name = bucket_name
+        self.date_tag = date_tag
+        self.s3 = s3 or S3Pool.shared().get_client()
+        self.marker_file = FileS3(IMDbDelta.MARKER_URL.format(
+            bucket_name=bucket_name,
+            date_tag=date_tag))
+
+    def split_from(self, stream) -> Optional[Dict]:
+        """
+        Digests today's snapshot from the stream, compares it with the
+        previous digests and writes the delta of each partition.
+        Returns the marker, or None if there is no previous snapshot
+        to compare with (everything must then be processed).
+        """
+        current = IMDbDelta.get_digests_from(stream)
+        self.get_digests_file(self.date_tag).write_bytes(IMDbDelta.to_gzip(current))
+        previous_date_tag = self.get_previous_date_tag()
+        if previous_date_tag is None:
+            print('IMDB, no previous snapshot to compare with')
+            return None
+        with self.get_digests_file(previous_date_tag).stream() as f_in:
+            previous = json.loads(gzip.decompress(f_in.read()).decode('utf-8'))
+        partitions = IMDbDelta.compare(previous, current)
+        for (year, initial), imdb_ids in partitions.items():
+            self.get_delta_file(Partition(year, initial)).write({'imdb_ids': imdb_ids})
+        marker = {
+            'previous_date_tag': previous_date_tag,
+            'partitions': [{'year': year, 'initial': initial, 'count': len(ids)} for (year, initial), ids in sorted(partitions.items())]}
+        self.marker_file.write(marker)
+        print(f'IMDB, {sum(len(ids) for ids in partitions.values())} new or changed movies in {len(partitions)} partitions')
+        return marker
+
+    def get_marker(self) -> Optional[Dict]:
+        return self.marker_file.read()
+
+    def filter(self, imdb_movies_stream: Iterable[IMDbMovie], partition: Partition) -> Iterable[IMDbMovie]:
+        """
+        Leaves in the stream only the movies added or changed today.
+        """
+        delta = self.get_delta_file(partition).read() or {}
+        imdb_ids = set(delta.get('imdb_ids', []))
+        for imdb_movie in imdb_movies_stream:
+            if imdb_movie.get_id() in imdb_ids:
+                yield imdb_movie
+
+    def get_previous_date_tag(self) -> Optional[int]:
+        """
+        Finds the most recent digests older than today's.
+        """
+        date_tags = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=IMDbDelta.DIGESTS_PREFIX):
+            for item in page.get('Contents', []):
+                match = re.search(r'digests-(\d+)\.json\.gz$', item['Key'])
+                if match and int(match.group(1)) < self.date_tag:
+                    date_tags.append(int(match.group(1)))
+        return max(date_tags) if date_tags else None
+
+    def get_digests_file(self, date_tag: int) -> FileS3:
+        return FileS3(IMDbDelta.DIGESTS_URL.format(
+            bucket_name=self.bucket_name,
+            date_tag=date_tag))
+
+    def get_delta_file(self, partition: Partition) -> FileS3:
+        # one delta per (year, initial), shared by its shards
+        return FileS3(IMDbDelta.DELTA_URL.format(
+            bucket_name=self.bucket_name,
+            date_tag=self.date_tag,
+            partition_key=Partition(partition.year, partition.initial).get_key()))
+
+    @staticmethod
+    def get_digests_from(stream) -> Dict[str, list]:
+        """
+        Reads the movies of the gzipped TSV stream into
+        {tconst: [year, initial, crc32 of the row]}.
+        """
+        digests = {}
+        with gzip.open(stream) as f_in:
+            f_cur = codecs.iterdecode(f_in, 'utf-8')
+            csv_reader = IMDbMovie.get_tsv_reader(f_cur)
+            header = next(csv_reader)
+            ix_type = header.index(IMDbMovie.HEADER_TYPE)
+            for row in csv_reader:
+                if row[ix_type] != 'movie':
+                    continue
+                imdb_movie = IMDbMovie(header, row)
+                if imdb_movie.year is None:
+                    continue
+                crc = zlib.crc32('\t'.join(row).encode('utf-8'))
+                digests[imdb_movie.get_id()] = [imdb_movie.year, imdb_movie.initial, crc]
+        return digests
+
+    @staticmethod
+    def compare(previous: Dict[str, list], current: Dict[str, list]) -> Dict[Tuple[int, str], List[str]]:
+        """
+        Groups by partition the ids that are new, or whose rows changed.
+        """
+        partitions = {}
+        for imdb_id, digest in current.items():
+            if previous.get(imdb_id) != digest:
+                year, initial, _ = digest
+                partitions.setdefault((year, initial), []).append(imdb_id)
+        for imdb_ids in partitions.values():
+            imdb_ids.sort()
+        return partitions
+
+    @staticmethod
+    def to_gzip(digests: Dict[str, list]) -> bytes:
+        return gzip.compress(json.dumps(digests, separators=(',', ':')).encode('utf-8'))
@@ -0,0 +1,103 @@
+from typing import Optional
+
+import os
+import gzip
+import codecs
+import threading
+
+from .imdb_movie import IMDbMovie
+from .file_s3 import FileS3
+
+
+class IMDbLocalCache:
+    FILE_PREFIX = 'title.basics-'
+    FILE_NAME = 'title.basics-{date_tag}-{etag}.movies.tsv.gz'
+
+    """
+    Keeps a compact local copy (movies only) of the IMDb snapshot cached
+    in S3, in the `/tmp` of the lambda container, so that the following
+    partitions processed by a warm container skip the S3 transfer.
+
+    The copy is named after the date tag and the S3 ETag of the snapshot,
+    so a changed snapshot is never mistaken for the local one, and older
+    copies are evicted before a new one is written. Snapshots bigger
+    than `max_bytes` (as told by the S3 HEAD, before any transfer) are
+    not copied, and neither are copies that turn out bigger; either way,
+    the container remembers it for the date tag, so that it streams the
+    snapshot from S3 once per partition, rather than twice.
+    """
+
+    def __init__(
+            self,
+            folder: str = '/tmp/imdb',
+            max_bytes: int = 256 * 1024 * 1024,
+            **kwargs):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.too_big_date_tag = None
+
+    def get_path(self, cache_file: FileS3, date_tag: int) -> Optional[str]:
+        """
+        Returns the path of the local copy of the `cache_file`, building
+        it first if needed; or None if it cannot be kept locally.
+        """
+        if self.too_big_date_tag == date_tag:
+            return None
+        etag = cache_file.get_etag()
+        if not etag:
+            return None
+        path = os.path.join(self.folder, IMDbLocalCache.FILE_NAME.format(date_tag=date_tag, etag=etag))
+        with self.lock:
+            if os.path.isfile(path):
+                print('IMDB, using local copy of the file')
+                return path
+            source_size = cache_file.get_size()
+            if source_size > self.max_bytes:
+                print(f'IMDB, file too big to copy locally ({source_size} bytes)')
+                self.too_big_date_tag = date_tag
+                return None
+            os.makedirs(self.folder, exist_ok=True)
+            self.evict()
+            print('IMDB, copying the file locally, movies only')
+            temp_path = path + '.part'
+            try:
+                with cache_file.stream() as f_in:
+                    size = IMDbLocalCache.compact(f_in, temp_path)
+                if size > self.max_bytes:
+                    print(f'IMDB, local copy too big ({size} bytes), not keeping it')
+                    os.remove(temp_path)
+                    self.too_big_date_tag = date_tag
+                    return None
+                os.replace(temp_path, path)
+                return path
+            except OSError as e:
+                print(f'IMDB, could not copy the file locally: {e}')
+                if os.path.isfile(temp_path):
+                    os.remove(temp_path)
+                return None
+
+    def evict(self):
+        """
+        Removes every local copy, of any snapshot.
+        """
+        for file_name in os.listdir(self.folder):
+            if file_name.startswith(IMDbLocalCache.FILE_PREFIX):
+                os.remove(os.path.join(self.folder, file_name))
+
+    @staticmethod
+    def compact(stream, path: str) -> int:
+        """
+        Writes the header and the raw lines of the movies, as they are,
+        to a gzipped file, returning its size in bytes.
+        """
+        with gzip.open(stream) as f_in, gzip.open(path, 'wb', compresslevel=1) as f_out:
+            f_cur = codecs.iterdecode(f_in, 'utf-8')
+            header_line = next(f_cur)
+            f_out.write(header_line.encode('utf-8'))
+            ix_type = header_line.rstrip('\r\n').split('\t').index(IMDbMovie.HEADER_TYPE)
+            for line in f_cur:
+                fields = line.split('\t', ix_type + 1)
+                if len(fields) > ix_type and fields[ix_type] == 'movie':
+                    f_out.write(line.encode('utf-8'))
+        return os.path.getsize(path)
@@ -1,6 +1,10 @@
-from typing import List
+from typing import Iterable, List
 import unidecode
 import string
+import csv
+
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
 
 class IMDbMovie:
     HEADER_ID = 'tconst'
@@ -12,6 +16,8 @@ class IMDbMovie:
     Wraps the Movie File, simplfying advanced parsing of the information
     """
 
+    __slots__ = ('id', 'type', 'title', 'year', 'initial')
+
     def __init__(
             self,
             header: List[str],
@@ -27,6 +33,35 @@ class IMDbMovie:
         self.year = IMDbMovie.get_year_from(row[ix_year])
         self.initial = IMDbMovie.get_initial_from(self.title)
 
+    @staticmethod
+    def get_tsv_reader(lines: Iterable[str]):
+        """
+        Reads the rows of the IMDb TSV dataset, which has no quoting:
+        a `"` is part of the field, as any other character, so every
+        reader of the dataset must split the rows the same way.
+        """
+        return csv.reader(lines, delimiter='\t', quoting=csv.QUOTE_NONE)
+
+    @classmethod
+    def from_fields(
+            cls,
+            imdb_id: str,
+            title_type: str,
+            title: str,
+            year: int,
+            initial: str = None):
+        """
+        Builds the movie straight from its fields, without looking
+        the columns up in the header, for the fast scan.
+        """
+        imdb_movie = cls.__new__(cls)
+        imdb_movie.id = imdb_id
+        imdb_movie.type = title_type
+        imdb_movie.title = title
+        imdb_movie.year = year
+        imdb_movie.initial = IMDbMovie.get_initial_from(title) if initial is None else initial
+        return imdb_movie
+
     def get_id(self) -> str:
         return self.id
 
@@ -49,8 +84,11 @@ class IMDbMovie:
     @staticmethod
     def get_initial_from(x):
         initial = str(x)
-        initial = unidecode.unidecode(initial)
-        initial = initial.translate(str.maketrans('', '', string.punctuation))
+        try:
+            initial.encode('ascii')  # plain ascii needs no transliteration
+        except UnicodeEncodeError:
+            initial = unidecode.unidecode(initial)
+        initial = initial.translate(PUNCTUATION_TABLE)
         if initial:
             initial = initial.strip().upper()
             if len(initial) < 2:
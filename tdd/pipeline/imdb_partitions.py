@@ -0,0 +1,68 @@
+from typing import Dict, Tuple
+
+import gzip
+import codecs
+
+from .imdb_movie import IMDbMovie
+
+
+class IMDbPartitions:
+    """
+    Scans the IMDb dataset once, streaming it, to find the partitions
+    of the fleet, i.e. the (year, initial) of its movies, and how many
+    movies each of them has. Memory is bounded by the number of
+    partitions, not by the size of the file, unless the ids of the
+    movies are kept too (`keep_ids`), for id-list messages.
+    """
+
+    def __init__(
+            self,
+            min_year: int = None,
+            max_year: int = None,
+            keep_ids: bool = False,
+            **kwargs):
+        self.min_year = min_year
+        self.max_year = max_year
+        self.keep_ids = keep_ids
+        self.counts = {}
+        self.ids = {}
+
+    def scan(self, stream) -> Dict[Tuple[int, str], int]:
+        """
+        Counts the movies per partition in the gzipped TSV stream,
+        within the [min_year, max_year] range.
+        """
+        with gzip.open(stream) as f_in:
+            f_cur = codecs.iterdecode(f_in, 'utf-8')
+            csv_reader = IMDbMovie.get_tsv_reader(f_cur)
+            header = next(csv_reader)
+            ix_id = header.index(IMDbMovie.HEADER_ID)
+            ix_type = header.index(IMDbMovie.HEADER_TYPE)
+            ix_title = header.index(IMDbMovie.HEADER_TITLE)
+            ix_year = header.index(IMDbMovie.HEADER_YEAR)
+            for row in csv_reader:
+                if row[ix_type] != 'movie':
+                    continue
+                year = IMDbMovie.get_year_from(row[ix_year])
+                if not self.is_in_range(year):
+                    continue
+                initial = IMDbMovie.get_initial_from(row[ix_title])
+                if not initial:
+                    continue
+                self.add(year, initial, row[ix_id])
+        return self.counts
+
+    def add(self, year: int, initial: str, imdb_id: str):
+        key = (year, initial)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.keep_ids:
+            self.ids.setdefault(key, []).append(imdb_id)
+
+    def is_in_range(self, year: int) -> bool:
+        if year is None:
+            return False
+        if self.min_year is not None and year < self.min_year:
+            return False
+        if self.max_year is not None and year > self.max_year:
+            return False
+        return True
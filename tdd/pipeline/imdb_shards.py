@@ -0,0 +1,141 @@
+from typing import Dict, List, Tuple
+
+import io
+import os
+import gzip
+import zlib
+import codecs
+import tempfile
+
+from .imdb_movie import IMDbMovie
+from .file_s3 import FileS3
+from .s3_writer import S3Writer
+
+
+class IMDbShards:
+    SHARD_URL = 's3://{bucket_name}/imdb/shards-{date_tag}/year-{year}/initial-{initial}.tsv.gz'
+    MARKER_URL = 's3://{bucket_name}/imdb/shards-{date_tag}/_SUCCESS'
+    SPOOL_BUCKETS = 64
+
+    """
+    Splits the cached IMDb dataset into small per-partition shards
+    (movies only), so that each worker reads only the rows of its
+    own (year, initial) partition instead of scanning the whole file.
+
+    The marker object is only written after every shard is in place,
+    so a missing shard under a present marker means the partition
+    has no movies, while a missing marker means the shards are not
+    ready and the caller must fall back to the full scan.
+
+    The rows are spooled to local files by partition, rather than held
+    in memory, and only one of those files is grouped at a time,
+    while the shards already grouped are uploaded by `max_writers`
+    concurrent S3Writer threads.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            date_tag: int,
+            max_writers: int = 8,
+            **kwargs):
+        self.bucket_name = bucket_name
+        self.date_tag = date_tag
+        self.max_writers = max_writers
+        self.marker_file = FileS3(IMDbShards.MARKER_URL.format(
+            bucket_name=bucket_name,
+            date_tag=date_tag))
+        self.ready = False
+
+    def is_ready(self) -> bool:
+        """
+        Tells whether the sharding stage has completed for the snapshot.
+        Once it has, it is remembered for the life of the container.
+        """
+        if not self.ready:
+            self.ready = self.marker_file.get_size() > 0
+        return self.ready
+
+    def get_shard_file(self, year: int, initial: str) -> FileS3:
+        return FileS3(self.get_shard_url(year=year, initial=initial))
+
+    def get_shard_url(self, year: int, initial: str) -> str:
+        return IMDbShards.SHARD_URL.format(
+            bucket_name=self.bucket_name,
+            date_tag=self.date_tag,
+            year=year,
+            initial=initial)
+
+    def split_from(self, stream, buckets: int = SPOOL_BUCKETS, writer: S3Writer = None) -> int:
+        """
+        Reads the full IMDb dataset from the stream, writes one shard
+        per (year, initial) partition, concurrently through the
+        `writer` and, once every shard is uploaded, the marker.
+        Returns the number of shards written.
+        """
+        count = 0
+        with tempfile.TemporaryDirectory() as folder:
+            header, paths = IMDbShards.spool_rows(stream, folder, buckets)
+            with writer or S3Writer(max_workers=self.max_writers) as writer:
+                for path in paths:
+                    for (year, initial), lines in IMDbShards.read_spool(path).items():
+                        writer.write_bytes(
+                            self.get_shard_url(year=year, initial=initial),
+                            IMDbShards.to_gzip(header, lines))
+                        count += 1
+        self.marker_file.write({'shards': count})
+        print(f'IMDB, {count} shards written to datalake')
+        return count
+
+    @staticmethod
+    def spool_rows(stream, folder: str, buckets: int = SPOOL_BUCKETS) -> Tuple[List[str], List[str]]:
+        """
+        Spools the movie rows of the gzipped TSV stream into up to
+        `buckets` local files, by partition, each raw line (so that
+        shards have the original format and order) prefixed with its
+        partition. Returns the header and the paths of the files.
+        """
+        files = {}
+        try:
+            with gzip.open(stream) as f_in:
+                f_cur = codecs.iterdecode(f_in, 'utf-8')
+                csv_reader = IMDbMovie.get_tsv_reader(f_cur)
+                header = next(csv_reader)
+                for row in csv_reader:
+                    imdb_movie = IMDbMovie(header, row)
+                    if imdb_movie.type != 'movie' or imdb_movie.year is None:
+                        continue
+                    key = f'{imdb_movie.year}\t{imdb_movie.initial}'
+                    bucket = zlib.crc32(key.encode('utf-8')) % buckets
+                    f_out = files.get(bucket)
+                    if f_out is None:
+                        path = os.path.join(folder, f'bucket-{bucket:04d}.tsv')
+                        f_out = files[bucket] = open(path, 'w', encoding='utf-8', newline='')
+                    f_out.write(key + '\t' + '\t'.join(row) + '\n')
+        finally:
+            for f_out in files.values():
+                f_out.close()
+        return header, [f_out.name for _, f_out in sorted(files.items())]
+
+    @staticmethod
+    def read_spool(path: str) -> Dict[Tuple[int, str], List[str]]:
+        """
+        Groups the lines of a spooled bucket by partition.
+        """
+        partitions = {}
+        with open(path, encoding='utf-8', newline='') as f_in:
+            for line in f_in:
+                year, initial, raw = line.rstrip('\n').split('\t', 2)
+                partitions.setdefault((int(year), initial), []).append(raw)
+        return partitions
+
+    @staticmethod
+    def to_gzip(header: List[str], lines: List[str]) -> bytes:
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as f_out:
+            f_out.write('\t'.join(header).encode('utf-8'))
+            f_out.write(b'\n')
+            for line in lines:
+                f_out.write(line.encode('utf-8'))
+                f_out.write(b'\n')
+        return buffer.getvalue()
@@ -0,0 +1,117 @@
+from typing import Dict, List
+
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Metrics:
+    NAMESPACE = 'TMDbDownloader'
+    PERCENTILES = (50, 90, 99)
+
+    """
+    Counters, gauges and timings of the stages of a partition, shared
+    by every thread working on it, and emitted once, when the partition
+    is done, as a single line of CloudWatch Embedded Metric Format (EMF)
+    JSON, which CloudWatch turns into metrics with no further calls.
+
+    Recording is a dict update under a lock, cheap enough for the
+    per-movie loop; the per-row loops count locally and record once.
+    Names ending in `_ms` are in milliseconds, in `_bytes` in bytes.
+    """
+
+    def __init__(
+            self,
+            namespace: str = NAMESPACE,
+            clock=time.perf_counter,
+            **kwargs):
+        self.namespace = namespace
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.values = {}
+
+    def count(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """
+        Records one value of a distribution (e.g. a latency),
+        summarised by its percentiles when emitted.
+        """
+        with self.lock:
+            self.values.setdefault(name, []).append(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """
+        Observes the milliseconds taken by the block.
+        """
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(name, (self.clock() - started) * 1000)
+
+    def get_summary(self) -> Dict[str, float]:
+        """
+        Counters and gauges as they are, and distributions as their
+        count, average, percentiles and maximum.
+        """
+        with self.lock:
+            summary = dict(self.counters)
+            summary.update(self.gauges)
+            values = {name: sorted(items) for name, items in self.values.items()}
+        for name, items in values.items():
+            summary[f'{name}_count'] = len(items)
+            summary[f'{name}_avg'] = sum(items) / len(items)
+            for percentile in Metrics.PERCENTILES:
+                summary[f'{name}_p{percentile}'] = Metrics.get_percentile(items, percentile)
+            summary[f'{name}_max'] = items[-1]
+        return summary
+
+    def to_emf(self, dimensions: Dict[str, str], properties: Dict = None) -> Dict:
+        """
+        The EMF document: the metrics, their `dimensions`, and extra
+        `properties` that are logged (and searchable) but not metrics.
+        """
+        summary = self.get_summary()
+        document = dict(properties or {})
+        document.update(dimensions)
+        document.update(summary)
+        document['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': self.namespace,
+                'Dimensions': [list(dimensions.keys())],
+                'Metrics': [{'Name': name, 'Unit': Metrics.get_unit(name)} for name in sorted(summary)]}]}
+        return document
+
+    def emit(self, dimensions: Dict[str, str], properties: Dict = None):
+        print(json.dumps(self.to_emf(dimensions, properties)))
+
+    @staticmethod
+    def get_percentile(items: List[float], percentile: int) -> float:
+        """
+        Nearest-rank percentile of the sorted items.
+        """
+        rank = int(math.ceil(percentile / 100 * len(items)))
+        return items[min(len(items), max(1, rank)) - 1]
+
+    @staticmethod
+    def get_unit(name: str) -> str:
+        if '_ms' in name and not name.endswith('_count'):
+            return 'Milliseconds'
+        if '_bytes' in name and not name.endswith('_count'):
+            return 'Bytes'
+        if name.endswith('_per_sec'):
+            return 'Count/Second'
+        return 'Count'
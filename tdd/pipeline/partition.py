@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List
+
+import zlib
+
+from .imdb_movie import IMDbMovie
+
+
+class Partition:
+    """
+    Unit of work of the fleet: the movies of a given `year` whose
+    titles start with a given `initial`, as carried by SQS messages.
+    A hot partition may be split into `shards`, each with the movies
+    whose IMDb id hashes to its `shard` number. The message may also
+    carry the exact IMDb ids of the partition, either inline (`ids`)
+    or in an id-list object (`ids_url`), sparing the IMDb scan.
+    A `refresh` downloads its movies again, even if already persisted.
+    """
+
+    def __init__(
+            self,
+            year: int,
+            initial: str,
+            skip_existing: bool = False,
+            resume: bool = False,
+            delta: bool = False,
+            shard: int = None,
+            shards: int = None,
+            ids: List[str] = None,
+            ids_url: str = None,
+            refresh: bool = False,
+            **kwargs):
+        self.year = int(year)
+        self.initial = initial
+        self.skip_existing = skip_existing
+        self.resume = resume
+        self.delta = delta
+        self.shard = int(shard) if shards else None
+        self.shards = int(shards) if shards else None
+        self.ids = ids
+        self.ids_url = ids_url
+        self.refresh = refresh
+
+    @staticmethod
+    def from_message(body: Dict) -> 'Partition':
+        """
+        Reads the partition from the body of an SQS message.
+        """
+        return Partition(
+            year=body['year'],
+            initial=body['initial'],
+            skip_existing=bool(body.get('skip_existing', False)),
+            resume=bool(body.get('resume', False)),
+            delta=bool(body.get('delta', False)),
+            shard=body.get('shard'),
+            shards=body.get('shards'),
+            ids=body.get('ids'),
+            ids_url=body.get('ids_url'),
+            refresh=bool(body.get('refresh', False)))
+
+    @staticmethod
+    def from_messages(body: Dict) -> List['Partition']:
+        """
+        Reads the partitions of an SQS message, which carries either
+        a single partition or a pack of small ones (`partitions`).
+        """
+        if 'partitions' in body:
+            return [Partition.from_message(item) for item in body['partitions']]
+        return [Partition.from_message(body)]
+
+    @staticmethod
+    def to_messages(partitions: List['Partition']) -> Dict:
+        """
+        The body of the SQS message carrying the partitions.
+        """
+        if len(partitions) == 1:
+            return partitions[0].to_message()
+        return {'partitions': [partition.to_message() for partition in partitions]}
+
+    def to_message(self) -> Dict:
+        message = {'year': self.year, 'initial': self.initial}
+        if self.shards:
+            message['shard'] = self.shard
+            message['shards'] = self.shards
+        if self.ids is not None:
+            message['ids'] = self.ids
+        if self.ids_url:
+            message['ids_url'] = self.ids_url
+        if self.skip_existing:
+            message['skip_existing'] = True
+        if self.resume:
+            message['resume'] = True
+        if self.delta:
+            message['delta'] = True
+        if self.refresh:
+            message['refresh'] = True
+        return message
+
+    def get_continuation(self) -> 'Partition':
+        """
+        The same partition, resuming from its checkpoint and skipping
+        whatever got persisted meanwhile (but for refreshes, whose
+        movies were all persisted before).
+        """
+        return Partition(
+            year=self.year,
+            initial=self.initial,
+            skip_existing=not self.refresh,
+            refresh=self.refresh,
+            resume=True,
+            delta=self.delta,
+            shard=self.shard,
+            shards=self.shards,
+            ids=self.ids,
+            ids_url=self.ids_url)
+
+    def has_ids(self) -> bool:
+        return self.ids is not None or bool(self.ids_url)
+
+    def filter(self, imdb_movies_stream: Iterable[IMDbMovie]) -> Iterable[IMDbMovie]:
+        """
+        Leaves in the stream only the movies of the shard.
+        """
+        for imdb_movie in imdb_movies_stream:
+            if Partition.get_shard_of(imdb_movie.get_id(), self.shards) == self.shard:
+                yield imdb_movie
+
+    @staticmethod
+    def get_shard_of(imdb_id: str, shards: int) -> int:
+        return zlib.crc32(imdb_id.encode('utf-8')) % shards
+
+    def get_key(self) -> str:
+        """
+        Path of the partition in the datalake.
+        """
+        key = f'year-{self.year}/initial-{self.initial}'
+        if self.shards:
+            key += f'/shard-{self.shard}-of-{self.shards}'
+        return key
+
+    def __repr__(self):
+        if self.shards:
+            return f'({self.year}, {self.initial}, {self.shard}/{self.shards})'
+        return f'({self.year}, {self.initial})'
@@ -0,0 +1,114 @@
+from typing import Iterable
+
+import zlib
+
+from .imdb_movie import IMDbMovie
+from .partition import Partition
+from .time_budget import TimeBudget
+from .file_s3 import FileS3
+
+
+class PartitionCheckpoint:
+    CHECKPOINT_URL = 's3://{bucket_name}/tmdb/checkpoints/{partition_key}.json'
+
+    """
+    Tracks how far into the IMDb stream of a partition we got
+    (`offset` movies, the last one being `last_id`), so that an
+    invocation running out of time can stop taking new movies and
+    the next invocation can resume from there instead of starting
+    the partition over.
+
+    The IMDb stream of a partition is read in the same order every
+    time; when resuming, the `last_id` confirms it. If it does not
+    match (e.g. a new snapshot came in meanwhile), nothing is skipped
+    and we rely on the manifest to skip what is already persisted.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            partition: Partition,
+            **kwargs):
+        self.partition = partition
+        self.file = FileS3(PartitionCheckpoint.CHECKPOINT_URL.format(
+            bucket_name=bucket_name,
+            partition_key=partition.get_key()))
+        self.offset = 0
+        self.last_id = None
+        self.interrupted = False
+
+    def load(self) -> 'PartitionCheckpoint':
+        doc = self.file.read() or {}
+        self.offset = int(doc.get('offset', 0))
+        self.last_id = doc.get('last_id')
+        print(f'Checkpoint, resuming {self.partition} after {self.offset} movies')
+        return self
+
+    def resume(self, imdb_movies_stream: Iterable[IMDbMovie]) -> Iterable[IMDbMovie]:
+        """
+        Skips the first `offset` movies of the stream, if the movie
+        at the offset is the `last_id` of the checkpoint.
+        """
+        if not self.offset:
+            yield from imdb_movies_stream
+            return
+        skipped = []
+        verified = False
+        for imdb_movie in imdb_movies_stream:
+            if not verified and len(skipped) < self.offset:
+                skipped.append(imdb_movie)
+                continue
+            if not verified:
+                yield from self.verify(skipped)
+                verified = True
+            yield imdb_movie
+        if not verified:
+            yield from self.verify(skipped)
+
+    def verify(self, skipped):
+        if skipped and skipped[-1].get_id() == self.last_id:
+            return []
+        print(f'Checkpoint, stream of {self.partition} changed, not skipping')
+        self.offset = 0
+        return skipped
+
+    def track(self, imdb_movies_stream: Iterable[IMDbMovie], budget: TimeBudget) -> Iterable[IMDbMovie]:
+        """
+        Counts the movies taken from the stream, and stops taking
+        them once the time budget is running out.
+        """
+        for imdb_movie in imdb_movies_stream:
+            if budget.is_running_out():
+                self.interrupted = True
+                print(f'Checkpoint, out of time at {self.offset} movies of {self.partition}')
+                return
+            self.offset += 1
+            self.last_id = imdb_movie.get_id()
+            yield imdb_movie
+
+    def get_segment_id(self, date_tag: int) -> str:
+        """
+        Names the segment of the partition a run covers, the same for
+        every attempt at it: the day, the shard, the kind of run (whole
+        partition, delta, or refresh of given ids) and the offset it
+        resumes from, read before tracking. Batched objects named after
+        it are overwritten by a redelivery of the same message rather
+        than duplicated, while continuations write their own.
+        """
+        partition = self.partition
+        parts = [str(date_tag)]
+        if partition.shards:
+            parts.append(f'shard{partition.shard}of{partition.shards}')
+        if partition.refresh:
+            ids = partition.ids_url or ','.join(partition.ids or [])
+            parts.append(f'refresh{zlib.crc32(ids.encode("utf-8")):08x}')
+        elif partition.delta:
+            parts.append('delta')
+        parts.append(f'from{self.offset}')
+        return '-'.join(parts)
+
+    def save(self):
+        self.file.write({'offset': self.offset, 'last_id': self.last_id})
+
+    def clear(self):
+        self.file.delete()
@@ -0,0 +1,65 @@
+from typing import Iterable, List
+
+from .imdb_movie import IMDbMovie
+from .partition import Partition
+from .file_s3 import FileS3
+
+
+class PartitionIdList:
+    ID_LIST_URL = 's3://{bucket_name}/tmdb/id-lists/{run_tag}/{partition_key}.json'
+
+    """
+    The exact IMDb ids of a partition, as computed by the launcher in
+    its single pass over the IMDb dataset, so that workers go straight
+    to TMDb without scanning the dataset. Small lists travel inline in
+    the message (`ids`); larger ones are written to an id-list object,
+    and the message only points to it (`ids_url`), keeping messages
+    well under the SQS size limit. Id lists are kept under the
+    `run_tag` of the run that wrote them (a launch's date tag, or a
+    refresh run), so that runs do not overwrite each other's lists.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            run_tag: str,
+            max_inline: int = 100,
+            **kwargs):
+        self.bucket_name = bucket_name
+        self.run_tag = run_tag
+        self.max_inline = max_inline
+
+    def attach(self, partition: Partition, imdb_ids: List[str], writer) -> Partition:
+        """
+        Attaches the ids to the partition, inline or, when too many,
+        as an id-list object written through the `writer` (S3Writer),
+        if any (none on dry runs).
+        """
+        if len(imdb_ids) <= self.max_inline:
+            partition.ids = list(imdb_ids)
+        else:
+            partition.ids = None
+            partition.ids_url = self.get_url(partition)
+            if writer is not None:
+                writer.write(partition.ids_url, {'imdb_ids': list(imdb_ids)})
+        return partition
+
+    def get_url(self, partition: Partition) -> str:
+        return PartitionIdList.ID_LIST_URL.format(
+            bucket_name=self.bucket_name,
+            run_tag=self.run_tag,
+            partition_key=partition.get_key())
+
+    @staticmethod
+    def stream(partition: Partition) -> Iterable[IMDbMovie]:
+        """
+        The movies of the partition, from the ids of its message.
+        """
+        imdb_ids = partition.ids
+        if imdb_ids is None:
+            id_list = FileS3(partition.ids_url).read()
+            if id_list is None:
+                raise ValueError(f'[PartitionIdList] missing {partition.ids_url}')
+            imdb_ids = id_list['imdb_ids']
+        for imdb_id in imdb_ids:
+            yield IMDbMovie.from_fields(imdb_id, 'movie', None, partition.year, partition.initial)
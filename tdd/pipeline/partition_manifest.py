@@ -0,0 +1,108 @@
+from typing import Dict, Iterable
+
+import threading
+
+from .imdb_movie import IMDbMovie
+from .partition import Partition
+from .file_s3 import FileS3
+
+
+class PartitionManifest:
+    MANIFEST_URL = 's3://{bucket_name}/tmdb/manifests/{partition_key}.json'
+
+    """
+    Keeps track of the movies of a partition already persisted to the
+    datalake (IMDb id to TMDb id), in a single object per partition,
+    so that a redelivered partition can skip, with one read, every
+    movie that is already there.
+
+    Ids must only be added once their documents are persisted, and
+    the manifest is only flushed after the uploads it lists are done.
+    The manifest is written whole, so it is always loaded before its
+    first flush, keeping the movies persisted by earlier runs.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            partition: Partition,
+            flush_every: int = 100,
+            **kwargs):
+        self.partition = partition
+        self.flush_every = flush_every
+        self.file = FileS3(PartitionManifest.MANIFEST_URL.format(
+            bucket_name=bucket_name,
+            partition_key=partition.get_key()))
+        # the manifest of the partition before it was split into shards
+        self.unsharded_file = None
+        if partition.shards:
+            self.unsharded_file = FileS3(PartitionManifest.MANIFEST_URL.format(
+                bucket_name=bucket_name,
+                partition_key=Partition(partition.year, partition.initial).get_key()))
+        self.lock = threading.Lock()
+        self.imdb_ids = {}
+        self.pending = 0
+        self.loaded = False
+
+    def load(self) -> 'PartitionManifest':
+        """
+        Reads the manifest persisted so far, if any.
+        """
+        doc = self.file.read() or {}
+        imdb_ids = self.read_unsharded()
+        imdb_ids.update(doc.get('imdb_ids', {}))
+        with self.lock:
+            imdb_ids.update(self.imdb_ids)
+            self.imdb_ids = imdb_ids
+            self.loaded = True
+        print(f'Manifest, {len(self.imdb_ids)} movies already in {self.partition}')
+        return self
+
+    def read_unsharded(self) -> Dict[str, int]:
+        """
+        The movies of the shard in the manifest of the whole partition,
+        written by the runs before the partition was sharded.
+        """
+        if self.unsharded_file is None:
+            return {}
+        doc = self.unsharded_file.read() or {}
+        return {
+            imdb_id: tmdb_id for imdb_id, tmdb_id in doc.get('imdb_ids', {}).items()
+            if Partition.get_shard_of(imdb_id, self.partition.shards) == self.partition.shard}
+
+    def has(self, imdb_id: str) -> bool:
+        return imdb_id in self.imdb_ids
+
+    def add(self, imdb_id: str, tmdb_id: int) -> bool:
+        """
+        Records a persisted movie, telling whether it is time to flush.
+        """
+        with self.lock:
+            self.imdb_ids[imdb_id] = tmdb_id
+            self.pending += 1
+            return self.pending >= self.flush_every
+
+    def flush(self):
+        """
+        Persists the manifest, when it has changed.
+        """
+        if not self.loaded:
+            self.load()
+        with self.lock:
+            if not self.pending:
+                return
+            doc = {'imdb_ids': dict(sorted(self.imdb_ids.items()))}
+            self.pending = 0
+        self.file.write(doc)
+
+    def filter(self, imdb_movies_stream: Iterable[IMDbMovie]) -> Iterable[IMDbMovie]:
+        """
+        Leaves out of the stream every movie already persisted.
+        """
+        skipped = 0
+        for imdb_movie in imdb_movies_stream:
+            if self.has(imdb_movie.get_id()):
+                skipped += 1
+            else:
+                yield imdb_movie
+        print(f'Manifest, skipped {skipped} movies already in {self.partition}')
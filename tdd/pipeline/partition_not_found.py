@@ -0,0 +1,74 @@
+from typing import Dict
+
+import time
+import threading
+
+from .partition import Partition
+from .file_s3 import FileS3
+
+
+class PartitionNotFound:
+    NOT_FOUND_URL = 's3://{bucket_name}/tmdb/not-found/{partition_key}.json'
+    SECONDS_PER_DAY = 24 * 60 * 60
+
+    """
+    Remembers the IMDb ids of a partition that TMDb does not know,
+    with the day they were last looked up, in a single object per
+    partition, so that re-runs and redeliveries do not spend their
+    request budget finding them again. After `ttl_days`, an id is
+    looked up again, since TMDb may have added the movie meanwhile.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            partition: Partition,
+            ttl_days: int = 30,
+            clock=time.time,
+            **kwargs):
+        self.partition = partition
+        self.ttl_days = ttl_days
+        self.clock = clock
+        self.file = FileS3(PartitionNotFound.NOT_FOUND_URL.format(
+            bucket_name=bucket_name,
+            partition_key=partition.get_key()))
+        self.lock = threading.Lock()
+        self.imdb_ids = {}
+        self.pending = 0
+
+    def load(self) -> 'PartitionNotFound':
+        """
+        Reads the ids not found so far, leaving the expired ones out.
+        """
+        doc = self.file.read() or {}
+        today = self.get_day()
+        with self.lock:
+            for imdb_id, day in doc.get('imdb_ids', {}).items():
+                if today - day < self.ttl_days:
+                    self.imdb_ids[imdb_id] = day
+            expired = len(doc.get('imdb_ids', {})) - len(self.imdb_ids)
+            self.pending += expired
+        print(f'NotFound, {len(self.imdb_ids)} movies not in TMDb for {self.partition}')
+        return self
+
+    def has(self, imdb_id: str) -> bool:
+        return imdb_id in self.imdb_ids
+
+    def add(self, imdb_id: str):
+        with self.lock:
+            self.imdb_ids[imdb_id] = self.get_day()
+            self.pending += 1
+
+    def flush(self):
+        """
+        Persists the ids not found, when they have changed.
+        """
+        with self.lock:
+            if not self.pending:
+                return
+            doc = {'imdb_ids': dict(sorted(self.imdb_ids.items()))}
+            self.pending = 0
+        self.file.write(doc)
+
+    def get_day(self) -> int:
+        return int(self.clock() // PartitionNotFound.SECONDS_PER_DAY)
@@ -0,0 +1,77 @@
+from typing import Dict, List, Tuple
+
+import math
+
+from .partition import Partition
+
+
+class PartitionPlanner:
+    """
+    Plans the messages of the fleet from the number of movies of each
+    (year, initial) partition, so that invocations cost about the same:
+    partitions with more than `max_movies` are split into shards of up
+    to `max_movies`, while those with fewer than `min_movies` are packed
+    together into messages of up to `max_movies` (and `max_pack`
+    partitions). Messages are planned largest first, so that the longest
+    invocations start early and do not hold the completion of the fleet.
+    """
+
+    def __init__(
+            self,
+            max_movies: int = 500,
+            min_movies: int = 50,
+            max_pack: int = 100,
+            **kwargs):
+        self.max_movies = max(1, max_movies)
+        self.min_movies = min(min_movies, self.max_movies)
+        self.max_pack = max(1, max_pack)
+
+    def plan(
+            self,
+            counts: Dict[Tuple[int, str], int],
+            pinned: Dict[Tuple[int, str], int] = None,
+            **kwargs) -> List[List[Partition]]:
+        """
+        Returns the partitions of each message, the most costly message
+        first. Partitions `pinned` to a number of shards (see
+        `PartitionShards`) keep it, whatever their count now; only
+        counts above 1 pin, so unsharded partitions may still split. Extra
+        `kwargs` (e.g. `skip_existing`) go to every partition.
+        """
+        pinned = pinned or {}
+        planned = []
+        small = []
+        for (year, initial), count in counts.items():
+            shards = pinned.get((year, initial), 1)
+            if shards <= 1:
+                shards = self.get_shards(count)
+            if shards > 1:
+                for shard in range(shards):
+                    partition = Partition(year, initial, shard=shard, shards=shards, **kwargs)
+                    planned.append((count / shards, [partition]))
+            elif count < self.min_movies:
+                small.append((count, Partition(year, initial, **kwargs)))
+            else:
+                planned.append((count, [Partition(year, initial, **kwargs)]))
+        planned.extend(self.pack(small))
+        planned.sort(key=lambda item: item[0], reverse=True)
+        return [partitions for _, partitions in planned]
+
+    def get_shards(self, count: int) -> int:
+        return max(1, int(math.ceil(count / self.max_movies)))
+
+    def pack(self, small: List[Tuple[int, Partition]]) -> List[Tuple[int, List[Partition]]]:
+        """
+        First-fit decreasing: each small partition goes into the first
+        pack with room left for it, or starts a new pack.
+        """
+        packs = []
+        for count, partition in sorted(small, key=lambda item: item[0], reverse=True):
+            for pack in packs:
+                if pack[0] + count <= self.max_movies and len(pack[1]) < self.max_pack:
+                    pack[0] += count
+                    pack[1].append(partition)
+                    break
+            else:
+                packs.append([count, [partition]])
+        return [(count, partitions) for count, partitions in packs]
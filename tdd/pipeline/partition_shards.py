@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, Tuple
+
+from .partition import Partition
+from .file_s3 import FileS3
+
+
+class PartitionShards:
+    SHARDS_URL = 's3://{bucket_name}/tmdb/plans/shards.json'
+
+    """
+    The number of shards each (year, initial) partition was first
+    planned with, kept in the datalake. The manifest, checkpoint and
+    not-found objects of a sharded partition are keyed by its shard,
+    so a partition keeps its shard count across launches, even when
+    its movie count or `max_movies` change, rather than missing the
+    objects of the earlier launches. Only sharded partitions are
+    pinned: an unsharded one may still be split once it grows, since
+    its shards read the unsharded manifest it leaves behind.
+    """
+
+    def __init__(self, bucket_name: str, s3=None, **kwargs):
+        self.file = FileS3(PartitionShards.SHARDS_URL.format(bucket_name=bucket_name), s3=s3)
+        self.shards = {}
+        self.pending = 0
+
+    def load(self) -> 'PartitionShards':
+        doc = self.file.read() or {}
+        self.shards.update(doc.get('partitions', {}))
+        return self
+
+    def get_pinned(self) -> Dict[Tuple[int, str], int]:
+        """
+        The shard count of each partition sharded before.
+        """
+        pinned = {}
+        for key, shards in self.shards.items():
+            if shards > 1:
+                year, initial = PartitionShards.parse_key(key)
+                pinned[(year, initial)] = shards
+        return pinned
+
+    def get(self, year: int, initial: str) -> int:
+        return self.shards.get(PartitionShards.get_key(year, initial), 1)
+
+    def pin(self, partitions: Iterable[Partition]):
+        """
+        Records the shard count of the partitions sharded for the
+        first time, leaving unsharded partitions free to split later.
+        """
+        for partition in partitions:
+            if not partition.shards or partition.shards <= 1:
+                continue
+            key = PartitionShards.get_key(partition.year, partition.initial)
+            if self.shards.get(key, 1) <= 1:
+                self.shards[key] = partition.shards
+                self.pending += 1
+
+    def save(self):
+        if self.pending:
+            self.file.write({'partitions': dict(sorted(self.shards.items()))})
+            self.pending = 0
+
+    @staticmethod
+    def get_key(year: int, initial: str) -> str:
+        return Partition(year, initial).get_key()
+
+    @staticmethod
+    def parse_key(key: str) -> Tuple[int, str]:
+        year, initial = key.split('/', 1)
+        return int(year[len('year-'):]), initial[len('initial-'):]
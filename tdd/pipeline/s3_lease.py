@@ -0,0 +1,63 @@
+import time
+import uuid
+
+from .file_s3 import FileS3
+
+
+class S3Lease:
+    """
+    Best-effort lease between workers through a small lease object in
+    S3, holding its `owner` and when it `expires_at`, so that usually a
+    single worker does an expensive piece of work while the others wait.
+
+    It is NOT mutual exclusion: S3 PUTs are last-writer-wins, and the
+    conditional PUT (`IfNoneMatch`) needs a boto3 newer than the
+    python3.6 runtime can run. Acquiring writes our lease when there
+    is no live lease of someone else, waits `settle` seconds for any
+    concurrent writer to land, and reads it back; a contender whose
+    write lands after our read-back also believes it holds the lease.
+    The work it guards must therefore be idempotent, the lease only
+    sparing duplicate work in the common case. A holder that dies is
+    taken over once its lease expires, after `ttl` seconds.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            ttl: float = 900,
+            settle: float = 1.0,
+            owner: str = None,
+            sleep=time.sleep,
+            clock=time.time,
+            **kwargs):
+        self.file = FileS3(url)
+        self.ttl = ttl
+        self.settle = settle
+        self.owner = owner or uuid.uuid4().hex
+        self.sleep = sleep
+        self.clock = clock
+
+    def acquire(self) -> bool:
+        """
+        Attempts to take the lease, telling whether we (most likely)
+        hold it; in a race, two contenders may both be told so.
+        """
+        if self.is_held_by_other(self.file.read()):
+            return False
+        self.file.write({'owner': self.owner, 'expires_at': self.clock() + self.ttl})
+        self.sleep(self.settle)
+        lease = self.file.read()
+        return bool(lease) and lease.get('owner') == self.owner
+
+    def release(self):
+        """
+        Drops the lease, if we still hold it.
+        """
+        lease = self.file.read()
+        if lease and lease.get('owner') == self.owner:
+            self.file.delete()
+
+    def is_held_by_other(self, lease) -> bool:
+        return bool(lease) \
+            and lease.get('owner') != self.owner \
+            and lease.get('expires_at', 0) > self.clock()
@@ -0,0 +1,136 @@
+from typing import Dict, List
+
+import json
+import zlib
+import threading
+from urllib.parse import urlparse
+
+from .s3_pool import S3Pool
+from .metrics import Metrics
+
+
+class S3NdJsonWriter:
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    """
+    Streams JSON documents into gzipped NDJSON objects in S3, through
+    multipart uploads, so that a whole partition ends up in a few
+    objects while only one part (`part_size` bytes, compressed) is
+    ever held in memory. Once an object reaches `max_object_size`
+    (compressed), the next documents go to a new object, named after
+    the `url_tmpl` with the following `{part}` number.
+    """
+
+    def __init__(
+            self,
+            url_tmpl: str,
+            s3=None,
+            part_size: int = 8 * 1024 * 1024,
+            max_object_size: int = 1024 * 1024 * 1024,
+            metrics: Metrics = None,
+            **kwargs):
+        self.url_tmpl = url_tmpl
+        self.s3 = s3 or S3Pool.shared().get_client()
+        self.part_size = max(part_size, S3NdJsonWriter.MIN_PART_SIZE)
+        self.max_object_size = max_object_size
+        self.metrics = metrics or Metrics()
+        self.lock = threading.Lock()
+        self.urls = []
+        self.count = 0
+        self.upload = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, json_data: Dict):
+        """
+        Appends the document as one line of the current object.
+        """
+        line = (json.dumps(json_data) + '\n').encode('utf-8')
+        with self.lock:
+            if self.upload is None:
+                self.start()
+            self.buffer += self.compressor.compress(line)
+            self.count += 1
+            if len(self.buffer) >= self.part_size:
+                self.upload_part()
+                if self.object_size >= self.max_object_size:
+                    self.complete()
+
+    def close(self) -> List[str]:
+        """
+        Completes the current object, returning the urls of all
+        the objects written.
+        """
+        with self.lock:
+            if self.upload is not None:
+                self.complete()
+            return list(self.urls)
+
+    def abort(self):
+        """
+        Drops the object in progress; the completed ones remain.
+        """
+        with self.lock:
+            if self.upload is not None:
+                self.s3.abort_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.object_key,
+                    UploadId=self.upload)
+                self.upload = None
+
+    def start(self):
+        url = self.url_tmpl.format(part=f'{len(self.urls):04d}')
+        parsed = urlparse(url)
+        assert parsed.scheme == 's3'
+        self.url = url
+        self.bucket_name = parsed.hostname
+        self.object_key = parsed.path[1:]
+        self.upload = self.s3.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.object_key,
+            ContentType='application/x-ndjson',
+            ContentEncoding='gzip')['UploadId']
+        self.compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        self.buffer = bytearray()
+        self.parts = []
+        self.object_size = 0
+
+    def upload_part(self):
+        number = len(self.parts) + 1
+        with self.metrics.timer('s3_put_ms'):
+            res = self.s3.upload_part(
+                Bucket=self.bucket_name,
+                Key=self.object_key,
+                UploadId=self.upload,
+                PartNumber=number,
+                Body=bytes(self.buffer))
+        self.metrics.count('s3_put_bytes', len(self.buffer))
+        self.parts.append({'ETag': res['ETag'], 'PartNumber': number})
+        self.object_size += len(self.buffer)
+        self.buffer = bytearray()
+
+    def complete(self):
+        try:
+            self.buffer += self.compressor.flush()
+            self.upload_part()
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.object_key,
+                UploadId=self.upload,
+                MultipartUpload={'Parts': self.parts})
+        except Exception:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.object_key,
+                UploadId=self.upload)
+            self.upload = None
+            raise
+        self.upload = None
+        self.urls.append(self.url)
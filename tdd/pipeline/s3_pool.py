@@ -0,0 +1,67 @@
+from typing import Dict
+
+import threading
+import boto3
+from botocore.config import Config as BotoConfig
+
+
+class S3Pool:
+    """
+    Process-wide S3 client, built once from a single boto3 session
+    and shared by every FileS3 and every thread (boto3 clients are
+    thread-safe, sessions are not). `max_connections` sizes the
+    urllib3 connection pool of the client for concurrent writers.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+            self,
+            max_connections: int = 32,
+            **kwargs):
+        self.max_connections = max_connections
+        self.lock = threading.Lock()
+        self.session = None
+        self.client = None
+        self.counters = {'created': 0, 'reused': 0}
+
+    @staticmethod
+    def shared(**kwargs) -> 'S3Pool':
+        """
+        Returns the process-wide pool, creating it on first use.
+        Later calls with other settings than `kwargs` keep the pool
+        (its client is in use) and log the settings ignored.
+        """
+        with S3Pool._shared_lock:
+            if S3Pool._shared is None:
+                S3Pool._shared = S3Pool(**kwargs)
+                return S3Pool._shared
+            shared = S3Pool._shared
+        settings = shared.get_settings()
+        mismatched = sorted(k for k, v in kwargs.items() if k in settings and settings[k] != v)
+        if mismatched:
+            print(f'S3Pool, shared pool kept, ignoring other {", ".join(mismatched)}')
+        return shared
+
+    def get_settings(self) -> Dict:
+        return {'max_connections': self.max_connections}
+
+    def get_client(self):
+        """
+        Returns the shared S3 client, creating it on first use.
+        """
+        with self.lock:
+            if self.client is None:
+                self.session = boto3.session.Session()
+                self.client = self.session.client(
+                    's3',
+                    config=BotoConfig(max_pool_connections=self.max_connections))
+                self.counters['created'] += 1
+            else:
+                self.counters['reused'] += 1
+            return self.client
+
+    def get_counters(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counters)
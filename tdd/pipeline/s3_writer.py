@@ -0,0 +1,124 @@
+from typing import Dict, List, Tuple
+
+import queue
+import threading
+
+from .file_s3 import FileS3
+from .metrics import Metrics
+
+
+class S3WriterError(Exception):
+    """
+    Raised when any of the documents handed to the S3Writer
+    could not be uploaded.
+    """
+
+
+class S3Writer:
+    """
+    Background stage uploading JSON documents (or raw bytes) to S3, so that the
+    pipeline keeps downloading from TMDb while previous documents
+    are persisted. Documents wait in a bounded queue (blocking the
+    producer when full) and are uploaded by `max_workers` threads.
+
+    Must be closed (or used as a context manager) before the partition
+    is considered done: closing waits for every upload to finish and
+    raises S3WriterError if any of them failed.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = 8,
+            max_queued: int = 100,
+            metrics: Metrics = None,
+            **kwargs):
+        self.metrics = metrics or Metrics()
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.lock = threading.Lock()
+        self.errors = []
+        self.written = 0
+        self.closed = False
+        self.threads = [
+            threading.Thread(target=self.work, daemon=True)
+            for _ in range(max(1, max_workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.close(raise_errors=False)
+
+    def write(self, url: str, json_data: Dict):
+        """
+        Queues the document for upload, blocking while the queue is full.
+        """
+        assert not self.closed, 'S3Writer already closed'
+        self.raise_errors()
+        self.queue.put((url, json_data))
+
+    def write_bytes(self, url: str, data: bytes):
+        """
+        Queues raw bytes for upload, as they are, blocking while the
+        queue is full.
+        """
+        self.write(url, data)
+
+    def flush(self):
+        """
+        Waits for every queued document to be uploaded.
+        """
+        self.queue.join()
+        self.raise_errors()
+
+    def close(self, raise_errors: bool = True):
+        """
+        Waits for every queued document to be uploaded, and stops
+        the upload workers.
+        """
+        if not self.closed:
+            self.closed = True
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+        if raise_errors:
+            self.raise_errors()
+
+    def raise_errors(self):
+        with self.lock:
+            errors = list(self.errors)
+        if errors:
+            url, error = errors[0]
+            msg = f'[S3] {len(errors)} uploads failed, first {url}: {error}'
+            raise S3WriterError(msg) from error
+
+    def put(self, url: str, json_data: Dict) -> int:
+        if isinstance(json_data, bytes):
+            FileS3(url).write_bytes(json_data)
+            return len(json_data)
+        return FileS3(url).write(json_data)
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                url, json_data = item
+                try:
+                    with self.metrics.timer('s3_put_ms'):
+                        size = self.put(url, json_data)
+                    if size:
+                        self.metrics.count('s3_put_bytes', size)
+                    with self.lock:
+                        self.written += 1
+                except Exception as e:
+                    with self.lock:
+                        self.errors.append((url, e))
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,20 @@
+class TimeBudget:
+    """
+    Watches the time left to the lambda invocation, telling when
+    it is time to stop taking new work, leaving `reserve_ms` to
+    finish the work in flight and persist a checkpoint.
+    Without a lambda context (e.g. running locally), never runs out.
+    """
+
+    def __init__(self, context, reserve_ms: int = 120000, **kwargs):
+        self.context = context
+        self.reserve_ms = reserve_ms
+
+    def get_remaining_ms(self):
+        if self.context is None or not hasattr(self.context, 'get_remaining_time_in_millis'):
+            return None
+        return self.context.get_remaining_time_in_millis()
+
+    def is_running_out(self) -> bool:
+        remaining_ms = self.get_remaining_ms()
+        return remaining_ms is not None and remaining_ms < self.reserve_ms
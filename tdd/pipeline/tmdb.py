@@ -1,7 +1,12 @@
-from typing import Iterable, Tuple, List
+from typing import Iterable, Tuple, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from .imdb_movie import IMDbMovie
 from .tmdb_movie import TMDbMovie
 from .tmdb_reviews import TMDbReviews
+from .tmdb_client import TMDbClient
+from .metrics import Metrics
+from .partition_not_found import PartitionNotFound
 
 
 class TMDb:
@@ -14,45 +19,143 @@ class TMDb:
             self,
             bucket_name: str,
             api_key: str,
+            max_workers: int = 1,
+            preserve_order: bool = False,
+            max_page_workers: int = 4,
+            client: TMDbClient = None,
+            fetch_mode: str = 'find',
+            movie_document: str = 'find',
             **kwargs):
         self.bucket_name = bucket_name
+        self.fetch_mode = fetch_mode
+        self.movie_document = movie_document
         self.api_key = api_key
+        self.max_workers = max_workers
+        self.preserve_order = preserve_order
+        self.max_page_workers = max_page_workers
+        self.client = client or TMDbClient.shared()
 
     def get_movies_related_to(
             self,
-            imdb_movies_stream: Iterable[IMDbMovie]) -> Iterable[Tuple[TMDbMovie, TMDbReviews]]:
+            imdb_movies_stream: Iterable[IMDbMovie],
+            metrics: Metrics = None,
+            not_found: PartitionNotFound = None,
+            refresh: bool = False) -> Iterable[Tuple[TMDbMovie, TMDbReviews]]:
         """
         Iterates through the stream, requesting the TMDb Movie
         and all its pages of reviews, and yields both the movie
-        and the reviews, so that they can be persisted
+        and the reviews, so that they can be persisted.
+        With more than one worker, several movies are requested
+        concurrently, and the pairs may come back out of order
+        unless `preserve_order` is set.
+        Movies known `not_found` in TMDb are not requested again,
+        and those found missing are added to it.
+        With `refresh`, responses are requested even if in the cache.
         """
-        processed = 0
+        metrics = metrics or Metrics()
+        if not_found is not None:
+            imdb_movies_stream = self.skip_not_found(imdb_movies_stream, metrics, not_found)
+        if self.max_workers > 1:
+            yield from self.get_movies_concurrently(imdb_movies_stream, metrics, not_found, refresh)
+            return
+
         for imdb_movie in imdb_movies_stream:
 
             # attempt find in TMDb
-            tmdb_movie = self.get_movie_by(imdb_movie=imdb_movie)
-            if tmdb_movie.has_been_found():
-                tmdb_movie_reviews = self.get_reviews_by(imdb_movie=imdb_movie, tmdb_movie=tmdb_movie)
-                yield tmdb_movie, tmdb_movie_reviews
-            
-            # log review progress
-            processed += 1
-            print(f'[TMDb] processed {processed}')
-
-        print(f'[TMDb] total {processed}')
-
-    def get_movie_by(self, imdb_movie):
+            movie_and_reviews = self.fetch_movie_and_reviews(imdb_movie, metrics, not_found, refresh)
+            if movie_and_reviews:
+                yield movie_and_reviews
+
+    def get_movies_concurrently(
+            self,
+            imdb_movies_stream: Iterable[IMDbMovie],
+            metrics: Metrics,
+            not_found: PartitionNotFound = None,
+            refresh: bool = False) -> Iterable[Tuple[TMDbMovie, TMDbReviews]]:
+        """
+        Keeps up to twice `max_workers` movies in flight, and only pulls
+        the next movie from the stream once a slot frees up, so that the
+        stream is never read ahead of what the workers can handle.
+        """
+        max_in_flight = self.max_workers * 2
+        in_flight = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            imdb_movies_iterator = iter(imdb_movies_stream)
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    imdb_movie = next(imdb_movies_iterator, None)
+                    if imdb_movie is None:
+                        exhausted = True
+                    else:
+                        in_flight.append(executor.submit(self.fetch_movie_and_reviews, imdb_movie, metrics, not_found, refresh))
+                if not in_flight:
+                    break
+                if self.preserve_order:
+                    done = [in_flight.popleft()]
+                else:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.remove(future)
+                for future in done:
+                    movie_and_reviews = future.result()
+                    if movie_and_reviews:
+                        yield movie_and_reviews
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def skip_not_found(self, imdb_movies_stream: Iterable[IMDbMovie], metrics: Metrics, not_found: PartitionNotFound) -> Iterable[IMDbMovie]:
+        for imdb_movie in imdb_movies_stream:
+            if not_found.has(imdb_movie.get_id()):
+                metrics.count('tmdb_movies_skipped_not_found')
+            else:
+                yield imdb_movie
+
+    def fetch_movie_and_reviews(self, imdb_movie: IMDbMovie, metrics: Metrics = None, not_found: PartitionNotFound = None, refresh: bool = False) -> Optional[Tuple[TMDbMovie, TMDbReviews]]:
+        """
+        Requests the movie and, if found, all its reviews, returning
+        both with their documents already cached; or None otherwise.
+        """
+        metrics = metrics or Metrics()
+        metrics.count('tmdb_movies_requested')
+        tmdb_movie = self.get_movie_by(imdb_movie=imdb_movie, refresh=refresh)
+        with metrics.timer('tmdb_find_ms'):
+            found = tmdb_movie.has_been_found()
+        if not found:
+            metrics.count('tmdb_movies_not_found')
+            if not_found is not None:
+                not_found.add(imdb_movie.get_id())
+            return None
+        tmdb_movie_reviews = self.get_reviews_by(imdb_movie=imdb_movie, tmdb_movie=tmdb_movie, refresh=refresh)
+        with metrics.timer('tmdb_reviews_ms'):
+            tmdb_movie_reviews.ensure_cache()
+        metrics.observe('tmdb_review_pages', tmdb_movie_reviews.pages)
+        metrics.count('tmdb_reviews', len(tmdb_movie_reviews.docs))
+        return tmdb_movie, tmdb_movie_reviews
+
+    def get_movie_by(self, imdb_movie, refresh: bool = False):
         return TMDbMovie(
             year=imdb_movie.year,
             initial=imdb_movie.initial,
             imdb_id=imdb_movie.get_id(),
             bucket_name=self.bucket_name,
-            api_key=self.api_key)
+            api_key=self.api_key,
+            client=self.client,
+            fetch_mode=self.fetch_mode,
+            document=self.movie_document,
+            refresh=refresh)
 
-    def get_reviews_by(self, imdb_movie, tmdb_movie):
+    def get_reviews_by(self, imdb_movie, tmdb_movie, refresh: bool = False):
         return TMDbReviews(
             year=imdb_movie.year,
             initial=imdb_movie.initial,
             movie_id=tmdb_movie.get_id(),
             bucket_name=self.bucket_name,
-            api_key=self.api_key)
+            api_key=self.api_key,
+            max_page_workers=self.max_page_workers,
+            client=self.client,
+            first_page=tmdb_movie.reviews_page,
+            refresh=refresh)
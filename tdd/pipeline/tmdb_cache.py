@@ -0,0 +1,211 @@
+from typing import Dict, Optional
+
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, urlencode, parse_qsl, urlunparse
+
+from .file_s3 import FileS3
+
+
+class TMDbCacheMiss(Exception):
+    """
+    Raised, in offline mode, for a request not in the cache.
+    """
+
+
+class TMDbDiskCache:
+    """
+    Keeps the responses as files in a local `folder`, evicting the
+    least recently written ones once they take over `max_bytes`.
+    """
+
+    def __init__(
+            self,
+            folder: str = '/tmp/tmdb-cache',
+            max_bytes: int = 512 * 1024 * 1024,
+            **kwargs):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.size = None
+
+    def read(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self.get_path(key), 'rb') as f_in:
+                return json.loads(f_in.read().decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def write(self, key: str, entry: Dict):
+        data = json.dumps(entry).encode('utf-8')
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{threading.get_ident()}.part'
+        with open(temp_path, 'wb') as f_out:
+            f_out.write(data)
+        with self.lock:
+            replaced = os.path.getsize(path) if os.path.isfile(path) else 0
+            os.replace(temp_path, path)
+            if self.size is None:
+                self.size = sum(os.path.getsize(p) for p, _ in self.list_files())
+            else:
+                self.size += len(data) - replaced
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """
+        Removes the oldest files until the cache is down to 90% of
+        `max_bytes`, so that eviction does not run on every write.
+        """
+        files = sorted(self.list_files(), key=lambda item: item[1])
+        for path, _ in files:
+            if self.size <= self.max_bytes * 0.9:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self.size -= size
+            except OSError:
+                pass
+
+    def get_settings(self) -> Dict:
+        return {'folder': self.folder, 'max_bytes': self.max_bytes}
+
+    def list_files(self):
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    yield path, os.path.getmtime(path)
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f'{key}.json')
+
+
+class TMDbS3Cache:
+    """
+    Keeps the responses as objects under the `url` prefix in S3,
+    shared by every lambda and by local runs. Size is left to an S3
+    lifecycle rule on the prefix; the TTL is enforced when reading.
+    """
+
+    def __init__(self, url: str, s3=None, **kwargs):
+        self.url = url.rstrip('/')
+        self.s3 = s3
+
+    def read(self, key: str) -> Optional[Dict]:
+        return self.get_file(key).read()
+
+    def write(self, key: str, entry: Dict):
+        self.get_file(key).write(entry)
+
+    def get_settings(self) -> Dict:
+        return {'url': self.url}
+
+    def get_file(self, key: str) -> FileS3:
+        return FileS3(f'{self.url}/{key[:2]}/{key}.json', s3=self.s3)
+
+
+class TMDbCache:
+    MODES = ('off', 'read-through', 'refresh', 'offline')
+    SECRET_PARAMS = ('api_key',)
+    NOT_FOUND_TTL = 24 * 60 * 60
+
+    """
+    Content-addressed cache of TMDb responses, keyed by the request url
+    without its api_key, so that dev runs and re-processing of
+    historical partitions read the cache instead of spending API quota.
+
+    - read-through: answers from the cache, requesting and caching misses
+    - refresh     : always requests, and caches the fresh response
+    - offline     : answers from the cache only, raising TMDbCacheMiss
+
+    Entries older than `ttl` seconds count as misses (0 never expires).
+    Answers of movies not found (an empty `find`) expire sooner, after
+    `not_found_ttl`, so that movies TMDb adds later are found, and the
+    not-found re-checks of `PartitionNotFound` do reach TMDb.
+    """
+
+    def __init__(
+            self,
+            backend,
+            mode: str = 'read-through',
+            ttl: float = 0,
+            not_found_ttl: float = NOT_FOUND_TTL,
+            clock=time.time,
+            **kwargs):
+        assert mode in TMDbCache.MODES, f'unknown cache mode {mode}'
+        self.backend = backend
+        self.mode = mode
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.clock = clock
+
+    def get_settings(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'ttl': self.ttl,
+            'not_found_ttl': self.not_found_ttl,
+            **self.backend.get_settings()}
+
+    @staticmethod
+    def from_url(url: str, **kwargs) -> 'TMDbCache':
+        """
+        The cache on the S3 backend for `s3://` urls, or else on the
+        disk backend, in the folder `url`.
+        """
+        if url.startswith('s3://'):
+            return TMDbCache(TMDbS3Cache(url), **kwargs)
+        return TMDbCache(TMDbDiskCache(folder=url, **kwargs), **kwargs)
+
+    def get(self, url: str, refresh: bool = False) -> Optional[Dict]:
+        """
+        The cached response to the url, or None when it must be requested,
+        as always in refresh mode, or for a `refresh` (but when offline).
+        """
+        if self.mode == 'refresh' or (refresh and self.mode != 'offline'):
+            return None
+        key_url = TMDbCache.get_key_url(url)
+        entry = self.backend.read(TMDbCache.get_key(key_url))
+        if entry is not None and entry.get('url') == key_url and not self.is_expired(entry):
+            return entry['body']
+        if self.mode == 'offline':
+            raise TMDbCacheMiss(f'[TMDb] offline, not in cache: {key_url}')
+        return None
+
+    def put(self, url: str, body: Dict):
+        key_url = TMDbCache.get_key_url(url)
+        entry = {'url': key_url, 'cached_at': self.clock(), 'body': body}
+        if TMDbCache.is_not_found(body):
+            entry['not_found'] = True
+        self.backend.write(TMDbCache.get_key(key_url), entry)
+
+    def is_expired(self, entry: Dict) -> bool:
+        ttl = self.ttl
+        if entry.get('not_found'):
+            ttl = min(ttl, self.not_found_ttl) if ttl else self.not_found_ttl
+        return bool(ttl) and self.clock() - entry.get('cached_at', 0) > ttl
+
+    @staticmethod
+    def is_not_found(body: Dict) -> bool:
+        """
+        Tells whether the body is a `find` that found no movie.
+        """
+        return isinstance(body, dict) and 'movie_results' in body and not body['movie_results']
+
+    @staticmethod
+    def get_key_url(url: str) -> str:
+        """
+        The url without its secrets, and with its query sorted.
+        """
+        parsed = urlparse(url)
+        query = sorted((k, v) for k, v in parse_qsl(parsed.query) if k not in TMDbCache.SECRET_PARAMS)
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    @staticmethod
+    def get_key(key_url: str) -> str:
+        return hashlib.sha256(key_url.encode('utf-8')).hexdigest()
@@ -0,0 +1,164 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import re
+import datetime
+
+from .partition import Partition
+from .partition_shards import PartitionShards
+from .tmdb_movie import TMDbMovie
+from .file_s3 import FileS3
+from .s3_pool import S3Pool
+from .tmdb_client import TMDbClient
+
+
+class TMDbChanges:
+    URL_TMPL = 'https://api.themoviedb.org/3/movie/changes?api_key={api_key}&start_date={start_date}&end_date={end_date}&page={page}'
+    WATERMARK_URL = 's3://{bucket_name}/tmdb/changes/watermark.json'
+    MANIFESTS_PREFIX = 'tmdb/manifests/'
+    MOVIES_PREFIX = 'tmdb/movies/'
+    MAX_WINDOW_DAYS = 14
+
+    """
+    Reads the TMDb changes feed (the ids of the movies changed within a
+    date window) and finds, among those, the movies already in the
+    datalake, as listed by the partition manifests and the persisted
+    movies, so that a refresh re-downloads only them. The date up to
+    which the datalake is in sync with TMDb (the watermark) is kept in
+    the datalake too.
+    """
+
+    def __init__(
+            self,
+            bucket_name: str,
+            api_key: str,
+            client: TMDbClient = None,
+            s3=None,
+            shards: PartitionShards = None,
+            **kwargs):
+        self.bucket_name = bucket_name
+        self.api_key = api_key
+        self.client = client or TMDbClient.shared()
+        self.s3 = s3 or S3Pool.shared().get_client()
+        self.shards = shards or PartitionShards(bucket_name=bucket_name, s3=self.s3)
+        self.watermark_file = FileS3(TMDbChanges.WATERMARK_URL.format(bucket_name=bucket_name), s3=self.s3)
+
+    def get_watermark(self) -> Optional[datetime.date]:
+        doc = self.watermark_file.read()
+        if not doc:
+            return None
+        return datetime.datetime.strptime(doc['synced_until'], '%Y-%m-%d').date()
+
+    def save_watermark(self, synced_until: datetime.date):
+        self.watermark_file.write({'synced_until': synced_until.isoformat()})
+
+    def get_changed_ids(self, start_date: datetime.date, end_date: datetime.date) -> Set[int]:
+        """
+        Ids of the movies changed from `start_date` to `end_date`, both
+        included, reading the feed in windows of up to 14 days, the
+        most the feed accepts at once.
+        """
+        changed = set()
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(end_date, window_start + datetime.timedelta(days=TMDbChanges.MAX_WINDOW_DAYS - 1))
+            changed.update(self.get_window_ids(window_start, window_end))
+            window_start = window_end + datetime.timedelta(days=1)
+        print(f'TMDB, {len(changed)} movies changed from {start_date} to {end_date}')
+        return changed
+
+    def get_window_ids(self, start_date: datetime.date, end_date: datetime.date) -> Set[int]:
+        changed = set()
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            res = self.client.get_json(TMDbChanges.URL_TMPL.format(
+                api_key=self.api_key,
+                start_date=start_date.isoformat(),
+                end_date=end_date.isoformat(),
+                page=page))
+            changed.update(item['id'] for item in res.get('results') or [] if not item.get('adult'))
+            total_pages = int(res.get('total_pages') or 1)
+            page += 1
+        return changed
+
+    def get_known_movies(self) -> Dict[int, Tuple[Partition, Optional[str]]]:
+        """
+        The movies already in the datalake, by TMDb id: the partition
+        (or shard) whose manifest records them, and their IMDb id.
+        Movies in the `tmdb/movies/` listing but in no manifest (e.g.
+        persisted before manifests) come with their unsharded partition
+        and no IMDb id, left for `get_refresh_partitions` to resolve.
+        """
+        self.shards.load()
+        known = {}
+        for key in self.list_keys(TMDbChanges.MANIFESTS_PREFIX):
+            match = re.search(r'year-(\d+)/initial-(.+?)(?:/shard-(\d+)-of-(\d+))?\.json$', key)
+            if not match:
+                continue
+            year, initial, shard, shards = match.groups()
+            partition = Partition(year, initial, shard=shard, shards=shards)
+            manifest = FileS3(f's3://{self.bucket_name}/{key}', s3=self.s3).read() or {}
+            for imdb_id, tmdb_id in manifest.get('imdb_ids', {}).items():
+                # a shard's manifest over the one from before sharding
+                if partition.shards or tmdb_id not in known:
+                    known[tmdb_id] = (partition, imdb_id)
+        in_manifests = len(known)
+        partitions = {}
+        for key in self.list_keys(TMDbChanges.MOVIES_PREFIX):
+            match = re.search(r'year-(\d+)/initial-(.+)/tmdb-movie-(\d+)\.json$', key)
+            if not match or int(match.group(3)) in known:
+                continue
+            year, initial = int(match.group(1)), match.group(2)
+            partition = partitions.setdefault((year, initial), Partition(year, initial))
+            known[int(match.group(3))] = (partition, None)
+        print(f'TMDB, {len(known)} movies in the datalake, {len(known) - in_manifests} in no manifest')
+        return known
+
+    def get_refresh_partitions(self, changed_ids: Set[int], known: Dict[int, Tuple[Partition, Optional[str]]]) -> List[Partition]:
+        """
+        The changed movies that are in the datalake, grouped by the
+        partition (or shard) that records them, with their IMDb ids,
+        to be downloaded again. The IMDb ids not in any manifest are
+        read from the persisted movies.
+        """
+        grouped = {}
+        for tmdb_id in changed_ids:
+            if tmdb_id not in known:
+                continue
+            partition, imdb_id = known[tmdb_id]
+            if imdb_id is None:
+                partition, imdb_id = self.resolve(partition, tmdb_id)
+                if imdb_id is None:
+                    continue
+            grouped.setdefault(partition.get_key(), (partition, []))[1].append(imdb_id)
+        return [
+            Partition(
+                partition.year,
+                partition.initial,
+                shard=partition.shard,
+                shards=partition.shards,
+                ids=sorted(imdb_ids),
+                refresh=True)
+            for _, (partition, imdb_ids) in sorted(grouped.items())]
+
+    def resolve(self, partition: Partition, tmdb_id: int) -> Tuple[Partition, Optional[str]]:
+        """
+        The IMDb id of a persisted movie, and the shard it now belongs
+        to, if its partition has been sharded since.
+        """
+        doc = FileS3(TMDbMovie.S3_TMPL.format(
+            bucket_name=self.bucket_name,
+            year=partition.year,
+            initial=partition.initial,
+            tmdb_id=tmdb_id), s3=self.s3).read() or {}
+        imdb_id = doc.get('id_imdb')
+        shards = self.shards.get(partition.year, partition.initial)
+        if imdb_id and shards > 1:
+            shard = Partition.get_shard_of(imdb_id, shards)
+            partition = Partition(partition.year, partition.initial, shard=shard, shards=shards)
+        return partition, imdb_id
+
+    def list_keys(self, prefix: str) -> Iterable[str]:
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for item in page.get('Contents', []):
+                yield item['Key']
@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional
+
+import json
+import time
+import socket
+import random
+import threading
+import http.client
+import email.utils
+from urllib.error import HTTPError, URLError
+
+from .http_pool import HttpPool
+from .tmdb_cache import TMDbCache
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread making TMDb requests,
+    allowing `rate` requests per second with bursts of up to
+    `burst` requests. A `pause` (e.g. from a Retry-After) holds
+    every thread back, not only the one that was throttled.
+    """
+
+    def __init__(
+            self,
+            rate: float = 20.0,
+            burst: int = 40,
+            clock=time.monotonic,
+            sleep=time.sleep,
+            **kwargs):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.tokens = float(self.burst)
+        self.updated_at = clock()
+        self.paused_until = 0.0
+
+    def acquire(self):
+        """
+        Blocks until a token is available, and takes it.
+        """
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            self.sleep(wait_for)
+
+    def pause(self, seconds: float):
+        """
+        Stops handing out tokens for the next `seconds`.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0.0
+
+
+class TMDbClient:
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    RETRY_ERRORS = (URLError, socket.timeout, http.client.HTTPException, ConnectionError)
+
+    """
+    The single way out to the TMDb API: paces every request through
+    the shared RateLimiter, and retries throttled (429) or failed
+    requests (including network errors and timeouts) honouring
+    `Retry-After` up to `max_backoff`, or with jittered exponential
+    backoff otherwise, raising only once `max_retries` is exhausted.
+    With a `cache` (TMDbCache), responses are read from and written
+    to it, according to its mode.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+            self,
+            rate_limiter: RateLimiter = None,
+            http: HttpPool = None,
+            max_retries: int = 5,
+            backoff: float = 0.5,
+            max_backoff: float = 30.0,
+            sleep=time.sleep,
+            cache: TMDbCache = None,
+            **kwargs):
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
+        self.http = http or HttpPool.shared()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+
+    @staticmethod
+    def shared(**kwargs) -> 'TMDbClient':
+        """
+        Returns the process-wide client, creating it on first use,
+        so that every thread shares the same rate limiter. Later calls
+        with other settings than `kwargs` keep the client (other
+        threads may be using it) and log the settings ignored.
+        """
+        with TMDbClient._shared_lock:
+            if TMDbClient._shared is None:
+                TMDbClient._shared = TMDbClient(
+                    rate_limiter=RateLimiter(**kwargs),
+                    **kwargs)
+                return TMDbClient._shared
+            shared = TMDbClient._shared
+        mismatched = shared.get_mismatched(kwargs)
+        if mismatched:
+            print(f'TMDb, shared client kept, ignoring other {", ".join(mismatched)}')
+        return shared
+
+    def get_mismatched(self, settings: Dict) -> List[str]:
+        """
+        Names of the `settings` that differ from the client's own,
+        comparing the http pool and the cache by their settings, so
+        that an equally configured instance is not a mismatch.
+        """
+        current = self.get_settings()
+        settings = dict(settings)
+        for name in ('http', 'cache'):
+            if settings.get(name) is not None:
+                settings[name] = settings[name].get_settings()
+        return sorted(
+            name for name, value in settings.items()
+            if name in current and current[name] != value)
+
+    def get_settings(self) -> Dict:
+        return {
+            'rate': self.rate_limiter.rate,
+            'burst': self.rate_limiter.burst,
+            'http': self.http.get_settings(),
+            'cache': self.cache.get_settings() if self.cache else None,
+            'max_retries': self.max_retries,
+            'backoff': self.backoff,
+            'max_backoff': self.max_backoff}
+
+    def get_json(self, url: str, refresh: bool = False) -> Dict:
+        """
+        Requests the url and returns its JSON body, retrying
+        when TMDb throttles us or fails on its side. With `refresh`,
+        the cache is not read (unless offline), only written.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(url, refresh=refresh)
+            if cached is not None:
+                return cached
+        body = self.request_json(url)
+        if self.cache is not None:
+            self.cache.put(url, body)
+        return body
+
+    def request_json(self, url: str) -> Dict:
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                res = self.http.request('GET', url, headers={'Accept': 'application/json'})
+                return json.loads(res.body.decode('utf-8'))
+            except HTTPError as e:
+                if e.code not in TMDbClient.RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                retry_after = TMDbClient.get_retry_after(e.headers)
+            except TMDbClient.RETRY_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = None
+            if retry_after is not None:
+                # a bad header must not park every thread for too long
+                self.rate_limiter.pause(min(retry_after, self.max_backoff))
+            else:
+                self.sleep(self.get_backoff(attempt))
+            attempt += 1
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Full jitter: a random wait up to the exponential backoff.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    @staticmethod
+    def get_retry_after(headers) -> Optional[float]:
+        """
+        Reads `Retry-After`, either in seconds or as an HTTP date.
+        """
+        value = headers.get('Retry-After') if headers else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
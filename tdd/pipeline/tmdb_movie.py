@@ -1,13 +1,27 @@
-import json
-from urllib.request import urlopen
+from urllib.error import HTTPError
 from .file_s3 import FileS3
+from .tmdb_client import TMDbClient
 
 class TMDbMovie:
     URL_TMPL = 'https://api.themoviedb.org/3/find/{imdb_id}?api_key={api_key}&language=en-US&external_source=imdb_id'
+    DETAILS_URL_TMPL = 'https://api.themoviedb.org/3/movie/{imdb_id}?api_key={api_key}&language=en-US&append_to_response=reviews'
     S3_TMPL  = 's3://{bucket_name}/tmdb/movies/year-{year}/initial-{initial}/tmdb-movie-{tmdb_id}.json'
+    S3_NDJSON_TMPL = 's3://{bucket_name}/tmdb/movies-ndjson/year-{year}/initial-{initial}/tmdb-movies-{run_id}-{part}.ndjson.gz'
+
+    FIND_FIELDS = (
+        'adult', 'backdrop_path', 'id', 'original_language', 'original_title', 'overview',
+        'popularity', 'poster_path', 'release_date', 'title', 'video', 'vote_average', 'vote_count')
 
     """
     Wraps the request to the TMDBMovie resource.
+
+    With `fetch_mode='details'`, the movie details are requested instead
+    of the `find`, with the first page of reviews appended to the same
+    response (`reviews_page`), sparing a request per movie. The stored
+    document is then either shaped as the `find` result (`document='find'`)
+    or the full details (`document='details'`).
+
+    With `refresh`, the movie is requested even if in the cache.
     """
 
     def __init__(
@@ -17,13 +31,27 @@ class TMDbMovie:
             imdb_id: str,
             api_key: str,
             bucket_name: str,
+            client: TMDbClient = None,
+            fetch_mode: str = 'find',
+            document: str = 'find',
+            refresh: bool = False,
             **kwargs):
+        assert fetch_mode in ('find', 'details'), f'unknown fetch mode {fetch_mode}'
+        assert document in ('find', 'details'), f'unknown movie document {document}'
         self.year = year
         self.initial = initial
         self.imdb_id = imdb_id
         self.bucket_name = bucket_name
-        self.url = TMDbMovie.URL_TMPL.format(imdb_id=imdb_id, api_key=api_key)
+        self.fetch_mode = fetch_mode
+        self.document = document
+        self.refresh = refresh
+        if fetch_mode == 'details':
+            self.url = TMDbMovie.DETAILS_URL_TMPL.format(imdb_id=imdb_id, api_key=api_key)
+        else:
+            self.url = TMDbMovie.URL_TMPL.format(imdb_id=imdb_id, api_key=api_key)
+        self.client = client or TMDbClient.shared()
         self.doc = None
+        self.reviews_page = None
 
     def get_document(self):
         """
@@ -47,9 +75,10 @@ class TMDbMovie:
         self.ensure_cache()
         return self.doc['id']
 
-    def save(self):
+    def save(self, writer=None):
         """
         Saves the `doc` as a file in S3 and returns the S3 url.
+        With a `writer` (S3Writer), the upload happens in background.
         """
         self.ensure_cache()
         s3_url = TMDbMovie.S3_TMPL.format(
@@ -57,17 +86,65 @@ class TMDbMovie:
             year=self.year,
             initial=self.initial,
             tmdb_id=self.get_id())
+        if writer:
+            writer.write(s3_url, self.doc)
+            return s3_url
         s3_file = FileS3(s3_url)
         s3_file.write(self.doc)
         return s3_file.url
 
+    def save_to(self, ndjson_writer):
+        """
+        Appends the `doc` to the partition's batched NDJSON output.
+        """
+        self.ensure_cache()
+        ndjson_writer.append(self.doc)
+
+    @staticmethod
+    def get_ndjson_url_tmpl(bucket_name: str, year: int, initial: str, run_id: str) -> str:
+        """
+        Url template of the batched NDJSON objects of the partition,
+        leaving the `{part}` to the S3NdJsonWriter.
+        """
+        return TMDbMovie.S3_NDJSON_TMPL.format(
+            bucket_name=bucket_name,
+            year=year,
+            initial=initial,
+            run_id=run_id,
+            part='{part}')
+
     def ensure_cache(self):
         """
         Ensure that we have the document cached
         """
         if self.doc == None:
-            with urlopen(self.url) as res:
-                res = json.load(res)
-                if 'movie_results' in res and res['movie_results']:
-                    self.doc = next(iter(res['movie_results']), None)
-                    self.doc['id_imdb'] = self.imdb_id
+            if self.fetch_mode == 'details':
+                self.ensure_details()
+                return
+            res = self.client.get_json(self.url, refresh=self.refresh)
+            if 'movie_results' in res and res['movie_results']:
+                self.doc = next(iter(res['movie_results']), None)
+                self.doc['id_imdb'] = self.imdb_id
+
+    def ensure_details(self):
+        try:
+            details = self.client.get_json(self.url, refresh=self.refresh)
+        except HTTPError as e:
+            if e.code == 404:
+                return  # not in TMDb
+            raise
+        self.reviews_page = details.pop('reviews', None)
+        if self.document == 'details':
+            self.doc = details
+        else:
+            self.doc = TMDbMovie.to_find_result(details)
+        self.doc['id_imdb'] = self.imdb_id
+
+    @staticmethod
+    def to_find_result(details):
+        """
+        Shapes the movie details as the `find` would have returned them.
+        """
+        doc = {field: details.get(field) for field in TMDbMovie.FIND_FIELDS}
+        doc['genre_ids'] = [genre['id'] for genre in details.get('genres') or []]
+        return doc
@@ -1,12 +1,21 @@
-from typing import Iterable, Dict
-import json
-from urllib.request import urlopen
+from typing import Iterable, Dict, List, Optional
+from urllib.error import HTTPError, URLError
+from concurrent.futures import ThreadPoolExecutor
 from .file_s3 import FileS3
+from .tmdb_client import TMDbClient
+
+
+class TMDbReviewsError(Exception):
+    """
+    Raised when a page of reviews could not be fetched,
+    rather than cutting the list of reviews short.
+    """
 
 
 class TMDbReviews:
     URL_TMPL = 'https://api.themoviedb.org/3/movie/{movie_id}/reviews?api_key={api_key}&language=en-US&page={page}'
     S3_TMPL = 's3://{bucket_name}/tmdb/reviews/year-{year}/initial-{initial}/tmdb-movie-{movie_id}-review-{review_id}.json'
+    S3_NDJSON_TMPL = 's3://{bucket_name}/tmdb/reviews-ndjson/year-{year}/initial-{initial}/tmdb-reviews-{run_id}-{part}.ndjson.gz'
 
     """
     Wraps the request to the TMDB review resource,
@@ -22,6 +31,11 @@ class TMDbReviews:
             bucket_name: str,
             api_key: str,
             max_pages: int = 1000,
+            max_page_workers: int = 4,
+            page_retries: int = 2,
+            client: TMDbClient = None,
+            first_page: Dict = None,
+            refresh: bool = False,
             **kwargs):
         self.year = year
         self.initial = initial
@@ -29,7 +43,13 @@ class TMDbReviews:
         self.bucket_name = bucket_name
         self.api_key = api_key
         self.max_pages = max_pages
+        self.max_page_workers = max_page_workers
+        self.page_retries = page_retries
+        self.client = client or TMDbClient.shared()
+        self.first_page = first_page
+        self.refresh = refresh
         self.docs = None
+        self.pages = 0
 
     def get_documents(self) -> Iterable[Dict]:
         """
@@ -38,44 +58,102 @@ class TMDbReviews:
         self.ensure_cache()
         return self.docs
 
-    def save(self) -> Iterable[str]:
+    def save(self, writer=None) -> Iterable[str]:
         """
         Saves each document as a file in S3 and returns the S3 url.
+        With a `writer` (S3Writer), the uploads happen in background.
         """
         self.ensure_cache()
         urls = []
         for doc in self.docs:
-            print(doc)
             url = TMDbReviews.S3_TMPL.format(
                 bucket_name=self.bucket_name,
                 year=self.year,
                 initial=self.initial,
                 movie_id=self.movie_id,
                 review_id=doc['id'])
-            FileS3(url).write(doc)
+            if writer:
+                writer.write(url, doc)
+            else:
+                FileS3(url).write(doc)
             urls.append(url)
         return urls
 
+    def save_to(self, ndjson_writer) -> int:
+        """
+        Appends each document to the partition's batched NDJSON output,
+        returning how many were appended.
+        """
+        self.ensure_cache()
+        for doc in self.docs:
+            ndjson_writer.append(doc)
+        return len(self.docs)
+
+    @staticmethod
+    def get_ndjson_url_tmpl(bucket_name: str, year: int, initial: str, run_id: str) -> str:
+        """
+        Url template of the batched NDJSON objects of the partition,
+        leaving the `{part}` to the S3NdJsonWriter.
+        """
+        return TMDbReviews.S3_NDJSON_TMPL.format(
+            bucket_name=bucket_name,
+            year=year,
+            initial=initial,
+            run_id=run_id,
+            part='{part}')
+
     def ensure_cache(self):
         """
-        Ensures that we have the documents cached
+        Ensures that we have the documents cached. Reads the first page
+        to learn the `total_pages` (unless it came appended to the movie
+        details), then fetches the remaining pages concurrently and
+        merges them in page order.
         """
         if self.docs == None:
+            first_page = self.first_page or self.get_page(1)
+            if first_page is None:
+                self.docs = []
+                return
+            total_pages = min(int(first_page.get('total_pages') or 1), self.max_pages)
+            pages = [first_page] + self.get_pages(range(2, total_pages + 1))
+            self.pages = len(pages)
             cache = []
-            for page in range(1, self.max_pages):
-                url = TMDbReviews.URL_TMPL.format(
-                    movie_id=self.movie_id,
-                    api_key=self.api_key,
-                    page=page)
-                try:
-                    with urlopen(url) as res:
-                        res = json.load(res)
-                        if 'results' in res and res['results']:
-                            for doc in res['results']:
-                                doc['movie_id'] = self.movie_id
-                                cache.append(doc)
-                        else:
-                            break
-                except:
-                    break
+            for res in pages:
+                for doc in (res or {}).get('results') or []:
+                    doc['movie_id'] = self.movie_id
+                    cache.append(doc)
             self.docs = cache
+
+    def get_pages(self, pages: Iterable[int]) -> List[Optional[Dict]]:
+        pages = list(pages)
+        if len(pages) <= 1 or self.max_page_workers <= 1:
+            return [self.get_page(page) for page in pages]
+        with ThreadPoolExecutor(max_workers=min(self.max_page_workers, len(pages))) as executor:
+            return list(executor.map(self.get_page, pages))
+
+    def get_page(self, page: int) -> Optional[Dict]:
+        """
+        Fetches one page of reviews, retrying it up to `page_retries`
+        times beyond the retries of the client. Returns None when the
+        movie is no longer in TMDb.
+        """
+        url = TMDbReviews.URL_TMPL.format(
+            movie_id=self.movie_id,
+            api_key=self.api_key,
+            page=page)
+        attempt = 0
+        while True:
+            try:
+                return self.client.get_json(url, refresh=self.refresh)
+            except HTTPError as e:
+                if e.code == 404:
+                    return None  # movie no longer in TMDb, no reviews
+                if e.code not in TMDbClient.RETRY_STATUSES:
+                    attempt = self.page_retries
+                error = e
+            except (URLError, ValueError) as e:
+                error = e
+            attempt += 1
+            if attempt > self.page_retries:
+                msg = f'[TMDb] reviews page {page} of movie {self.movie_id} failed: {error}'
+                raise TMDbReviewsError(msg) from error
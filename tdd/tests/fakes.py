@@ -0,0 +1,45 @@
+from ..pipeline import TMDbClient, RateLimiter
+
+
+class FakeFileS3:
+    """
+    In-memory stand-in for a `FileS3` holding one JSON document,
+    counting how many times it was written.
+    """
+
+    def __init__(self, doc=None):
+        self.doc = doc
+        self.writes = 0
+
+    def read(self):
+        return self.doc
+
+    def write(self, doc):
+        self.doc = doc
+        self.writes += 1
+
+    def delete(self):
+        self.doc = None
+
+
+class FakeClock:
+    """
+    Clock set by the test (`now`), moving `step` seconds on each read.
+    """
+
+    def __init__(self, now: float = 1000.0, step: float = 0.0):
+        self.now = now
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def fake_client(**kwargs) -> TMDbClient:
+    """
+    TMDb client that is neither rate limited nor slowed down by its
+    backoff, for tests against a `FakeServer`.
+    """
+    kwargs.setdefault('backoff', 0.001)
+    return TMDbClient(rate_limiter=RateLimiter(rate=1000, burst=100), **kwargs)
@@ -0,0 +1,66 @@
+import pytest
+from urllib.error import HTTPError
+from ..pipeline import HttpPool, FileHttp
+from .fake_server import FakeServer
+
+
+def respond(path):
+    if path == '/missing':
+        return 404, {}, {'status_message': 'not found'}
+    if path == '/moved':
+        return 302, {'Location': '/file'}, b''
+    return 200, {'Content-Type': 'text/plain'}, b'0123456789' * 100
+
+
+def test_request_reuses_connection():
+    target = HttpPool(pool_size=2)
+    with FakeServer(respond) as server:
+        for _ in range(5):
+            assert target.request('GET', f'{server.url}/file').body.startswith(b'0123')
+    assert target.get_counters() == {'created': 1, 'reused': 4, 'discarded': 0}
+
+
+def test_request_raises_http_error():
+    target = HttpPool()
+    with FakeServer(respond) as server:
+        with pytest.raises(HTTPError) as e:
+            target.request('GET', f'{server.url}/missing')
+        assert e.value.code == 404
+        target.request('GET', f'{server.url}/file')
+    assert target.get_counters()['reused'] == 1
+
+
+def test_request_follows_redirects():
+    target = HttpPool()
+    with FakeServer(respond) as server:
+        assert len(target.request('GET', f'{server.url}/moved').body) == 1000
+        assert server.paths == ['/moved', '/file']
+
+
+def test_stream_read_fully_returns_connection():
+    target = HttpPool()
+    with FakeServer(respond) as server:
+        with target.stream(f'{server.url}/file') as res:
+            assert len(res.read()) == 1000
+        with target.stream(f'{server.url}/file') as res:
+            assert res.read(4) == b'0123'
+    assert target.get_counters() == {'created': 1, 'reused': 1, 'discarded': 1}
+
+
+def test_file_http_through_pool():
+    target = HttpPool()
+    with FakeServer(respond) as server:
+        http_file = FileHttp(f'{server.url}/file', http=target)
+        assert http_file.get_size() == 1000
+        with http_file.stream() as stream:
+            assert len(stream.read()) == 1000
+
+
+def test_shared_keeps_pool_with_other_settings(monkeypatch, capsys):
+    monkeypatch.setattr(HttpPool, '_shared', None)
+    shared = HttpPool.shared(pool_size=16, timeout=10.0)
+    assert HttpPool.shared(pool_size=16) is shared
+    assert 'ignoring' not in capsys.readouterr().out
+    assert HttpPool.shared(pool_size=4, timeout=10.0) is shared
+    assert shared.pool_size == 16
+    assert 'ignoring other pool_size' in capsys.readouterr().out
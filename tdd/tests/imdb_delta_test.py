@@ -0,0 +1,47 @@
+import io
+import gzip
+import json
+from ..pipeline import IMDbDelta, IMDbMovie, Partition
+from .fakes import FakeFileS3
+
+
+def tsv_gz(rows):
+    lines = ['tconst\ttitleType\tprimaryTitle\tstartYear\truntimeMinutes'] + rows
+    return io.BytesIO(gzip.compress('\n'.join(lines).encode('utf-8')))
+
+
+def test_get_digests_from_movies_only():
+    digests = IMDbDelta.get_digests_from(tsv_gz([
+        'tt0000001\tmovie\tAdventure\t2004\t90',
+        'tt0000002\tshort\tAdventure\t2004\t10',
+        'tt0000003\tmovie\tAdventure\t\\N\t90']))
+    assert list(digests.keys()) == ['tt0000001']
+    assert digests['tt0000001'][:2] == [2004, 'AD']
+
+
+def test_compare_added_and_changed():
+    previous = IMDbDelta.get_digests_from(tsv_gz([
+        'tt0000001\tmovie\tAdventure\t2004\t90',
+        'tt0000002\tmovie\tAdding Up\t2004\t90',
+        'tt0000003\tmovie\tBravo\t2004\t90']))
+    current = IMDbDelta.get_digests_from(tsv_gz([
+        'tt0000001\tmovie\tAdventure\t2004\t90',
+        'tt0000002\tmovie\tAdding Up\t2004\t95',
+        'tt0000003\tmovie\tBravo\t2004\t90',
+        'tt0000004\tmovie\tBravo Two\t2005\t90']))
+    assert IMDbDelta.compare(previous, current) == {
+        (2004, 'AD'): ['tt0000002'],
+        (2005, 'BR'): ['tt0000004']}
+
+
+def test_digests_round_trip():
+    digests = {'tt0000001': [2004, 'AD', 123]}
+    assert json.loads(gzip.decompress(IMDbDelta.to_gzip(digests))) == digests
+
+
+def test_filter_only_delta_ids():
+    target = IMDbDelta(bucket_name='hudsonmendes-datalake', date_tag=1)
+    target.get_delta_file = lambda partition: FakeFileS3({'imdb_ids': ['tt0000002']})
+    movies = [IMDbMovie.from_fields(imdb_id=f'tt000000{i}', title_type='movie', title='Ad', year=2004) for i in range(1, 4)]
+    actual = [m.get_id() for m in target.filter(iter(movies), Partition(2004, 'AD'))]
+    assert actual == ['tt0000002']
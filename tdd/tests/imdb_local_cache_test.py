@@ -0,0 +1,72 @@
+import io
+import os
+import gzip
+import pytest
+from ..pipeline import IMDbLocalCache
+
+
+ROWS = [
+    'tconst\ttitleType\tprimaryTitle\tstartYear',
+    'tt0000001\tmovie\tThe Heroes\t2004',
+    'tt0000002\tshort\tThe Heroes\t2004',
+    'tt0000003\tmovie\tAdventure\t2004']
+
+
+class FakeFileS3:
+
+    def __init__(self, etag, size=100):
+        self.etag = etag
+        self.size = size
+        self.streams = 0
+
+    def get_etag(self):
+        return self.etag
+
+    def get_size(self):
+        return self.size
+
+    def stream(self):
+        self.streams += 1
+        return io.BytesIO(gzip.compress('\n'.join(ROWS).encode('utf-8')))
+
+
+def test_get_path_movies_only(tmp_path):
+    target = IMDbLocalCache(folder=str(tmp_path))
+    path = target.get_path(FakeFileS3('abc'), date_tag=1)
+    with gzip.open(path) as f_in:
+        assert f_in.read().decode('utf-8').splitlines() == [ROWS[0], ROWS[1], ROWS[3]]
+
+
+def test_get_path_reused_while_etag_matches(tmp_path):
+    target = IMDbLocalCache(folder=str(tmp_path))
+    cache_file = FakeFileS3('abc')
+    assert target.get_path(cache_file, date_tag=1) == target.get_path(cache_file, date_tag=1)
+    assert cache_file.streams == 1
+
+
+def test_get_path_evicts_older_snapshots(tmp_path):
+    target = IMDbLocalCache(folder=str(tmp_path))
+    target.get_path(FakeFileS3('abc'), date_tag=1)
+    path = target.get_path(FakeFileS3('def'), date_tag=2)
+    assert os.listdir(str(tmp_path)) == [os.path.basename(path)]
+
+
+def test_get_path_too_big(tmp_path):
+    target = IMDbLocalCache(folder=str(tmp_path), max_bytes=1000)
+    cache_file = FakeFileS3('abc', size=5000)
+    assert target.get_path(cache_file, date_tag=1) is None
+    assert cache_file.streams == 0
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_get_path_copy_too_big_remembered(tmp_path):
+    target = IMDbLocalCache(folder=str(tmp_path), max_bytes=10)
+    cache_file = FakeFileS3('abc', size=5)
+    assert target.get_path(cache_file, date_tag=1) is None
+    assert target.get_path(cache_file, date_tag=1) is None
+    assert cache_file.streams == 1
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_get_path_not_in_s3(tmp_path):
+    assert IMDbLocalCache(folder=str(tmp_path)).get_path(FakeFileS3(None), date_tag=1) is None
@@ -15,3 +15,18 @@ def test_get_initial_from_less_than_1():
 
 def test_get_initial_from_blank_and_text():
     assert IMDbMovie.get_initial_from(' 0 ') == '0_'
+
+
+def test_get_initial_from_punctuation_only():
+    assert IMDbMovie.get_initial_from('!?') == ''
+
+
+def test_from_fields():
+    imdb_movie = IMDbMovie.from_fields(imdb_id='tt0000001', title_type='movie', title='Àçoures', year=2004)
+    assert imdb_movie.get_initial() == 'AC'
+    assert imdb_movie.get_year() == 2004
+
+
+def test_slots():
+    imdb_movie = IMDbMovie(['tconst', 'titleType', 'primaryTitle', 'startYear'], ['tt0000001', 'movie', 'Heroes', '2004'])
+    assert not hasattr(imdb_movie, '__dict__')
@@ -0,0 +1,45 @@
+import io
+import gzip
+import pytest
+from ..pipeline import IMDb, IMDbPartitions
+
+
+HEADER = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult', 'startYear', 'endYear', 'runtimeMinutes', 'genres']
+
+
+@pytest.fixture
+def stream():
+    rows = [
+        ['tt0000001', 'movie', 'Adventure', 'Adventure', '0', '2004', '\\N', '90', 'Drama'],
+        ['tt0000002', 'movie', 'Adding Up', 'Adding Up', '0', '2004', '\\N', '90', 'Drama'],
+        ['tt0000003', 'short', 'Adventure', 'Adventure', '0', '2004', '\\N', '10', 'Drama'],
+        ['tt0000004', 'movie', 'Ádios', 'Ádios', '0', '2005', '\\N', '90', 'Drama'],
+        ['tt0000005', 'movie', 'Adventure', 'Adventure', '0', '\\N', '\\N', '90', 'Drama'],
+        ['tt0000006', 'movie', 'B', 'B', '0', '1999', '\\N', '90', 'Drama'],
+    ]
+    lines = ['\t'.join(HEADER)] + ['\t'.join(row) for row in rows]
+    return io.BytesIO(gzip.compress('\n'.join(lines).encode('utf-8')))
+
+
+def test_scan_counts_movies_per_partition(stream):
+    counts = IMDbPartitions().scan(stream)
+    assert counts == {(2004, 'AD'): 2, (2005, 'AD'): 1, (1999, 'B_'): 1}
+
+
+def test_scan_within_year_range(stream):
+    counts = IMDbPartitions(min_year=2000, max_year=2004).scan(stream)
+    assert counts == {(2004, 'AD'): 2}
+
+
+def test_scan_matches_what_workers_pick(stream):
+    counts = IMDbPartitions().scan(stream)
+    imdb = IMDb(bucket_name='hudsonmendes-datalake')
+    for (year, initial), count in counts.items():
+        stream.seek(0)
+        assert len(list(imdb.extract_movie_refs_from(stream, year, initial))) == count
+
+
+def test_scan_keeps_ids(stream):
+    partitions = IMDbPartitions(keep_ids=True)
+    partitions.scan(stream)
+    assert partitions.ids[(2004, 'AD')] == ['tt0000001', 'tt0000002']
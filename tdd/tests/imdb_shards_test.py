@@ -0,0 +1,93 @@
+import io
+import gzip
+import threading
+import pytest
+from ..pipeline import IMDb, IMDbShards, S3Writer, S3WriterError
+from .fakes import FakeFileS3
+
+
+HEADER = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult', 'startYear', 'endYear', 'runtimeMinutes', 'genres']
+
+
+@pytest.fixture
+def rows():
+    return [
+        ['tt0000001', 'movie', 'Adventure', 'Adventure', '0', '2004', '\\N', '90', 'Drama'],
+        ['tt0000002', 'movie', 'Adding Up', 'Adding Up', '0', '2004', '\\N', '90', 'Drama'],
+        ['tt0000003', 'short', 'Adventure', 'Adventure', '0', '2004', '\\N', '10', 'Drama'],
+        ['tt0000004', 'movie', 'Bravo', 'Bravo', '0', '2004', '\\N', '90', 'Drama'],
+        ['tt0000005', 'movie', 'Adventure', 'Adventure', '0', '\\N', '\\N', '90', 'Drama'],
+    ]
+
+
+@pytest.fixture
+def stream(rows):
+    lines = ['\t'.join(HEADER)] + ['\t'.join(row) for row in rows]
+    return io.BytesIO(gzip.compress('\n'.join(lines).encode('utf-8')))
+
+
+class FakeS3Writer(S3Writer):
+
+    def __init__(self, fail=False, **kwargs):
+        self.fail = fail
+        self.uploaded = {}
+        self.uploaded_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def put(self, url, data):
+        if self.fail:
+            raise IOError('access denied')
+        with self.uploaded_lock:
+            self.uploaded[url] = data
+
+
+def test_spool_rows_movies_only(stream, tmp_path):
+    header, paths = IMDbShards.spool_rows(stream, str(tmp_path), buckets=4)
+    assert header == HEADER
+    partitions = {}
+    for path in paths:
+        partitions.update(IMDbShards.read_spool(path))
+    assert sorted(partitions.keys()) == [(2004, 'AD'), (2004, 'BR')]
+    assert len(partitions[(2004, 'AD')]) == 2
+
+
+def test_shard_matches_full_scan(stream, tmp_path):
+    imdb = IMDb(bucket_name='hudsonmendes-datalake')
+    expected = [m.get_id() for m in imdb.extract_movie_refs_from(stream, 2004, 'AD')]
+    stream.seek(0)
+    header, paths = IMDbShards.spool_rows(stream, str(tmp_path), buckets=1)
+    shard = io.BytesIO(IMDbShards.to_gzip(header, IMDbShards.read_spool(paths[0])[(2004, 'AD')]))
+    actual = [m.get_id() for m in imdb.extract_movie_refs_from(shard, 2004, 'AD')]
+    assert actual == expected == ['tt0000001', 'tt0000002']
+
+
+def test_shard_matches_full_scan_with_quotes(rows, tmp_path):
+    rows = [['tt0000009', 'movie', '"Adrift', '"Adrift', '0', '2004', '\\N', '90', 'Drama']] + rows
+    lines = ['\t'.join(HEADER)] + ['\t'.join(row) for row in rows]
+    data = gzip.compress('\n'.join(lines).encode('utf-8'))
+    imdb = IMDb(bucket_name='hudsonmendes-datalake')
+    expected = [m.get_id() for m in imdb.extract_movie_refs_from(io.BytesIO(data), 2004, 'AD')]
+    header, paths = IMDbShards.spool_rows(io.BytesIO(data), str(tmp_path), buckets=1)
+    shard = io.BytesIO(IMDbShards.to_gzip(header, IMDbShards.read_spool(paths[0])[(2004, 'AD')]))
+    actual = [m.get_id() for m in imdb.extract_movie_refs_from(shard, 2004, 'AD')]
+    assert actual == expected == ['tt0000009', 'tt0000001', 'tt0000002']
+
+
+def test_split_from_uploads_shards_then_marker(stream):
+    target = IMDbShards(bucket_name='hudsonmendes-datalake', date_tag=20201010)
+    target.marker_file = FakeFileS3()
+    writer = FakeS3Writer(max_workers=4)
+    assert target.split_from(stream, buckets=4, writer=writer) == 2
+    assert sorted(writer.uploaded) == [
+        's3://hudsonmendes-datalake/imdb/shards-20201010/year-2004/initial-AD.tsv.gz',
+        's3://hudsonmendes-datalake/imdb/shards-20201010/year-2004/initial-BR.tsv.gz']
+    assert gzip.decompress(writer.uploaded[target.get_shard_url(2004, 'BR')]).decode('utf-8').split('\n')[1].startswith('tt0000004\t')
+    assert target.marker_file.doc == {'shards': 2}
+
+
+def test_split_from_no_marker_when_upload_fails(stream):
+    target = IMDbShards(bucket_name='hudsonmendes-datalake', date_tag=20201010)
+    target.marker_file = FakeFileS3()
+    with pytest.raises(S3WriterError):
+        target.split_from(stream, buckets=4, writer=FakeS3Writer(fail=True, max_workers=4))
+    assert target.marker_file.doc is None
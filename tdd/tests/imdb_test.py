@@ -1,8 +1,10 @@
+import io
+import gzip
 import pytest
 import time
 import datetime
 import configparser
-from ..pipeline import IMDb, FileS3
+from ..pipeline import IMDb, FileS3, S3Lease
 
 
 @pytest.fixture
@@ -40,3 +42,66 @@ def test_cache(target, bucket_name):
         assert target.cache_file.get_size() > 0
     finally:
         target.cache_file.delete()
+
+
+def test_extract_movie_refs_from_fast_matches_legacy():
+    header = 'tconst\ttitleType\tprimaryTitle\tstartYear'
+    rows = [
+        'tt0000001\tmovie\tThe Heroes\t2004',
+        'tt0000002\tshort\tThe Heroes\t2004',
+        'tt0000003\tmovie\tThé Zoo\t2004',
+        'tt0000004\tmovie\tThe Heroes\t\\N',
+        'tt0000005\tmovie\tHeroes\t2004']
+    data = gzip.compress('\n'.join([header] + rows).encode('utf-8'))
+    imdb = IMDb(bucket_name='hudsonmendes-datalake')
+    legacy = imdb.extract_movie_refs_from(io.BytesIO(data), 2004, 'TH', fast=False)
+    fast = imdb.extract_movie_refs_from(io.BytesIO(data), 2004, 'TH', fast=True)
+    assert [m.get_id() for m in fast] == [m.get_id() for m in legacy] == ['tt0000001', 'tt0000003']
+
+
+class FakeCacheFile:
+
+    def __init__(self):
+        self.data = None
+        self.copies = 0
+        self.url = 's3://hudsonmendes-datalake/imdb/title.basics-1.tsv.gz'
+
+    def get_size(self):
+        return len(self.data) if self.data is not None else 0
+
+    def get_etag(self):
+        return 'etag'
+
+    def copy_from(self, source_file):
+        self.data = source_file.data
+        self.copies += 1
+
+    def read(self):
+        return self.data
+
+    def write(self, doc):
+        self.data = doc
+
+
+class FakeSourceFile:
+
+    def __init__(self, data):
+        self.data = data
+
+    def get_size(self):
+        return len(self.data)
+
+
+def test_first_cache_is_idempotent_when_both_hold_the_lease(monkeypatch):
+    monkeypatch.setattr(S3Lease, 'acquire', lambda self: True)
+    monkeypatch.setattr(S3Lease, 'release', lambda self: None)
+    cache_file, marker_file = FakeCacheFile(), FakeCacheFile()
+    workers = [IMDb(bucket_name='hudsonmendes-datalake') for _ in range(2)]
+    for worker in workers:
+        worker.source_file = FakeSourceFile(b'tconst\ttitleType')
+        worker.cache_file = cache_file
+        worker.get_marker_file = lambda: marker_file
+    assert all(worker.attempt_first_cache() for worker in workers)
+    assert cache_file.copies == 1
+    assert marker_file.data['size'] == len(b'tconst\ttitleType')
+    assert all(worker.is_cached() for worker in workers)
@@ -0,0 +1,78 @@
+import json
+import pytest
+import lambda_function
+from infra import Config
+
+
+class FakeCounters:
+
+    def get_counters(self):
+        return {}
+
+
+class FakeRuntime:
+
+    def __init__(self):
+        self.config = Config()
+        self.imdb = None
+        self.tmdb = None
+        self.http = FakeCounters()
+        self.s3_pool = FakeCounters()
+        self.setup_ms = 0.0
+        self.warm = True
+
+
+class RecordingExecutor(lambda_function.ThreadPoolExecutor):
+    max_workers = []
+
+    def __init__(self, max_workers=None, **kwargs):
+        RecordingExecutor.max_workers.append(max_workers)
+        super().__init__(max_workers=max_workers, **kwargs)
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    processed = []
+
+    def process_record(record, config, imdb, tmdb, budget, context):
+        body = json.loads(record['body'])
+        processed.append(body['year'])
+        if body.get('fail'):
+            raise RuntimeError('failed')
+        return 1
+
+    RecordingExecutor.max_workers = []
+    monkeypatch.setattr(lambda_function.Runtime, 'get', staticmethod(FakeRuntime))
+    monkeypatch.setattr(lambda_function, 'process_record', process_record)
+    monkeypatch.setattr(lambda_function, 'ThreadPoolExecutor', RecordingExecutor)
+    return processed
+
+
+def get_record(message_id, year, fail=False):
+    return {'messageId': message_id, 'body': json.dumps({'year': year, 'initial': 'A', 'fail': fail})}
+
+
+def test_reports_only_the_failed_record(processed):
+    event = {'Records': [get_record('m1', 2001), get_record('m2', 2002, fail=True), get_record('m3', 2003)]}
+    result = lambda_function.lambda_handler(event, None)
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'm2'}]}
+    assert sorted(processed) == [2001, 2002, 2003]
+
+
+def test_empty_batch(processed):
+    assert lambda_function.lambda_handler({'Records': []}, None) == {'batchItemFailures': []}
+    assert processed == []
+    assert RecordingExecutor.max_workers == [1]
+
+
+def test_max_partitions_caps_executor(processed, monkeypatch):
+    monkeypatch.setenv('LAMBDA_MAX_PARTITIONS', '2')
+    event = {'Records': [get_record(f'm{year}', year) for year in range(2001, 2006)]}
+    assert lambda_function.lambda_handler(event, None) == {'batchItemFailures': []}
+    assert sorted(processed) == [2001, 2002, 2003, 2004, 2005]
+    assert RecordingExecutor.max_workers == [2]
+
+
+def test_max_partitions_not_above_batch(processed):
+    lambda_function.lambda_handler({'Records': [get_record('m1', 2001)]}, None)
+    assert RecordingExecutor.max_workers == [1]
@@ -0,0 +1,57 @@
+import io
+import gzip
+import json
+from ..pipeline import IMDb, Metrics
+from .fakes import FakeClock
+
+
+HEADER = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult', 'startYear', 'endYear', 'runtimeMinutes', 'genres']
+
+
+def test_summary_of_counters_and_distributions():
+    metrics = Metrics(clock=FakeClock(now=0.0, step=0.01))
+    metrics.count('tmdb_movies_not_found')
+    metrics.count('tmdb_movies_not_found', 2)
+    metrics.set('imdb_scan_rows_per_sec', 1000.0)
+    for value in range(1, 101):
+        metrics.observe('tmdb_find_ms', value)
+    with metrics.timer('partition_ms'):
+        pass
+    summary = metrics.get_summary()
+    assert summary['tmdb_movies_not_found'] == 3
+    assert summary['imdb_scan_rows_per_sec'] == 1000.0
+    assert summary['tmdb_find_ms_count'] == 100
+    assert (summary['tmdb_find_ms_p50'], summary['tmdb_find_ms_p90'], summary['tmdb_find_ms_p99']) == (50, 90, 99)
+    assert summary['tmdb_find_ms_max'] == 100
+    assert round(summary['partition_ms_max']) == 10
+
+
+def test_emf_document(capsys):
+    metrics = Metrics()
+    metrics.count('s3_put_bytes', 512)
+    metrics.observe('s3_put_ms', 12.5)
+    metrics.emit(dimensions={'Service': 'tmdb-downloader'}, properties={'partition': 'year-2004/initial-AD'})
+    document = json.loads(capsys.readouterr().out)
+    directive = document['_aws']['CloudWatchMetrics'][0]
+    assert directive['Namespace'] == Metrics.NAMESPACE
+    assert directive['Dimensions'] == [['Service']]
+    units = {metric['Name']: metric['Unit'] for metric in directive['Metrics']}
+    assert units['s3_put_bytes'] == 'Bytes'
+    assert units['s3_put_ms_p99'] == 'Milliseconds'
+    assert units['s3_put_ms_count'] == 'Count'
+    assert document['Service'] == 'tmdb-downloader'
+    assert document['partition'] == 'year-2004/initial-AD'
+    assert document['s3_put_bytes'] == 512
+
+
+def test_scan_records_rows_once_even_if_not_exhausted():
+    rows = [[f'tt{i:07d}', 'movie', 'Adventure', 'Adventure', '0', '2004', '\\N', '90', 'Drama'] for i in range(10)]
+    lines = ['\t'.join(HEADER)] + ['\t'.join(row) for row in rows]
+    stream = io.BytesIO(gzip.compress('\n'.join(lines).encode('utf-8')))
+    metrics = Metrics()
+    movies = IMDb.__new__(IMDb).extract_movie_refs_from(stream, 2004, 'AD', metrics=metrics)
+    assert next(movies).get_id() == 'tt0000000'
+    movies.close()
+    summary = metrics.get_summary()
+    assert summary['imdb_rows_scanned'] == 1
+    assert summary['imdb_scan_ms_count'] == 1
@@ -0,0 +1,75 @@
+import pytest
+from ..pipeline import Partition, PartitionCheckpoint, TimeBudget, IMDbMovie
+from .fakes import FakeFileS3
+
+
+class FakeContext:
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        self.remaining_ms -= 1000
+        return self.remaining_ms
+
+
+@pytest.fixture
+def movies():
+    return [IMDbMovie.from_fields(imdb_id=f'tt000000{i}', title_type='movie', title='Ad', year=2004) for i in range(6)]
+
+
+def target_with(doc=None):
+    checkpoint = PartitionCheckpoint(bucket_name='hudsonmendes-datalake', partition=Partition(2004, 'AD'))
+    checkpoint.file = FakeFileS3(doc)
+    return checkpoint
+
+
+def test_time_budget():
+    assert not TimeBudget(context=None).is_running_out()
+    assert not TimeBudget(context=FakeContext(200000), reserve_ms=120000).is_running_out()
+    assert TimeBudget(context=FakeContext(100000), reserve_ms=120000).is_running_out()
+
+
+def test_track_stops_when_out_of_time(movies):
+    target = target_with()
+    budget = TimeBudget(context=FakeContext(124500), reserve_ms=120000)
+    taken = [m.get_id() for m in target.track(iter(movies), budget)]
+    assert taken == ['tt0000000', 'tt0000001', 'tt0000002', 'tt0000003']
+    assert target.interrupted
+    target.save()
+    assert target.file.doc == {'offset': 4, 'last_id': 'tt0000003'}
+
+
+def test_resume_skips_up_to_offset(movies):
+    target = target_with({'offset': 4, 'last_id': 'tt0000003'}).load()
+    stream = target.track(target.resume(iter(movies)), TimeBudget(context=None))
+    assert [m.get_id() for m in stream] == ['tt0000004', 'tt0000005']
+    assert target.offset == 6
+    assert not target.interrupted
+
+
+def test_resume_does_not_skip_when_stream_changed(movies):
+    target = target_with({'offset': 4, 'last_id': 'tt0000009'}).load()
+    stream = target.resume(iter(movies))
+    assert len(list(stream)) == 6
+
+
+def test_continuation_message():
+    continuation = Partition(2004, 'AD').get_continuation()
+    assert continuation.to_message() == {'year': 2004, 'initial': 'AD', 'skip_existing': True, 'resume': True}
+
+
+def test_segment_id_same_for_every_attempt():
+    first, redelivered = target_with(), target_with()
+    assert first.get_segment_id(1600000000) == redelivered.get_segment_id(1600000000) == '1600000000-from0'
+    resumed = target_with({'offset': 3, 'last_id': 'tt0000002'}).load()
+    assert resumed.get_segment_id(1600000000) == '1600000000-from3'
+
+
+def test_segment_id_by_shard_and_kind():
+    delta = PartitionCheckpoint(bucket_name='hudsonmendes-datalake', partition=Partition(2004, 'AD', shard=1, shards=3, delta=True))
+    assert delta.get_segment_id(1600000000) == '1600000000-shard1of3-delta-from0'
+    refreshes = [
+        PartitionCheckpoint(bucket_name='hudsonmendes-datalake', partition=Partition(2004, 'AD', ids=ids, refresh=True))
+        for ids in (['tt0000001'], ['tt0000002'])]
+    assert len(set(r.get_segment_id(1600000000) for r in refreshes)) == 2
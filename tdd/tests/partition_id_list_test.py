@@ -0,0 +1,59 @@
+import pytest
+from ..pipeline import Partition, PartitionIdList, PartitionCheckpoint
+
+
+class FakeWriter:
+    def __init__(self):
+        self.docs = {}
+
+    def write(self, url, json_data):
+        self.docs[url] = json_data
+
+
+@pytest.fixture
+def id_list():
+    return PartitionIdList(bucket_name='hudsonmendes-datalake', run_tag='20201010', max_inline=2)
+
+
+def test_attach_inline(id_list):
+    writer = FakeWriter()
+    partition = id_list.attach(Partition(2004, 'AD'), ['tt0000001', 'tt0000002'], writer)
+    assert partition.to_message() == {'year': 2004, 'initial': 'AD', 'ids': ['tt0000001', 'tt0000002']}
+    assert writer.docs == {}
+
+
+def test_attach_as_id_list_object(id_list):
+    writer = FakeWriter()
+    partition = id_list.attach(Partition(2004, 'AD', shard=0, shards=2), ['tt0000001', 'tt0000002', 'tt0000003'], writer)
+    url = 's3://hudsonmendes-datalake/tmdb/id-lists/20201010/year-2004/initial-AD/shard-0-of-2.json'
+    assert partition.ids is None and partition.ids_url == url
+    assert writer.docs == {url: {'imdb_ids': ['tt0000001', 'tt0000002', 'tt0000003']}}
+    assert Partition.from_message(partition.to_message()).ids_url == url
+
+
+def test_runs_keep_their_own_id_lists():
+    ids = ['tt0000001', 'tt0000002', 'tt0000003']
+    launch = PartitionIdList(bucket_name='hudsonmendes-datalake', run_tag='20201010', max_inline=2)
+    first = PartitionIdList(bucket_name='hudsonmendes-datalake', run_tag='refresh/2020-10-10/20201010T080000000000', max_inline=2)
+    second = PartitionIdList(bucket_name='hudsonmendes-datalake', run_tag='refresh/2020-10-10/20201010T090000000000', max_inline=2)
+    partitions = [
+        target.attach(Partition(2004, 'AD', refresh=True), ids, FakeWriter())
+        for target in (launch, first, second)]
+    assert len(set(p.ids_url for p in partitions)) == 3
+    assert partitions[1].ids_url == 's3://hudsonmendes-datalake/tmdb/id-lists/refresh/2020-10-10/20201010T080000000000/year-2004/initial-AD.json'
+    segments = [PartitionCheckpoint(bucket_name='hudsonmendes-datalake', partition=p).get_segment_id(20201010) for p in partitions[1:]]
+    assert segments[0] != segments[1]
+
+
+def test_stream_from_inline_ids():
+    partition = Partition.from_message({'year': 2004, 'initial': 'AD', 'ids': ['tt0000001', 'tt0000002']})
+    assert partition.has_ids()
+    movies = list(PartitionIdList.stream(partition))
+    assert [(m.get_id(), m.get_year(), m.get_initial()) for m in movies] == [
+        ('tt0000001', 2004, 'AD'), ('tt0000002', 2004, 'AD')]
+
+
+def test_continuation_keeps_ids():
+    partition = Partition(2004, 'AD', ids=['tt0000001'])
+    assert partition.get_continuation().ids == ['tt0000001']
+    assert not Partition(2004, 'AD').has_ids()
@@ -0,0 +1,68 @@
+import pytest
+from ..pipeline import Partition, PartitionManifest, IMDbMovie
+from .fakes import FakeFileS3
+
+
+@pytest.fixture
+def partition():
+    return Partition(year=2004, initial='AD')
+
+
+@pytest.fixture
+def target(partition):
+    manifest = PartitionManifest(bucket_name='hudsonmendes-datalake', partition=partition, flush_every=2)
+    manifest.file = FakeFileS3({'imdb_ids': {'tt0000001': 101}})
+    return manifest
+
+
+def test_partition_message_round_trip():
+    partition = Partition.from_message({'year': '2004', 'initial': 'AD', 'skip_existing': True})
+    assert partition.year == 2004
+    assert partition.get_key() == 'year-2004/initial-AD'
+    assert Partition.from_message(partition.to_message()).skip_existing
+
+
+def test_manifest_url(target):
+    assert target.file is not None
+    assert PartitionManifest.MANIFEST_URL.format(bucket_name='b', partition_key='year-2004/initial-AD') == \
+        's3://b/tmdb/manifests/year-2004/initial-AD.json'
+
+
+def test_filter_skips_existing(target):
+    movies = [IMDbMovie.from_fields(imdb_id=f'tt000000{i}', title_type='movie', title='Ad', year=2004) for i in range(1, 4)]
+    actual = [m.get_id() for m in target.load().filter(iter(movies))]
+    assert actual == ['tt0000002', 'tt0000003']
+
+
+def test_add_and_flush(target):
+    target.load()
+    assert not target.add('tt0000002', 102)
+    assert target.add('tt0000003', 103)
+    target.flush()
+    target.flush()  # nothing new, nothing written
+    assert target.file.writes == 1
+    assert target.file.doc == {'imdb_ids': {'tt0000001': 101, 'tt0000002': 102, 'tt0000003': 103}}
+
+
+def test_flush_keeps_earlier_runs_when_not_loaded(target):
+    target.add('tt0000002', 102)
+    target.flush()
+    assert target.file.doc == {'imdb_ids': {'tt0000001': 101, 'tt0000002': 102}}
+
+
+def test_load_keeps_ids_added_before(target):
+    target.add('tt0000001', 201)
+    target.load()
+    assert target.imdb_ids == {'tt0000001': 201}
+
+
+def test_shard_reads_manifest_from_before_sharding():
+    partition = Partition(year=2004, initial='AD', shard=1, shards=2)
+    manifest = PartitionManifest(bucket_name='hudsonmendes-datalake', partition=partition)
+    ids = {f'tt000000{i}': 100 + i for i in range(1, 10)}
+    manifest.unsharded_file = FakeFileS3({'imdb_ids': ids})
+    manifest.file = FakeFileS3({'imdb_ids': {'tt0000001': 201}})
+    manifest.load()
+    expected = {i for i in ids if Partition.get_shard_of(i, 2) == 1} | {'tt0000001'}
+    assert set(manifest.imdb_ids) == expected
+    assert manifest.imdb_ids['tt0000001'] == 201
@@ -0,0 +1,66 @@
+import pytest
+from ..pipeline import Partition, PartitionNotFound, TMDb, IMDbMovie, Metrics
+from .fakes import FakeFileS3
+
+DAY = 24 * 60 * 60
+
+
+class FakeTMDbMovie:
+
+    def __init__(self, imdb_id):
+        self.imdb_id = imdb_id
+
+    def has_been_found(self):
+        return False
+
+
+class FakeTMDb(TMDb):
+
+    def __init__(self):
+        super().__init__(bucket_name='hudsonmendes-datalake', api_key='none')
+        self.requested = []
+
+    def get_movie_by(self, imdb_movie, refresh=False):
+        self.requested.append(imdb_movie.get_id())
+        return FakeTMDbMovie(imdb_movie.get_id())
+
+
+@pytest.fixture
+def target():
+    not_found = PartitionNotFound(
+        bucket_name='hudsonmendes-datalake',
+        partition=Partition(year=2004, initial='AD'),
+        ttl_days=30,
+        clock=lambda: 100 * DAY)
+    not_found.file = FakeFileS3({'imdb_ids': {'tt0000001': 95, 'tt0000002': 60}})
+    return not_found
+
+
+def test_not_found_url():
+    assert PartitionNotFound.NOT_FOUND_URL.format(bucket_name='b', partition_key='year-2004/initial-AD') == \
+        's3://b/tmdb/not-found/year-2004/initial-AD.json'
+
+
+def test_load_leaves_expired_out(target):
+    target.load()
+    assert target.has('tt0000001')
+    assert not target.has('tt0000002')
+
+
+def test_add_and_flush(target):
+    target.load()
+    target.add('tt0000003')
+    target.flush()
+    assert target.file.doc == {'imdb_ids': {'tt0000001': 95, 'tt0000003': 100}}
+    target.flush()
+    assert target.file.writes == 1
+
+
+def test_tmdb_skips_movies_not_found(target):
+    movies = [IMDbMovie.from_fields(imdb_id=f'tt000000{i}', title_type='movie', title='Ad', year=2004) for i in range(1, 4)]
+    tmdb = FakeTMDb()
+    metrics = Metrics()
+    assert list(tmdb.get_movies_related_to(iter(movies), metrics=metrics, not_found=target.load())) == []
+    assert tmdb.requested == ['tt0000002', 'tt0000003']
+    assert target.has('tt0000002') and target.has('tt0000003')
+    assert metrics.get_summary()['tmdb_movies_skipped_not_found'] == 1
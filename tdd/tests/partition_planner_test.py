@@ -0,0 +1,66 @@
+import pytest
+from ..pipeline import IMDbMovie, Partition, PartitionPlanner
+
+
+@pytest.fixture
+def counts():
+    return {(2004, 'AD'): 1200, (2004, 'BR'): 300, (2004, 'CA'): 20, (2004, 'DE'): 10, (2005, 'EX'): 5}
+
+
+def test_plan_splits_hot_partitions(counts):
+    plan = PartitionPlanner(max_movies=500, min_movies=50).plan(counts)
+    shards = [p for partitions in plan for p in partitions if p.initial == 'AD']
+    assert [(p.shard, p.shards) for p in shards] == [(0, 3), (1, 3), (2, 3)]
+
+
+def test_plan_packs_small_partitions(counts):
+    plan = PartitionPlanner(max_movies=500, min_movies=50).plan(counts)
+    packed = [partitions for partitions in plan if len(partitions) > 1]
+    assert [[p.initial for p in partitions] for partitions in packed] == [['CA', 'DE', 'EX']]
+
+
+def test_plan_largest_first(counts):
+    plan = PartitionPlanner(max_movies=500, min_movies=50).plan(counts)
+    assert [partitions[0].initial for partitions in plan] == ['AD', 'AD', 'AD', 'BR', 'CA']
+
+
+def test_plan_passes_flags_on(counts):
+    plan = PartitionPlanner().plan(counts, skip_existing=True)
+    assert all(p.skip_existing for partitions in plan for p in partitions)
+
+
+def test_messages_round_trip(counts):
+    for partitions in PartitionPlanner(max_movies=500, min_movies=50).plan(counts):
+        actual = Partition.from_messages(Partition.to_messages(partitions))
+        assert [p.to_message() for p in actual] == [p.to_message() for p in partitions]
+
+
+def test_shards_cover_partition_once():
+    movies = [IMDbMovie.from_fields(f'tt{i:07d}', 'movie', 'Adventure', 2004) for i in range(100)]
+    shards = [Partition(2004, 'AD', shard=shard, shards=3) for shard in range(3)]
+    ids = [m.get_id() for shard in shards for m in shard.filter(iter(movies))]
+    assert sorted(ids) == [m.get_id() for m in movies]
+    assert all(list(shard.filter(iter(movies))) for shard in shards)
+
+
+def test_shard_key_and_continuation():
+    partition = Partition(2004, 'AD', shard=1, shards=3)
+    assert partition.get_key() == 'year-2004/initial-AD/shard-1-of-3'
+    assert partition.get_continuation().to_message() == {
+        'year': 2004, 'initial': 'AD', 'shard': 1, 'shards': 3, 'skip_existing': True, 'resume': True}
+
+
+def test_plan_keeps_pinned_shards(counts):
+    plan = PartitionPlanner(max_movies=500, min_movies=50).plan(counts, pinned={(2004, 'AD'): 2, (2004, 'BR'): 4})
+    shards = {}
+    for partitions in plan:
+        for p in partitions:
+            shards.setdefault(p.initial, set()).add(p.shards)
+    assert shards['AD'] == {2}
+    assert shards['BR'] == {4}
+    assert shards['CA'] == {None}
+
+
+def test_plan_splits_partition_pinned_unsharded():
+    plan = PartitionPlanner(max_movies=500, min_movies=50).plan({(2004, 'AD'): 2000}, pinned={(2004, 'AD'): 1})
+    assert [(p.shard, p.shards) for partitions in plan for p in partitions] == [(0, 4), (1, 4), (2, 4), (3, 4)]
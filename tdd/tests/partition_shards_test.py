@@ -0,0 +1,39 @@
+import pytest
+from ..pipeline import Partition, PartitionShards
+from .fakes import FakeFileS3
+
+
+@pytest.fixture
+def target():
+    shards = PartitionShards(bucket_name='hudsonmendes-datalake')
+    shards.file = FakeFileS3({'partitions': {'year-2004/initial-AD': 3}})
+    return shards.load()
+
+
+def test_get_pinned(target):
+    assert target.get_pinned() == {(2004, 'AD'): 3}
+    assert target.get(2004, 'AD') == 3
+    assert target.get(2004, 'BR') == 1
+
+
+def test_pin_keeps_first_plan(target):
+    target.pin([Partition(2004, 'AD', shard=0, shards=5), Partition(2004, 'CA', shard=1, shards=2)])
+    target.save()
+    target.save()  # nothing new, nothing written
+    assert target.file.writes == 1
+    assert target.file.doc == {'partitions': {'year-2004/initial-AD': 3, 'year-2004/initial-CA': 2}}
+
+
+def test_pin_skips_unsharded(target):
+    target.pin([Partition(2004, 'BR')])
+    target.save()
+    assert target.file.writes == 0
+    assert target.get_pinned() == {(2004, 'AD'): 3}
+
+
+def test_unsharded_pin_does_not_hold_back_split():
+    shards = PartitionShards(bucket_name='hudsonmendes-datalake')
+    shards.file = FakeFileS3({'partitions': {'year-2004/initial-AD': 1}})
+    assert shards.load().get_pinned() == {}
+    shards.pin([Partition(2004, 'AD', shard=0, shards=4)])
+    assert shards.get(2004, 'AD') == 4
@@ -0,0 +1,56 @@
+import pytest
+from pipeline import IMDb, TMDbClient, HttpPool, S3Pool
+from infra.runtime import Runtime
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def date_tag(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATALAKE_BUCKET_NAME', 'hudsonmendes-datalake')
+    monkeypatch.setenv('TMDB_API_KEY', 'none')
+    monkeypatch.setenv('TMDB_CACHE_MODE', 'read-through')
+    monkeypatch.setenv('TMDB_CACHE_URL', str(tmp_path / 'tmdb-cache'))
+    for target in (Runtime, TMDbClient, HttpPool, S3Pool):
+        monkeypatch.setattr(target, '_current' if target is Runtime else '_shared', None)
+    tag = [1600000000]
+    monkeypatch.setattr(IMDb, 'get_date_tag', staticmethod(lambda: tag[0]))
+    return tag
+
+
+def test_get_reuses_runtime_within_date_tag(date_tag):
+    first = Runtime.get()
+    assert not first.warm
+    second = Runtime.get()
+    assert second is first
+    assert second.warm
+
+
+def test_get_rebuilds_runtime_when_date_tag_changes(date_tag):
+    first = Runtime.get()
+    Runtime.get()
+    date_tag[0] += DAY
+    second = Runtime.get()
+    assert second is not first
+    assert not second.warm
+    assert second.date_tag == second.imdb.date_tag == date_tag[0]
+    assert Runtime.get() is second
+
+
+def test_get_rebuild_keeps_tmdb_cache(date_tag, capsys):
+    first = Runtime.get()
+    date_tag[0] += DAY
+    second = Runtime.get()
+    assert second is not first
+    assert not second.warm
+    assert second.date_tag == date_tag[0]
+    assert second.imdb.date_tag == date_tag[0]
+    assert second.tmdb_client is first.tmdb_client
+    assert second.tmdb_client.cache is first.tmdb_client.cache
+    assert 'ignoring' not in capsys.readouterr().out
+
+
+def test_s3_pool_sized_for_concurrent_writers(date_tag, monkeypatch):
+    monkeypatch.setenv('LAMBDA_MAX_PARTITIONS', '3')
+    monkeypatch.setenv('S3_MAX_WRITERS', '5')
+    assert Runtime.get().s3_pool.max_connections == 15
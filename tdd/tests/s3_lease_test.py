@@ -0,0 +1,51 @@
+import pytest
+from ..pipeline import S3Lease
+from .fakes import FakeFileS3, FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def lease_file():
+    return FakeFileS3()
+
+
+def lease_for(owner, lease_file, clock):
+    lease = S3Lease('s3://hudsonmendes-datalake/imdb/test.lease', owner=owner, ttl=60, sleep=lambda _: None, clock=clock)
+    lease.file = lease_file
+    return lease
+
+
+def test_acquire_once(lease_file, clock):
+    first = lease_for('first', lease_file, clock)
+    second = lease_for('second', lease_file, clock)
+    assert first.acquire()
+    assert not second.acquire()
+
+
+def test_acquire_after_release(lease_file, clock):
+    first = lease_for('first', lease_file, clock)
+    second = lease_for('second', lease_file, clock)
+    assert first.acquire()
+    first.release()
+    assert second.acquire()
+
+
+def test_acquire_expired(lease_file, clock):
+    first = lease_for('first', lease_file, clock)
+    second = lease_for('second', lease_file, clock)
+    assert first.acquire()
+    clock.now += 61
+    assert second.acquire()
+    first.release()  # no longer the owner, keeps the lease
+    assert lease_file.doc['owner'] == 'second'
+
+
+def test_acquire_last_writer_wins(lease_file, clock):
+    first = lease_for('first', lease_file, clock)
+    second = lease_for('second', lease_file, clock)
+    first.sleep = lambda _: lease_file.write({'owner': 'second', 'expires_at': clock.now + 60})
+    assert not first.acquire()
@@ -0,0 +1,78 @@
+import gzip
+import random
+import json
+import pytest
+from ..pipeline import S3NdJsonWriter
+
+
+class FakeS3Client:
+
+    def __init__(self, fail_complete=False):
+        self.fail_complete = fail_complete
+        self.uploads = {}
+        self.objects = {}
+        self.aborted = []
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f'upload-{len(self.uploads)}'
+        self.uploads[upload_id] = (Key, {})
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][1][PartNumber] = Body
+        return {'ETag': f'etag-{PartNumber}'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        if self.fail_complete:
+            raise IOError('failed')
+        key, parts = self.uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        self.objects[key] = b''.join(parts[number] for number in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+def read_lines(data):
+    return [json.loads(line) for line in gzip.decompress(data).decode('utf-8').splitlines()]
+
+
+def test_append_writes_gzipped_ndjson():
+    s3 = FakeS3Client()
+    with S3NdJsonWriter('s3://bucket/movies-{part}.ndjson.gz', s3=s3) as target:
+        for i in range(10):
+            target.append({'id': i})
+    assert list(s3.objects.keys()) == ['movies-0000.ndjson.gz']
+    assert read_lines(s3.objects['movies-0000.ndjson.gz']) == [{'id': i} for i in range(10)]
+
+
+def test_append_streams_parts_and_rolls_objects():
+    s3 = FakeS3Client()
+    target = S3NdJsonWriter('s3://bucket/reviews-{part}.ndjson.gz', s3=s3, max_object_size=1)
+    target.part_size = 1024  # below the S3 minimum, only for the test
+    rnd = random.Random(42)
+    docs = [{'id': i, 'content': '%064x' % rnd.getrandbits(256)} for i in range(2000)]
+    for doc in docs:
+        target.append(doc)
+    urls = target.close()
+    assert len(urls) > 1
+    assert urls[0] == 's3://bucket/reviews-0000.ndjson.gz'
+    actual = []
+    for key in sorted(s3.objects.keys()):
+        actual.extend(read_lines(s3.objects[key]))
+    assert actual == docs
+
+
+def test_nothing_appended_writes_nothing():
+    s3 = FakeS3Client()
+    assert S3NdJsonWriter('s3://bucket/movies-{part}.ndjson.gz', s3=s3).close() == []
+    assert s3.uploads == {}
+
+
+def test_failure_aborts_upload():
+    s3 = FakeS3Client(fail_complete=True)
+    target = S3NdJsonWriter('s3://bucket/movies-{part}.ndjson.gz', s3=s3)
+    target.append({'id': 1})
+    with pytest.raises(IOError):
+        target.close()
+    assert s3.aborted == ['upload-0']
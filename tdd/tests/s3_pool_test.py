@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from ..pipeline import S3Pool, FileS3
+
+
+def test_get_client_once():
+    target = S3Pool(max_connections=32)
+    clients = [target.get_client() for _ in range(3)]
+    assert all(client is clients[0] for client in clients)
+    assert clients[0].meta.config.max_pool_connections == 32
+    assert target.get_counters() == {'created': 1, 'reused': 2}
+
+
+def test_get_client_across_threads():
+    target = S3Pool()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: target.get_client(), range(50)))
+    assert len(set(id(client) for client in clients)) == 1
+    assert target.get_counters()['created'] == 1
+
+
+def test_file_s3_shares_client():
+    first = FileS3('s3://hudsonmendes-datalake/a.json')
+    second = FileS3('s3://hudsonmendes-datalake/b.json')
+    assert first.s3 is second.s3 is S3Pool.shared().get_client()
+
+
+def test_shared_keeps_pool_with_other_settings(monkeypatch, capsys):
+    monkeypatch.setattr(S3Pool, '_shared', None)
+    shared = S3Pool.shared(max_connections=32)
+    assert S3Pool.shared(max_connections=32) is shared
+    assert 'ignoring' not in capsys.readouterr().out
+    assert S3Pool.shared(max_connections=8) is shared
+    assert shared.max_connections == 32
+    assert 'ignoring other max_connections' in capsys.readouterr().out
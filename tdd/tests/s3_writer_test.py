@@ -0,0 +1,56 @@
+import time
+import threading
+import pytest
+from ..pipeline import S3Writer, S3WriterError
+
+
+class FakeS3Writer(S3Writer):
+
+    def __init__(self, fail_on=None, delay=0.0, **kwargs):
+        self.fail_on = fail_on
+        self.delay = delay
+        self.uploaded = {}
+        self.uploaded_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def put(self, url, json_data):
+        time.sleep(self.delay)
+        if url == self.fail_on:
+            raise IOError('access denied')
+        with self.uploaded_lock:
+            self.uploaded[url] = json_data
+
+
+def test_write_uploads_everything_on_close():
+    with FakeS3Writer(max_workers=4, max_queued=2) as target:
+        for i in range(20):
+            target.write(f's3://bucket/{i}.json', {'id': i})
+    assert len(target.uploaded) == 20
+    assert target.written == 20
+
+
+def test_write_uploads_concurrently():
+    target = FakeS3Writer(max_workers=8, delay=0.05)
+    started = time.monotonic()
+    for i in range(16):
+        target.write(f's3://bucket/{i}.json', {'id': i})
+    target.close()
+    assert time.monotonic() - started < 0.5
+
+
+def test_flush_waits_for_queue():
+    target = FakeS3Writer(delay=0.01)
+    target.write('s3://bucket/1.json', {'id': 1})
+    target.flush()
+    assert 's3://bucket/1.json' in target.uploaded
+    target.close()
+
+
+def test_failed_upload_fails_on_close():
+    target = FakeS3Writer(fail_on='s3://bucket/3.json')
+    for i in range(5):
+        target.write(f's3://bucket/{i}.json', {'id': i})
+    with pytest.raises(S3WriterError) as e:
+        target.close()
+    assert 's3://bucket/3.json' in str(e.value)
+    assert len(target.uploaded) == 4
@@ -0,0 +1,88 @@
+import os
+import pytest
+from ..pipeline import TMDbCache, TMDbCacheMiss, TMDbDiskCache, HttpPool
+from .fake_server import FakeServer
+from .fakes import FakeClock, fake_client
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return TMDbDiskCache(folder=str(tmp_path))
+
+
+def test_key_strips_api_key():
+    a = TMDbCache.get_key_url('https://api.themoviedb.org/3/find/tt1?api_key=secret&language=en-US')
+    b = TMDbCache.get_key_url('https://api.themoviedb.org/3/find/tt1?language=en-US&api_key=other')
+    assert a == b == 'https://api.themoviedb.org/3/find/tt1?language=en-US'
+    assert TMDbCache.get_key(a) == TMDbCache.get_key(b)
+
+
+def test_read_through_with_ttl(backend, clock):
+    cache = TMDbCache(backend, mode='read-through', ttl=60, clock=clock)
+    assert cache.get('https://h/3/movie/1?api_key=x') is None
+    cache.put('https://h/3/movie/1?api_key=x', {'id': 1})
+    assert cache.get('https://h/3/movie/1?api_key=y') == {'id': 1}
+    clock.now += 61
+    assert cache.get('https://h/3/movie/1?api_key=x') is None
+
+
+def test_refresh_and_offline(backend, clock):
+    TMDbCache(backend, mode='read-through', clock=clock).put('https://h/3/movie/1', {'id': 1})
+    assert TMDbCache(backend, mode='refresh', clock=clock).get('https://h/3/movie/1') is None
+    assert TMDbCache(backend, mode='offline', clock=clock).get('https://h/3/movie/1') == {'id': 1}
+    with pytest.raises(TMDbCacheMiss):
+        TMDbCache(backend, mode='offline', clock=clock).get('https://h/3/movie/2')
+
+
+def test_disk_eviction(tmp_path):
+    backend = TMDbDiskCache(folder=str(tmp_path), max_bytes=1000)
+    cache = TMDbCache(backend)
+    for i in range(20):
+        cache.put(f'https://h/3/movie/{i}', {'overview': 'x' * 100})
+    total = sum(os.path.getsize(path) for path, _ in backend.list_files())
+    assert total <= 1000
+    assert cache.get('https://h/3/movie/19') is not None
+
+
+def test_client_answers_from_cache(backend):
+    paths = []
+
+    def respond(path):
+        paths.append(path)
+        return 200, {}, {'id': len(paths)}
+
+    cache = TMDbCache(backend, mode='read-through')
+    with FakeServer(respond) as server:
+        client = fake_client(http=HttpPool(), cache=cache)
+        first = client.get_json(f'{server.url}/3/movie/1?api_key=a')
+        second = client.get_json(f'{server.url}/3/movie/1?api_key=b')
+    assert first == second == {'id': 1}
+    assert len(paths) == 1
+
+
+def test_refresh_request_skips_cache_read(backend, clock):
+    TMDbCache(backend, mode='read-through', clock=clock).put('https://h/3/movie/1', {'id': 1})
+    assert TMDbCache(backend, mode='read-through', clock=clock).get('https://h/3/movie/1', refresh=True) is None
+    assert TMDbCache(backend, mode='offline', clock=clock).get('https://h/3/movie/1', refresh=True) == {'id': 1}
+
+
+def test_not_found_expires_sooner(backend, clock):
+    cache = TMDbCache(backend, mode='read-through', not_found_ttl=60, clock=clock)
+    cache.put('https://h/3/find/tt1', {'movie_results': []})
+    cache.put('https://h/3/find/tt2', {'movie_results': [{'id': 2}]})
+    clock.now += 61
+    assert cache.get('https://h/3/find/tt1') is None
+    assert cache.get('https://h/3/find/tt2') == {'movie_results': [{'id': 2}]}
+
+
+def test_disk_size_on_overwrite(tmp_path):
+    backend = TMDbDiskCache(folder=str(tmp_path))
+    cache = TMDbCache(backend, mode='refresh')
+    for _ in range(5):
+        cache.put('https://h/3/movie/1', {'overview': 'x' * 100})
+    assert backend.size == sum(os.path.getsize(path) for path, _ in backend.list_files())
@@ -0,0 +1,107 @@
+import io
+import json
+import datetime
+import pytest
+from urllib.parse import urlparse, parse_qs
+from ..pipeline import TMDbChanges, Partition, PartitionShards
+from .fake_server import FakeServer
+from .fakes import FakeFileS3, fake_client
+
+
+class FakePaginator:
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def paginate(self, Bucket, Prefix):
+        yield {'Contents': [{'Key': key} for key in self.keys if key.startswith(Prefix)]}
+
+
+class FakeS3Client:
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_paginator(self, name):
+        return FakePaginator(sorted(self.objects))
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(json.dumps(self.objects[Key]).encode('utf-8'))}
+
+
+@pytest.fixture
+def fake_changes(monkeypatch):
+
+    def respond(path):
+        query = parse_qs(urlparse(path).query)
+        start_date, page = query['start_date'][0], int(query['page'][0])
+        base = int(start_date.replace('-', '')) % 1000
+        results = [{'id': base + page * 10 + i, 'adult': i == 2} for i in range(3)]
+        return 200, {}, {'page': page, 'total_pages': 2, 'results': results}
+
+    with FakeServer(respond) as server:
+        monkeypatch.setattr(TMDbChanges, 'URL_TMPL', server.url + '/3/movie/changes?api_key={api_key}&start_date={start_date}&end_date={end_date}&page={page}')
+        yield server
+
+
+@pytest.fixture
+def s3():
+    return FakeS3Client({
+        'tmdb/manifests/year-2004/initial-AD.json': {'imdb_ids': {'tt0000001': 111, 'tt0000002': 121}},
+        'tmdb/manifests/year-2004/initial-BR/shard-0-of-2.json': {'imdb_ids': {'tt0000003': 130}},
+        'tmdb/manifests/year-2004/initial-BR/shard-1-of-2.json': {'imdb_ids': {'tt0000004': 999}},
+        'tmdb/movies/year-2004/initial-AD/tmdb-movie-111.json': {'id': 111, 'id_imdb': 'tt0000001'},
+        'tmdb/movies/year-2003/initial-CA/tmdb-movie-140.json': {'id': 140, 'id_imdb': 'tt0000005'},
+        'tmdb/movies/year-2004/initial-BR/tmdb-movie-150.json': {'id': 150, 'id_imdb': 'tt0000006'},
+    })
+
+
+@pytest.fixture
+def target(s3):
+    shards = PartitionShards(bucket_name='hudsonmendes-datalake')
+    shards.file = FakeFileS3({'partitions': {'year-2004/initial-BR': 2}})
+    changes = TMDbChanges(bucket_name='hudsonmendes-datalake', api_key='none', client=fake_client(), s3=s3, shards=shards)
+    changes.watermark_file = FakeFileS3()
+    return changes
+
+
+def test_changed_ids_paginated_in_windows_of_14_days(fake_changes, target):
+    changed = target.get_changed_ids(datetime.date(2020, 10, 1), datetime.date(2020, 10, 20))
+    windows = sorted(set(
+        (parse_qs(urlparse(path).query)['start_date'][0], parse_qs(urlparse(path).query)['end_date'][0])
+        for path in fake_changes.paths))
+    assert windows == [('2020-10-01', '2020-10-14'), ('2020-10-15', '2020-10-20')]
+    assert len(fake_changes.paths) == 4
+    assert 1 + 10 in changed and 1 + 12 not in changed  # adult movies left out
+
+
+def test_known_movies_from_manifests_and_listing(target):
+    known = target.get_known_movies()
+    assert {tmdb_id: (p.get_key(), imdb_id) for tmdb_id, (p, imdb_id) in known.items()} == {
+        111: ('year-2004/initial-AD', 'tt0000001'),
+        121: ('year-2004/initial-AD', 'tt0000002'),
+        130: ('year-2004/initial-BR/shard-0-of-2', 'tt0000003'),
+        999: ('year-2004/initial-BR/shard-1-of-2', 'tt0000004'),
+        140: ('year-2003/initial-CA', None),
+        150: ('year-2004/initial-BR', None)}
+
+
+def test_refresh_partitions(target):
+    partitions = target.get_refresh_partitions({111, 130, 140, 150, 555}, target.get_known_movies())
+    expected = [
+        {'year': 2003, 'initial': 'CA', 'ids': ['tt0000005'], 'refresh': True},
+        {'year': 2004, 'initial': 'AD', 'ids': ['tt0000001'], 'refresh': True},
+        {'year': 2004, 'initial': 'BR', 'shard': 0, 'shards': 2, 'ids': ['tt0000003'], 'refresh': True},
+        {'year': 2004, 'initial': 'BR', 'shard': 1, 'shards': 2, 'ids': ['tt0000006'], 'refresh': True}]  # pinned
+    assert [p.to_message() for p in partitions] == expected
+
+
+def test_watermark(target):
+    assert target.get_watermark() is None
+    target.save_watermark(datetime.date(2020, 10, 20))
+    assert target.get_watermark() == datetime.date(2020, 10, 20)
+
+
+def test_refresh_continuation_does_not_skip_existing():
+    continuation = Partition(2004, 'AD', ids=['tt0000001'], refresh=True).get_continuation()
+    assert continuation.refresh and continuation.resume and not continuation.skip_existing
@@ -0,0 +1,133 @@
+import time
+import socket
+import threading
+import http.client as http_client
+import pytest
+from urllib.error import HTTPError
+from ..pipeline import TMDbClient, TMDbCache, RateLimiter
+from .fake_server import FakeServer
+from .fakes import fake_client
+
+
+def test_rate_limiter_burst_then_rate():
+    target = RateLimiter(rate=50, burst=5)
+    started = time.monotonic()
+    for _ in range(10):
+        target.acquire()
+    elapsed = time.monotonic() - started
+    assert 0.08 <= elapsed < 0.5  # 5 in the burst, 5 at 50/s
+
+
+def test_rate_limiter_thread_safe():
+    target = RateLimiter(rate=1000, burst=1)
+    acquired = []
+
+    def work():
+        for _ in range(20):
+            target.acquire()
+            acquired.append(time.monotonic())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=work) for _ in range(5)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert len(acquired) == 100
+    assert time.monotonic() - started >= 0.09
+
+
+def test_retry_after_seconds_and_date():
+    assert TMDbClient.get_retry_after({'Retry-After': '2'}) == 2.0
+    assert TMDbClient.get_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+    assert TMDbClient.get_retry_after({}) is None
+
+
+def test_get_json_retries_429_honouring_retry_after():
+    attempts = []
+
+    def respond(path):
+        attempts.append(path)
+        if len(attempts) < 3:
+            return 429, {'Retry-After': '0.05'}, {'status_message': 'slow down'}
+        return 200, {}, {'page': 1, 'results': []}
+
+    with FakeServer(respond) as server:
+        target = TMDbClient(rate_limiter=RateLimiter(rate=100, burst=10))
+        started = time.monotonic()
+        assert target.get_json(f'{server.url}/3/movie/1/reviews') == {'page': 1, 'results': []}
+        assert len(attempts) == 3
+        assert time.monotonic() - started >= 0.1
+
+
+def test_get_json_gives_up_after_max_retries():
+    with FakeServer(lambda path: (503, {}, {})) as server:
+        target = TMDbClient(max_retries=2, backoff=0.001)
+        with pytest.raises(HTTPError) as e:
+            target.get_json(f'{server.url}/3/find/tt0000001')
+        assert e.value.code == 503
+        assert len(server.paths) == 3
+
+
+def test_get_json_does_not_retry_not_found():
+    with FakeServer(lambda path: (404, {}, {})) as server:
+        with pytest.raises(HTTPError):
+            TMDbClient().get_json(f'{server.url}/3/movie/1/reviews')
+        assert len(server.paths) == 1
+
+
+def test_retry_after_capped_to_max_backoff():
+    attempts = []
+
+    def respond(path):
+        attempts.append(path)
+        if len(attempts) < 2:
+            return 429, {'Retry-After': '3600'}, {}
+        return 200, {}, {'id': 1}
+
+    with FakeServer(respond) as server:
+        target = TMDbClient(rate_limiter=RateLimiter(rate=100, burst=10), max_backoff=0.05)
+        started = time.monotonic()
+        assert target.get_json(f'{server.url}/3/movie/1') == {'id': 1}
+        assert time.monotonic() - started < 1
+
+
+class FakeResponse:
+
+    def __init__(self, body):
+        self.body = body
+
+
+class FlakyHttp:
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+
+    def request(self, method, url, headers=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeResponse(b'{"id": 1}')
+
+
+def test_get_json_retries_timeouts():
+    http = FlakyHttp([socket.timeout('timed out'), http_client.RemoteDisconnected('closed')])
+    target = fake_client(http=http)
+    assert target.get_json('https://api.themoviedb.org/3/movie/1') == {'id': 1}
+
+
+def test_shared_keeps_client_with_other_settings(monkeypatch, capsys):
+    monkeypatch.setattr(TMDbClient, '_shared', None)
+    shared = TMDbClient.shared(rate=10, burst=20)
+    assert TMDbClient.shared() is shared
+    assert TMDbClient.shared(rate=10) is shared
+    assert 'ignoring' not in capsys.readouterr().out
+    assert TMDbClient.shared(rate=40) is shared
+    assert shared.rate_limiter.rate == 10
+    assert 'ignoring other rate' in capsys.readouterr().out
+
+
+def test_shared_compares_cache_by_settings(monkeypatch, capsys, tmp_path):
+    monkeypatch.setattr(TMDbClient, '_shared', None)
+    shared = TMDbClient.shared(cache=TMDbCache.from_url(str(tmp_path), mode='read-through', ttl=60))
+    assert TMDbClient.shared(cache=TMDbCache.from_url(str(tmp_path), mode='read-through', ttl=60)) is shared
+    assert 'ignoring' not in capsys.readouterr().out
+    assert TMDbClient.shared(cache=TMDbCache.from_url(str(tmp_path), mode='offline', ttl=60)) is shared
+    assert 'ignoring other cache' in capsys.readouterr().out
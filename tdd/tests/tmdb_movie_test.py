@@ -1,6 +1,8 @@
 import pytest
 import configparser
 from ..pipeline import TMDbMovie, FileS3
+from .fake_server import FakeServer
+from .fakes import fake_client
 
 
 @pytest.fixture
@@ -68,3 +70,42 @@ def test_has_been_found_False(bucket_name, api_key):
         imdb_id='tt0124798',
         bucket_name=bucket_name,
         api_key=api_key).has_been_found()
+
+
+@pytest.fixture
+def fake_details(monkeypatch):
+
+    def respond(path):
+        imdb_id = path.split('/')[3].split('?')[0]
+        if imdb_id == 'tt0000404':
+            return 404, {}, {'status_code': 34}
+        reviews = {'page': 1, 'total_pages': 1, 'results': [{'id': 'r1'}]}
+        return 200, {}, {'id': 101, 'title': 'Adventure', 'genres': [{'id': 18, 'name': 'Drama'}], 'runtime': 90, 'reviews': reviews}
+
+    with FakeServer(respond) as server:
+        monkeypatch.setattr(TMDbMovie, 'DETAILS_URL_TMPL', server.url + '/3/movie/{imdb_id}?api_key={api_key}&append_to_response=reviews')
+        yield server
+
+
+def fake_details_target(imdb_id, **kwargs):
+    return TMDbMovie(year=2000, initial='A', imdb_id=imdb_id, bucket_name='none', api_key='none', client=fake_client(), fetch_mode='details', **kwargs)
+
+
+def test_details_shaped_as_find_result(fake_details):
+    target = fake_details_target('tt0000001')
+    doc = target.get_document()
+    assert doc['id'] == 101 and doc['id_imdb'] == 'tt0000001'
+    assert doc['genre_ids'] == [18]
+    assert 'runtime' not in doc and 'reviews' not in doc
+    assert target.reviews_page['results'] == [{'id': 'r1'}]
+    assert len(fake_details.paths) == 1
+
+
+def test_details_document(fake_details):
+    doc = fake_details_target('tt0000001', document='details').get_document()
+    assert doc['runtime'] == 90 and doc['genres'] == [{'id': 18, 'name': 'Drama'}]
+    assert 'reviews' not in doc
+
+
+def test_details_not_found(fake_details):
+    assert not fake_details_target('tt0000404').has_been_found()
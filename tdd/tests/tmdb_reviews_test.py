@@ -1,6 +1,8 @@
 import pytest
 import configparser
-from ..pipeline import TMDbReviews, FileS3
+from ..pipeline import TMDbReviews, TMDbReviewsError, FileS3
+from .fake_server import FakeServer
+from .fakes import fake_client
 
 
 @pytest.fixture
@@ -50,3 +52,60 @@ def test_save(target):
     urls = target.save()
     assert len(urls) >= 2
     assert all([FileS3(url).get_size() > 0 for url in urls])
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    failures = {}
+
+    def respond(path):
+        movie_id = int(path.split('/')[3])
+        page = int(path.split('page=')[1])
+        if movie_id == 404:
+            return 404, {}, {}
+        if failures.get(page, 0) > 0:
+            failures[page] -= 1
+            return 503, {}, {}
+        results = [{'id': f'{page}-{i}'} for i in range(2)]
+        return 200, {}, {'page': page, 'total_pages': 5, 'results': results}
+
+    with FakeServer(respond) as server:
+        monkeypatch.setattr(TMDbReviews, 'URL_TMPL', server.url + '/3/movie/{movie_id}/reviews?api_key={api_key}&page={page}')
+        yield server, failures
+
+
+def fake_target(movie_id, **kwargs):
+    return TMDbReviews(year=2000, initial='A', movie_id=movie_id, bucket_name='none', api_key='none', client=fake_client(max_retries=1), **kwargs)
+
+
+def test_get_documents_all_pages_in_order(fake_pages):
+    server, failures = fake_pages
+    failures[3] = 1  # retried by the client
+    docs = fake_target(movie_id=1).get_documents()
+    assert [doc['id'] for doc in docs] == [f'{page}-{i}' for page in range(1, 6) for i in range(2)]
+    assert all(doc['movie_id'] == 1 for doc in docs)
+
+
+def test_get_documents_max_pages(fake_pages):
+    server, _ = fake_pages
+    assert len(fake_target(movie_id=1, max_pages=2).get_documents()) == 4
+    assert len(server.paths) == 2
+
+
+def test_get_documents_movie_not_found(fake_pages):
+    assert fake_target(movie_id=404).get_documents() == []
+
+
+def test_get_documents_failed_page_is_reported(fake_pages):
+    _, failures = fake_pages
+    failures[4] = 100
+    with pytest.raises(TMDbReviewsError):
+        fake_target(movie_id=1, page_retries=1).get_documents()
+
+
+def test_get_documents_from_appended_first_page(fake_pages):
+    server, _ = fake_pages
+    first_page = {'page': 1, 'total_pages': 3, 'results': [{'id': 'appended'}]}
+    docs = fake_target(movie_id=1, first_page=first_page).get_documents()
+    assert [doc['id'] for doc in docs] == ['appended', '2-0', '2-1', '3-0', '3-1']
+    assert len(server.paths) == 2
@@ -0,0 +1,70 @@
+import time
+import random
+import threading
+import pytest
+from ..pipeline import TMDb, IMDbMovie
+
+
+class FakeTMDb(TMDb):
+
+    def __init__(self, **kwargs):
+        super().__init__(bucket_name='hudsonmendes-datalake', api_key='none', **kwargs)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def fetch_movie_and_reviews(self, imdb_movie, metrics=None, not_found=None, refresh=False):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(random.uniform(0, 0.01))
+        with self.lock:
+            self.running -= 1
+        if imdb_movie.get_id().endswith('0'):
+            return None  # not found in TMDb
+        return imdb_movie.get_id(), None
+
+
+@pytest.fixture
+def imdb_movies():
+    return [IMDbMovie.from_fields(imdb_id=f'tt{i:07d}', title_type='movie', title='Heroes', year=2004) for i in range(50)]
+
+
+@pytest.fixture
+def expected(imdb_movies):
+    return [m.get_id() for m in imdb_movies if not m.get_id().endswith('0')]
+
+
+def test_get_movies_related_to_sequential(imdb_movies, expected):
+    target = FakeTMDb()
+    actual = [imdb_id for imdb_id, _ in target.get_movies_related_to(iter(imdb_movies))]
+    assert actual == expected
+    assert target.max_running == 1
+
+
+def test_get_movies_related_to_concurrent(imdb_movies, expected):
+    target = FakeTMDb(max_workers=8)
+    actual = [imdb_id for imdb_id, _ in target.get_movies_related_to(iter(imdb_movies))]
+    assert sorted(actual) == expected
+    assert 1 < target.max_running <= 8
+
+
+def test_get_movies_related_to_preserve_order(imdb_movies, expected):
+    target = FakeTMDb(max_workers=8, preserve_order=True)
+    actual = [imdb_id for imdb_id, _ in target.get_movies_related_to(iter(imdb_movies))]
+    assert actual == expected
+
+
+def test_get_movies_related_to_backpressure(imdb_movies):
+    pulled = []
+
+    def stream():
+        for imdb_movie in imdb_movies:
+            pulled.append(imdb_movie)
+            yield imdb_movie
+
+    target = FakeTMDb(max_workers=4)
+    pairs = target.get_movies_related_to(stream())
+    next(pairs)
+    assert len(pulled) <= 4 * 2 + 1
+    pairs.close()